@@ -13,12 +13,17 @@ if config.config_file_name is not None:
 
 # add model's MetaData object here
 from app.db.base import Base
+from app.db.backfill import CHECKPOINT_TABLE
 target_metadata = Base.metadata
 
 # Allow DATABASE_URL override via env var, useful for CI/CD
 db_url = os.getenv("DATABASE_URL", config.get_main_option("sqlalchemy.url"))
 config.set_main_option("sqlalchemy.url", db_url)
 
+def include_name(name, type_, parent_names) -> bool:
+    # Bookkeeping of app/db/backfill.py, not part of the models
+    return not (type_ == "table" and name == CHECKPOINT_TABLE)
+
 def run_migrations_offline() -> None:
     # Run migrations in offline mode
     url = config.get_main_option("sqlalchemy.url")
@@ -39,7 +44,14 @@ def run_migrations_online() -> None:
         poolclass=pool.NullPool,
     )
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # Commit each revision as it completes, so an interrupted upgrade
+            # resumes from the last finished revision instead of starting over
+            transaction_per_migration=True,
+            include_name=include_name,
+        )
         with context.begin_transaction():
             context.run_migrations()
 
@@ -0,0 +1,41 @@
+"""Add composite (owner_id, id) index on items
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Every items query is scoped by owner_id and ordered/filtered by id,
+    # so (owner_id, id) serves list pagination as well as per-item lookups.
+    # CREATE INDEX CONCURRENTLY does not block writes, but it cannot run
+    # inside a transaction block, hence the autocommit block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_items_owner_id_id',
+            'items',
+            ['owner_id', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_items_owner_id_id',
+            table_name='items',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,70 @@
+"""Add items.version, users.items_version and the collection version triggers
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Constant server defaults let Postgres add both columns without a table rewrite
+    op.add_column(
+        'items',
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    )
+    op.add_column(
+        'users',
+        sa.Column('items_version', sa.BigInteger(), server_default='0', nullable=False),
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_items_version() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE users SET items_version = items_version + 1
+                WHERE id IN (SELECT owner_id FROM new_items);
+            ELSIF TG_OP = 'UPDATE' THEN
+                UPDATE users SET items_version = items_version + 1
+                WHERE id IN (SELECT owner_id FROM new_items UNION SELECT owner_id FROM old_items);
+            ELSE
+                UPDATE users SET items_version = items_version + 1
+                WHERE id IN (SELECT owner_id FROM old_items);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    # Transition tables allow only one event per trigger
+    op.execute("""
+        CREATE TRIGGER items_version_insert AFTER INSERT ON items
+            REFERENCING NEW TABLE AS new_items
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_items_version()
+    """)
+    op.execute("""
+        CREATE TRIGGER items_version_update AFTER UPDATE ON items
+            REFERENCING OLD TABLE AS old_items NEW TABLE AS new_items
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_items_version()
+    """)
+    op.execute("""
+        CREATE TRIGGER items_version_delete AFTER DELETE ON items
+            REFERENCING OLD TABLE AS old_items
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_items_version()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS items_version_delete ON items")
+    op.execute("DROP TRIGGER IF EXISTS items_version_update ON items")
+    op.execute("DROP TRIGGER IF EXISTS items_version_insert ON items")
+    op.execute("DROP FUNCTION IF EXISTS bump_items_version()")
+    op.drop_column('users', 'items_version')
+    op.drop_column('items', 'version')
@@ -0,0 +1,67 @@
+"""Add items.search_vector with its GIN index, and the name trigram index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# Same expression as app.models.item.SEARCH_VECTOR_SQL, copied so this
+# migration keeps working if the model changes later
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    # A stored generated column is computed for every existing row, so this
+    # rewrites the table under an exclusive lock; schedule it accordingly on
+    # large tables. It cannot be backfilled with app.db.backfill.run_batched
+    # instead: a generated column is only ever written by Postgres.
+    op.add_column(
+        'items',
+        sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True)),
+    )
+    # The indexes are built without blocking writes (see migration 0002)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_items_search_vector',
+            'items',
+            ['search_vector'],
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # pg_trgm is optional (Postgres contrib); autocomplete works without it
+        available = op.get_bind().execute(
+            sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        ).first()
+        if available:
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_name_trgm "
+                "ON items USING gin (name gin_trgm_ops)"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_items_name_trgm")
+        op.drop_index(
+            'ix_items_search_vector',
+            table_name='items',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('items', 'search_vector')
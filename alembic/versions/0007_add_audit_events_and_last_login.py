@@ -0,0 +1,37 @@
+"""Add the audit_events table and users.last_login
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable without a default: adding the column is a catalog-only change
+    op.add_column('users', sa.Column('last_login', sa.DateTime(timezone=True), nullable=True))
+    op.create_table(
+        'audit_events',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('action', sa.String(length=64), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_audit_events_user_id_occurred_at', 'audit_events', ['user_id', 'occurred_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_events_user_id_occurred_at', table_name='audit_events')
+    op.drop_table('audit_events')
+    op.drop_column('users', 'last_login')
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import cast
+from app.api import common
+from app.core.hashing import HashingBusy, run_hashing_async
+from app.core.metrics import PASSWORD_REHASHES
+from app.core.rate_limit import login_limiter
+from app.core.security import verify_and_update, hash_password
+from app.crud import user as crud_user
+from app.db.session import get_async_db
+from app.schemas.user import UserCreate, UserRead
+
+# Async mirror of app/api/auth.py, mounted instead of it when DB_ASYNC is set.
+# Argon2 runs on the dedicated hashing executor, off the event loop.
+
+router = APIRouter()
+
+@router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
+async def register(user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    # Register a new user
+    user = (await db.scalars(crud_user.BY_EMAIL, {"email": user_in.email})).first()
+    if user:
+        raise common.email_in_use_exception()
+    try:
+        hashed_password = await run_hashing_async(hash_password, user_in.password)
+    except HashingBusy:
+        raise common.hashing_busy_exception()
+    row = (await db.execute(crud_user.register_stmt(user_in.email, hashed_password))).first()
+    if row is None:
+        raise common.email_in_use_exception()
+    await db.commit()
+    return common.registered(row)
+
+@router.post("/login")
+async def login(
+    request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    # Login and get an access token.
+    if login_limiter is not None:
+        retry_after = await login_limiter.check_async(
+            request.client.host if request.client else None, form_data.username
+        )
+        if retry_after:
+            raise common.rate_limited_exception(retry_after)
+    user = (await db.scalars(crud_user.BY_EMAIL, {"email": form_data.username})).first()
+    verified, new_hash = False, None
+    try:
+        if user is not None:
+            verified, new_hash = await run_hashing_async(verify_and_update, form_data.password, user.hashed_password)
+    except HashingBusy:
+        raise common.hashing_busy_exception()
+    if not user or not verified:
+        raise common.login_failed(cast(int, user.id) if user else None)
+    # Read before the rehash commit expires the instance, which would make
+    # each later attribute access a refresh SELECT
+    user_id, token_version = cast(int, user.id), cast(int, user.token_version)
+    if new_hash is not None:
+        # Stored with older Argon2 costs; the user just proved the password
+        params = {"user_id": user_id, "old_hash": user.hashed_password, "new_hash": new_hash}
+        await db.execute(crud_user.REHASH, params)
+        await db.commit()
+        PASSWORD_REHASHES.inc()
+    return common.logged_in(user_id, token_version)
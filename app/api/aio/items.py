@@ -0,0 +1,212 @@
+from fastapi import APIRouter, Body, Depends, Header, Query, status, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional
+
+from app.api import common
+from app.api.common import oauth2_scheme
+from app.crud import item as crud_item
+from app.crud import user as crud_user
+from app.db.session import get_async_db, get_async_read_db
+from app.schemas.item import ItemBulkResult, ItemBulkUpdate, ItemCreate, ItemPage, ItemRead, ItemSuggestion, ItemUpdate
+from app.core.config import settings
+from app.core.user_cache import CurrentUser, remember_user, user_cache, user_generation
+
+# Async mirror of app/api/items.py, mounted instead of it when DB_ASYNC is set.
+# Handlers await the database on the event loop rather than occupying a
+# threadpool worker for the duration of each query.
+
+router = APIRouter()
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+) -> CurrentUser:
+    # Dependency to get the current authenticated user.
+    # The user's active flag and token version come from the in-process
+    # cache; Postgres is only queried on a cache miss, and always on the
+    # primary. A replica may not have replayed a deactivation or a
+    # token_version bump yet, and whatever is read here is cached for
+    # USER_CACHE_TTL_SECONDS. Stickiness does not help: it follows the user
+    # who wrote (an admin, say), not the user whose row changed.
+    claims = common.token_claims(token)
+    user_id = int(claims.subject)
+    # A commit on db keeps this user's reads on the primary for a while;
+    # read_db checks that before picking a replica (see app/db/replicas.py)
+    db.info["user_id"] = read_db.info["user_id"] = user_id
+    generation = user_generation(user_id)
+    state = user_cache.get(user_id)
+    if state is None:
+        row = (await db.execute(crud_user.AUTH_STATE, {"user_id": user_id})).first()
+        if row is None:
+            raise common.credentials_exception()
+        state = remember_user(user_id, row.is_active, row.token_version, generation)
+    return common.authorized_user(user_id, claims, state)
+
+@router.post("/", response_model=ItemRead, status_code=status.HTTP_201_CREATED)
+async def create_item(payload: ItemCreate, response: Response, db: AsyncSession = Depends(get_async_db), current_user: CurrentUser = Depends(get_current_user)):
+    # Create a new item for the current user.
+    row = (await db.execute(crud_item.insert_stmt(current_user.id, payload))).one()
+    await db.commit()
+    return common.item_created(current_user.id, row, response)
+
+async def _stream_rows(db: AsyncSession, owner_id: int, after_id: int) -> AsyncIterator[bytes]:
+    stmt = crud_item.owner_rows_stmt(owner_id, after_id).execution_options(
+        yield_per=settings.items_stream_batch_size
+    )
+    result = await db.stream(stmt)
+    async for batch in result.partitions():
+        yield crud_item.ndjson_rows(batch)
+
+async def _stream_items(db: AsyncSession, owner_id: int, after_id: int) -> AsyncIterator[str]:
+    # Same batching as the sync router, over an async server-side cursor
+    stmt = crud_item.owner_items_stmt(owner_id, after_id).execution_options(
+        yield_per=settings.items_stream_batch_size
+    )
+    result = await db.stream_scalars(stmt)
+    async for batch in result.partitions():
+        yield crud_item.ndjson_batch(batch)
+        for item in batch:
+            db.expunge(item)
+
+@router.get("/", response_model=ItemPage)
+async def get_items(
+    response: Response,
+    limit: int = Query(default=settings.items_page_size, ge=1, le=settings.items_page_size_max),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Retrieve the current user's items, one keyset page at a time.
+    after_id = common.page_position(cursor, current_user.id)
+
+    # The collection version is read before any rows: if a write lands in
+    # between, the response is newer than its ETag, which only costs the
+    # client one extra refetch later, never a stale 304.
+    items_version = (await db.execute(crud_user.ITEMS_VERSION, {"user_id": current_user.id})).scalar_one()
+    etag = common.page_etag(current_user.id, items_version, after_id, limit, stream)
+    not_modified = common.not_modified_for(if_none_match_header, etag)
+    if not_modified is not None:
+        return not_modified
+
+    if stream:
+        stream_rows = _stream_rows if settings.items_fast_json else _stream_items
+        return common.stream_response(stream_rows(db, current_user.id, after_id), etag)
+
+    if settings.items_fast_json:
+        rows = (await db.execute(crud_item.PAGE_ROWS, crud_item.page_params(current_user.id, after_id, limit))).all()
+        return common.fast_page_response(rows, current_user.id, limit, etag)
+
+    items = (await db.scalars(crud_item.PAGE, crud_item.page_params(current_user.id, after_id, limit))).all()
+    return common.page_response(items, current_user.id, limit, etag, response)
+
+# Search endpoints. Like the bulk ones below, declared before /{item_id}.
+
+@router.get("/search", response_model=ItemPage)
+async def search_items(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=settings.items_page_size, ge=1, le=settings.items_page_size_max),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Full-text search over the current user's item names and descriptions,
+    # best matches first, with keyset pagination over (rank, id).
+    after = common.search_position(cursor, current_user.id, q)
+    rows = (await db.execute(crud_item.search_stmt(current_user.id, q, after, limit))).all()
+    return crud_item.build_search_page(rows, current_user.id, q, limit)
+
+@router.get("/autocomplete", response_model=List[ItemSuggestion])
+async def autocomplete_items(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Case-insensitive name prefix matches, in name order.
+    rows = (await db.execute(crud_item.autocomplete_stmt(current_user.id, prefix, limit))).all()
+    return crud_item.suggestions(rows)
+
+# Bulk endpoints. Declared before the /{item_id} routes so "bulk" is not
+# parsed as an item id. Each runs one statement in one transaction.
+BulkBatch = Body(..., min_length=1, max_length=settings.items_bulk_max_batch)
+
+@router.post("/bulk", response_model=List[ItemBulkResult], status_code=status.HTTP_201_CREATED)
+async def create_items_bulk(payload: List[ItemCreate] = BulkBatch, db: AsyncSession = Depends(get_async_db), current_user: CurrentUser = Depends(get_current_user)):
+    # Create many items with a single INSERT ... RETURNING.
+    rows = (await db.execute(
+        crud_item.bulk_insert_stmt(len(payload)),
+        crud_item.bulk_insert_params(current_user.id, payload),
+    )).all()
+    await db.commit()
+    return common.bulk_created(current_user.id, rows)
+
+@router.patch("/bulk", response_model=List[ItemBulkResult])
+async def update_items_bulk(payload: List[ItemBulkUpdate] = BulkBatch, db: AsyncSession = Depends(get_async_db), current_user: CurrentUser = Depends(get_current_user)):
+    # Partially update many items with a single UPDATE ... FROM (VALUES ...) RETURNING.
+    common.check_distinct_ids(payload)
+    rows = (await db.execute(crud_item.bulk_update_stmt(current_user.id, payload))).all()
+    await db.commit()
+    return common.bulk_updated(current_user.id, payload, rows)
+
+@router.delete("/bulk", response_model=List[ItemBulkResult])
+async def delete_items_bulk(item_ids: List[int] = BulkBatch, db: AsyncSession = Depends(get_async_db), current_user: CurrentUser = Depends(get_current_user)):
+    # Delete many items with a single DELETE ... WHERE id = ANY(...) RETURNING.
+    deleted_ids = (await db.scalars(crud_item.bulk_delete_stmt(current_user.id, item_ids))).all()
+    await db.commit()
+    return common.bulk_deleted(current_user.id, item_ids, deleted_ids)
+
+@router.get("/{item_id}", response_model=ItemRead)
+async def get_item(
+    item_id: int,
+    response: Response,
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Retrieve a specific item by its ID.
+    # A conditional request only reads the version, and stops there on a match.
+    if if_none_match_header:
+        version = (await db.execute(crud_item.ITEM_VERSION, crud_item.item_params(current_user.id, item_id))).scalar()
+        not_modified = common.item_not_modified(item_id, version, if_none_match_header)
+        if not_modified is not None:
+            return not_modified
+    row = (await db.execute(crud_item.OWNER_ITEM, crud_item.item_params(current_user.id, item_id))).first()
+    return common.item_response(row, response)
+
+@router.put("/{item_id}", response_model=ItemRead)
+async def update_item(
+    item_id: int,
+    payload: ItemUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Update an existing item with one owner-scoped UPDATE ... RETURNING.
+    # With If-Match the UPDATE also requires one of the given versions.
+    versions = common.accepted_versions(if_match, item_id)
+    row = (await db.execute(crud_item.update_stmt(current_user.id, item_id, payload, versions))).first()
+    if row is None:
+        exists = versions is not None and (await db.execute(crud_item.ITEM_VERSION, crud_item.item_params(current_user.id, item_id))).first() is not None
+        raise common.missing_item_exception(exists)
+    await db.commit()
+    return common.item_updated(current_user.id, row, response)
+
+@router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_item(
+    item_id: int,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Delete an item.
+    versions = common.accepted_versions(if_match, item_id)
+    deleted = (await db.execute(crud_item.delete_stmt(current_user.id, item_id, versions))).first()
+    if deleted is None and versions is not None:
+        if (await db.execute(crud_item.ITEM_VERSION, crud_item.item_params(current_user.id, item_id))).first():
+            raise common.precondition_failed_exception()
+    await db.commit()
+    return common.item_deleted(current_user.id, item_id, deleted is not None)
@@ -1,38 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.routing import APIRoute
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from app.core.security import verify_password, create_access_token, hash_password
+from typing import cast
+from app.api import common
+from app.core.hashing import HashingBusy, run_hashing
+from app.core.metrics import PASSWORD_REHASHES
+from app.core.profiling import profiling_configured
+from app.core.rate_limit import login_limiter
+from app.core.security import verify_and_update, hash_password
+from app.crud import user as crud_user
 from app.db.session import get_db
-from app.models.user import User
+from app.middleware.profiling import ProfiledRoute
 from app.schemas.user import UserCreate, UserRead
 
-router = APIRouter()
+# ProfiledRoute lets the profiler sample the threadpool thread running a sync
+# endpoint; plain APIRoute when profiling is not configured
+router = APIRouter(route_class=ProfiledRoute if profiling_configured() else APIRoute)
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 def register(user_in: UserCreate, db: Session = Depends(get_db)):
     # Register a new user
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = db.scalars(crud_user.BY_EMAIL, {"email": user_in.email}).first()
     if user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="The provided email may already be in use.",
-        )
-    hashed_password = hash_password(user_in.password)
-    db_user = User(email=user_in.email, hashed_password=hashed_password)
-    db.add(db_user)
+        raise common.email_in_use_exception()
+    try:
+        hashed_password = run_hashing(hash_password, user_in.password)
+    except HashingBusy:
+        raise common.hashing_busy_exception()
+    row = db.execute(crud_user.register_stmt(user_in.email, hashed_password)).first()
+    if row is None:
+        raise common.email_in_use_exception()
     db.commit()
-    db.refresh(db_user)
-    return db_user
+    return common.registered(row)
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     # Login and get an access token.
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    access_token = create_access_token(subject=str(user.id))
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    if login_limiter is not None:
+        retry_after = login_limiter.check(request.client.host if request.client else None, form_data.username)
+        if retry_after:
+            raise common.rate_limited_exception(retry_after)
+    user = db.scalars(crud_user.BY_EMAIL, {"email": form_data.username}).first()
+    verified, new_hash = False, None
+    try:
+        if user is not None:
+            verified, new_hash = run_hashing(verify_and_update, form_data.password, user.hashed_password)
+    except HashingBusy:
+        raise common.hashing_busy_exception()
+    if not user or not verified:
+        raise common.login_failed(cast(int, user.id) if user else None)
+    # Read before the rehash commit expires the instance, which would make
+    # each later attribute access a refresh SELECT
+    user_id, token_version = cast(int, user.id), cast(int, user.token_version)
+    if new_hash is not None:
+        # Stored with older Argon2 costs; the user just proved the password
+        params = {"user_id": user_id, "old_hash": user.hashed_password, "new_hash": new_hash}
+        db.execute(crud_user.REHASH, params)
+        db.commit()
+        PASSWORD_REHASHES.inc()
+    return common.logged_in(user_id, token_version)
\ No newline at end of file
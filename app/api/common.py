@@ -0,0 +1,188 @@
+import math
+from fastapi import HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from app.crud import item as crud_item
+from app.schemas.item import ItemBulkResult, ItemBulkUpdate, ItemPage, ItemRead
+from app.schemas.user import UserRead
+from app.core.etag import collection_etag, etag_headers, if_match_versions, if_none_match, item_etag
+from app.core.pagination import InvalidCursor, cursor_position, search_cursor_position
+from app.core.security import TokenClaims, create_access_token, decode_access_token
+from app.core.user_cache import CachedUser, CurrentUser
+from app.core.write_behind import write_behind
+
+# Request and response logic shared by the routers in app/api and their async
+# mirrors in app/api/aio. A router only runs its statements, on a Session or
+# an AsyncSession, and hands the results to these helpers; validation,
+# validators, errors, audit events and response building live here, so the
+# two variants cannot drift apart.
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+
+# Exceptions
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def hashing_busy_exception() -> HTTPException:
+    # Returned instead of queueing more Argon2 work once the executor is full
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is temporarily overloaded, please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+def rate_limited_exception(retry_after: float) -> HTTPException:
+    # Raised before the user lookup, so a flood of guesses costs no Argon2 work
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many login attempts, please retry later.",
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
+def email_in_use_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="The provided email may already be in use.",
+    )
+
+def precondition_failed_exception() -> HTTPException:
+    # If-Match named a version other than the item's current one
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Item has been modified since it was fetched",
+    )
+
+def item_not_found_exception() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+
+def missing_item_exception(exists: bool) -> HTTPException:
+    # A conditional write matched no row: 412 if the item is there at another
+    # version, 404 if it is not there at all
+    return precondition_failed_exception() if exists else item_not_found_exception()
+
+# Authentication
+
+def token_claims(token: str) -> TokenClaims:
+    claims = decode_access_token(token)
+    if not claims:
+        raise credentials_exception()
+    return claims
+
+def authorized_user(user_id: int, claims: TokenClaims, state: CachedUser) -> CurrentUser:
+    if not state.is_active or state.token_version != claims.version:
+        raise credentials_exception()
+    return CurrentUser(id=user_id)
+
+def registered(row: Any) -> UserRead:
+    write_behind.audit("user.register", row.id)
+    return UserRead.model_validate(row)
+
+def login_failed(user_id: Optional[int]) -> HTTPException:
+    write_behind.audit("user.login_failed", user_id)
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Incorrect email or password",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def logged_in(user_id: int, token_version: int) -> Dict[str, str]:
+    # last_login and the audit event are written after the response
+    write_behind.login(user_id)
+    write_behind.audit("user.login", user_id)
+    access_token = create_access_token(subject=str(user_id), version=token_version)
+    return {"access_token": access_token, "token_type": "bearer"}
+
+# Item reads
+
+def page_position(cursor: Optional[str], owner_id: int) -> int:
+    try:
+        return cursor_position(cursor, owner_id)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+def search_position(cursor: Optional[str], owner_id: int, q: str) -> Optional[Tuple[float, int]]:
+    try:
+        return search_cursor_position(cursor, owner_id, q)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+def page_etag(owner_id: int, items_version: int, after_id: int, limit: int, stream: bool) -> str:
+    return collection_etag(owner_id, items_version, after_id, "ndjson" if stream else limit)
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+def not_modified_for(if_none_match_header: Optional[str], etag: str) -> Optional[Response]:
+    # The 304 when the client already holds etag, else None
+    return not_modified(etag) if if_none_match(if_none_match_header, etag) else None
+
+def item_not_modified(item_id: int, version: Optional[int], if_none_match_header: str) -> Optional[Response]:
+    # For a conditional GET that only read the item's version
+    if version is None:
+        raise item_not_found_exception()
+    return not_modified_for(if_none_match_header, item_etag(item_id, version))
+
+def item_response(row: Any, response: Response) -> ItemRead:
+    if row is None:
+        raise item_not_found_exception()
+    response.headers.update(etag_headers(item_etag(row.id, row.version)))
+    return ItemRead.model_validate(row)
+
+def stream_response(
+    lines: Union[Iterator[str], Iterator[bytes], AsyncIterator[str], AsyncIterator[bytes]], etag: str
+) -> StreamingResponse:
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers=etag_headers(etag))
+
+def fast_page_response(rows: Sequence[Any], owner_id: int, limit: int, etag: str) -> Response:
+    # ITEMS_FAST_JSON: returning a Response skips response_model validation
+    # and encoding
+    body = crud_item.page_json(rows, owner_id, limit)
+    return Response(content=body, media_type="application/json", headers=etag_headers(etag))
+
+def page_response(items: Sequence[Any], owner_id: int, limit: int, etag: str, response: Response) -> ItemPage:
+    response.headers.update(etag_headers(etag))
+    return crud_item.build_page(items, owner_id, limit)
+
+# Item writes. Audit events are queued once the write has committed.
+
+def accepted_versions(if_match: Optional[str], item_id: int) -> Optional[Set[int]]:
+    # None writes whatever version is current (no If-Match, or "*")
+    return if_match_versions(if_match, item_id) if if_match else None
+
+def item_created(owner_id: int, row: Any, response: Response) -> ItemRead:
+    write_behind.audit("item.create", owner_id, [row.id])
+    return item_response(row, response)
+
+def item_updated(owner_id: int, row: Any, response: Response) -> ItemRead:
+    write_behind.audit("item.update", owner_id, [row.id])
+    return item_response(row, response)
+
+def item_deleted(owner_id: int, item_id: int, deleted: bool) -> Response:
+    if deleted:
+        write_behind.audit("item.delete", owner_id, [item_id])
+    # Always return 204 to avoid leaking information about item existence
+    # We return a Response object directly to ensure no body (like 'null') is sent.
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+def check_distinct_ids(payload: List[ItemBulkUpdate]) -> None:
+    if len({entry.id for entry in payload}) != len(payload):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Duplicate item ids in batch")
+
+def bulk_created(owner_id: int, rows: Sequence[Any]) -> List[ItemBulkResult]:
+    write_behind.audit("item.create", owner_id, [row.id for row in rows])
+    return crud_item.created_results(rows)
+
+def bulk_updated(owner_id: int, payload: List[ItemBulkUpdate], rows: Sequence[Any]) -> List[ItemBulkResult]:
+    write_behind.audit("item.update", owner_id, [row.id for row in rows])
+    return crud_item.updated_results(payload, rows)
+
+def bulk_deleted(owner_id: int, item_ids: List[int], deleted_ids: Sequence[int]) -> List[ItemBulkResult]:
+    write_behind.audit("item.delete", owner_id, deleted_ids)
+    return crud_item.deleted_results(item_ids, deleted_ids)
@@ -1,76 +1,220 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import APIRouter, Body, Depends, Header, Query, status, Response
+from fastapi.routing import APIRoute
 from sqlalchemy.orm import Session
-from typing import List
-
-from app.db.session import get_db
-from app.models.item import Item
-from app.models.user import User
-from app.schemas.item import ItemCreate, ItemRead, ItemUpdate
-from app.core.security import decode_token
-
-router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    # Dependency to get the current authenticated user
-    user_id = decode_token(token)
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    if not user_id:
-        raise credentials_exception
-    user = db.get(User, int(user_id)) # Using modern Session.get()
-    if not user or not user.is_active:
-        raise credentials_exception
-    return user
+from typing import Iterator, List, Optional
+
+from app.api import common
+from app.api.common import oauth2_scheme
+from app.crud import item as crud_item
+from app.crud import user as crud_user
+from app.db.session import get_db, get_read_db
+from app.schemas.item import ItemBulkResult, ItemBulkUpdate, ItemCreate, ItemPage, ItemRead, ItemSuggestion, ItemUpdate
+from app.core.config import settings
+from app.core.profiling import profiling_configured
+from app.core.user_cache import CurrentUser, remember_user, user_cache, user_generation
+from app.middleware.profiling import ProfiledRoute
+
+# ProfiledRoute lets the profiler sample the threadpool thread running a sync
+# endpoint; plain APIRoute when profiling is not configured.
+# Validation, errors, validators, audit events and responses are shared with
+# the async router through app/api/common.py; the handlers here only talk to
+# the database.
+router = APIRouter(route_class=ProfiledRoute if profiling_configured() else APIRoute)
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+) -> CurrentUser:
+    # Dependency to get the current authenticated user.
+    # The user's active flag and token version come from the in-process
+    # cache; Postgres is only queried on a cache miss, and always on the
+    # primary. A replica may not have replayed a deactivation or a
+    # token_version bump yet, and whatever is read here is cached for
+    # USER_CACHE_TTL_SECONDS. Stickiness does not help: it follows the user
+    # who wrote (an admin, say), not the user whose row changed.
+    claims = common.token_claims(token)
+    user_id = int(claims.subject)
+    # A commit on db keeps this user's reads on the primary for a while;
+    # read_db checks that before picking a replica (see app/db/replicas.py)
+    db.info["user_id"] = read_db.info["user_id"] = user_id
+    generation = user_generation(user_id)
+    state = user_cache.get(user_id)
+    if state is None:
+        row = db.execute(crud_user.AUTH_STATE, {"user_id": user_id}).first()
+        if row is None:
+            raise common.credentials_exception()
+        state = remember_user(user_id, row.is_active, row.token_version, generation)
+    return common.authorized_user(user_id, claims, state)
 
 @router.post("/", response_model=ItemRead, status_code=status.HTTP_201_CREATED)
-def create_item(payload: ItemCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def create_item(payload: ItemCreate, response: Response, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     # Create a new item for the current user.
-    item = Item(**payload.model_dump(), owner_id=current_user.id)
-    db.add(item)
+    row = db.execute(crud_item.insert_stmt(current_user.id, payload)).one()
     db.commit()
-    db.refresh(item)
-    return item
+    return common.item_created(current_user.id, row, response)
+
+def _stream_rows(db: Session, owner_id: int, after_id: int) -> Iterator[bytes]:
+    # ITEMS_FAST_JSON variant: plain rows, nothing to expunge
+    stmt = crud_item.owner_rows_stmt(owner_id, after_id).execution_options(
+        yield_per=settings.items_stream_batch_size
+    )
+    for batch in db.execute(stmt).partitions():
+        yield crud_item.ndjson_rows(batch)
+
+def _stream_items(db: Session, owner_id: int, after_id: int) -> Iterator[str]:
+    # Yield NDJSON lines, one batch at a time, from a server-side cursor.
+    # yield_per makes psycopg use a named cursor, so only one batch of rows
+    # is ever held in memory regardless of how many items the owner has.
+    stmt = crud_item.owner_items_stmt(owner_id, after_id).execution_options(
+        yield_per=settings.items_stream_batch_size
+    )
+    for batch in db.scalars(stmt).partitions():
+        yield crud_item.ndjson_batch(batch)
+        # Drop the ORM objects of the batch we just sent. expunge_all() would
+        # discard the identity map the yield_per result is still loading into.
+        for item in batch:
+            db.expunge(item)
+
+@router.get("/", response_model=ItemPage)
+def get_items(
+    response: Response,
+    limit: int = Query(default=settings.items_page_size, ge=1, le=settings.items_page_size_max),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Retrieve the current user's items, one keyset page at a time.
+    # With stream=true every item after the cursor is sent as NDJSON instead.
+    after_id = common.page_position(cursor, current_user.id)
+
+    # The collection version is read before any rows: if a write lands in
+    # between, the response is newer than its ETag, which only costs the
+    # client one extra refetch later, never a stale 304.
+    items_version = db.execute(crud_user.ITEMS_VERSION, {"user_id": current_user.id}).scalar_one()
+    etag = common.page_etag(current_user.id, items_version, after_id, limit, stream)
+    not_modified = common.not_modified_for(if_none_match_header, etag)
+    if not_modified is not None:
+        return not_modified
+
+    if stream:
+        stream_rows = _stream_rows if settings.items_fast_json else _stream_items
+        return common.stream_response(stream_rows(db, current_user.id, after_id), etag)
+
+    if settings.items_fast_json:
+        rows = db.execute(crud_item.PAGE_ROWS, crud_item.page_params(current_user.id, after_id, limit)).all()
+        return common.fast_page_response(rows, current_user.id, limit, etag)
+
+    items = db.scalars(crud_item.PAGE, crud_item.page_params(current_user.id, after_id, limit)).all()
+    return common.page_response(items, current_user.id, limit, etag, response)
 
-@router.get("/", response_model=List[ItemRead])
-def get_items(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Retrieve all items for the current user.
-    return db.query(Item).filter(Item.owner_id == current_user.id).all()
+# Search endpoints. Like the bulk ones below, declared before /{item_id}.
+
+@router.get("/search", response_model=ItemPage)
+def search_items(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=settings.items_page_size, ge=1, le=settings.items_page_size_max),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Full-text search over the current user's item names and descriptions,
+    # best matches first, with keyset pagination over (rank, id).
+    after = common.search_position(cursor, current_user.id, q)
+    rows = db.execute(crud_item.search_stmt(current_user.id, q, after, limit)).all()
+    return crud_item.build_search_page(rows, current_user.id, q, limit)
+
+@router.get("/autocomplete", response_model=List[ItemSuggestion])
+def autocomplete_items(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=50),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Case-insensitive name prefix matches, in name order.
+    rows = db.execute(crud_item.autocomplete_stmt(current_user.id, prefix, limit)).all()
+    return crud_item.suggestions(rows)
+
+# Bulk endpoints. Declared before the /{item_id} routes so "bulk" is not
+# parsed as an item id. Each runs one statement in one transaction.
+BulkBatch = Body(..., min_length=1, max_length=settings.items_bulk_max_batch)
+
+@router.post("/bulk", response_model=List[ItemBulkResult], status_code=status.HTTP_201_CREATED)
+def create_items_bulk(payload: List[ItemCreate] = BulkBatch, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    # Create many items with a single INSERT ... RETURNING.
+    rows = db.execute(
+        crud_item.bulk_insert_stmt(len(payload)),
+        crud_item.bulk_insert_params(current_user.id, payload),
+    ).all()
+    db.commit()
+    return common.bulk_created(current_user.id, rows)
+
+@router.patch("/bulk", response_model=List[ItemBulkResult])
+def update_items_bulk(payload: List[ItemBulkUpdate] = BulkBatch, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    # Partially update many items with a single UPDATE ... FROM (VALUES ...) RETURNING.
+    common.check_distinct_ids(payload)
+    rows = db.execute(crud_item.bulk_update_stmt(current_user.id, payload)).all()
+    db.commit()
+    return common.bulk_updated(current_user.id, payload, rows)
+
+@router.delete("/bulk", response_model=List[ItemBulkResult])
+def delete_items_bulk(item_ids: List[int] = BulkBatch, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    # Delete many items with a single DELETE ... WHERE id = ANY(...) RETURNING.
+    deleted_ids = db.scalars(crud_item.bulk_delete_stmt(current_user.id, item_ids)).all()
+    db.commit()
+    return common.bulk_deleted(current_user.id, item_ids, deleted_ids)
 
 @router.get("/{item_id}", response_model=ItemRead)
-def get_item(item_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_item(
+    item_id: int,
+    response: Response,
+    if_none_match_header: Optional[str] = Header(None, alias="If-None-Match"),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
     # Retrieve a specific item by its ID.
-    item = db.get(Item, item_id)
-    if not item or item.owner_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Item not found")
-    return item
+    # A conditional request only reads the version, and stops there on a match.
+    if if_none_match_header:
+        version = db.execute(crud_item.ITEM_VERSION, crud_item.item_params(current_user.id, item_id)).scalar()
+        not_modified = common.item_not_modified(item_id, version, if_none_match_header)
+        if not_modified is not None:
+            return not_modified
+    row = db.execute(crud_item.OWNER_ITEM, crud_item.item_params(current_user.id, item_id)).first()
+    return common.item_response(row, response)
 
 @router.put("/{item_id}", response_model=ItemRead)
-def update_item(item_id: int, payload: ItemUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Update an existing item.
-    item = db.get(Item, item_id)
-    if not item or item.owner_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Item not found")
-
-    update_data = payload.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(item, key, value)
-
+def update_item(
+    item_id: int,
+    payload: ItemUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Update an existing item with one owner-scoped UPDATE ... RETURNING.
+    # With If-Match the UPDATE also requires one of the given versions.
+    versions = common.accepted_versions(if_match, item_id)
+    row = db.execute(crud_item.update_stmt(current_user.id, item_id, payload, versions)).first()
+    if row is None:
+        exists = versions is not None and db.execute(crud_item.ITEM_VERSION, crud_item.item_params(current_user.id, item_id)).first() is not None
+        raise common.missing_item_exception(exists)
     db.commit()
-    db.refresh(item)
-    return item
+    return common.item_updated(current_user.id, row, response)
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_item(item_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Delete an item. 
-    item = db.get(Item, item_id)
-    if item and item.owner_id == current_user.id:
-        db.delete(item)
-        db.commit()
-    # Always return 204 to avoid leaking information about item existence
-    # We return a Response object directly to ensure no body (like 'null') is sent.
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+def delete_item(
+    item_id: int,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    # Delete an item.
+    versions = common.accepted_versions(if_match, item_id)
+    deleted = db.execute(crud_item.delete_stmt(current_user.id, item_id, versions)).first()
+    if deleted is None and versions is not None:
+        if db.execute(crud_item.ITEM_VERSION, crud_item.item_params(current_user.id, item_id)).first():
+            raise common.precondition_failed_exception()
+    db.commit()
+    return common.item_deleted(current_user.id, item_id, deleted is not None)
\ No newline at end of file
@@ -1,7 +1,7 @@
 import json
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, AnyHttpUrl, field_validator
-from typing import List, Any
+from typing import List, Any, Literal, Optional
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
@@ -11,10 +11,144 @@ class Settings(BaseSettings):
     jwt_secret_key: str = Field(..., alias="JWT_SECRET_KEY")
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
+    # Token implementation (see app/core/security.py): jose, pyjwt or hmac
+    jwt_backend: Literal["jose", "pyjwt", "hmac"] = Field("jose", alias="JWT_BACKEND")
+    # Verified-token cache; JWT_CACHE_SIZE=0 disables it
+    jwt_cache_size: int = Field(10000, alias="JWT_CACHE_SIZE", ge=0)
+    jwt_cache_ttl_seconds: float = Field(300.0, alias="JWT_CACHE_TTL_SECONDS", gt=0)
+
+    # Database access mode and connection pool sizing.
+    # DB_ASYNC switches the routers to AsyncSession handlers that run on the
+    # event loop instead of Starlette's threadpool. The pool is sized on its
+    # own and is not derived from the threadpool size.
+    db_async: bool = Field(False, alias="DB_ASYNC")
+    db_pool_size: int = Field(5, alias="DB_POOL_SIZE", ge=1)
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW", ge=0)
+    # Seconds a request waits for a free connection before failing
+    db_pool_timeout: float = Field(30.0, alias="DB_POOL_TIMEOUT", gt=0)
+    # Replace connections older than this many seconds (-1 disables recycling)
+    db_pool_recycle: int = Field(-1, alias="DB_POOL_RECYCLE", ge=-1)
+    # always: ping on every checkout; idle: only connections idle for longer
+    # than DB_POOL_PRE_PING_IDLE_SECONDS; never: no liveness check
+    db_pool_pre_ping: Literal["always", "idle", "never"] = Field("always", alias="DB_POOL_PRE_PING")
+    db_pool_pre_ping_idle_seconds: float = Field(30.0, alias="DB_POOL_PRE_PING_IDLE_SECONDS", ge=0)
+    # Server-side prepared statements (psycopg's prepare_threshold): a query
+    # is prepared on a connection after running there this many times, so
+    # later runs skip Postgres' parse and plan. 0 prepares on first use and
+    # "none" disables them, which PgBouncer needs in transaction pooling mode
+    # unless it is 1.21+ with max_prepared_statements set.
+    db_prepare_threshold: Optional[int] = Field(5, alias="DB_PREPARE_THRESHOLD", ge=0)
+
+    # Read replicas (see app/db/replicas.py). GET item handlers read from
+    # these; everything else, including get_current_user's auth state, and a
+    # user's reads for DATABASE_REPLICA_STICKY_SECONDS after their last write,
+    # stay on DATABASE_URL. Each replica gets a pool sized like the primary's.
+    database_replica_urls: List[str] = Field([], alias="DATABASE_REPLICA_URLS")
+    database_replica_strategy: Literal["round_robin", "least_connections"] = Field(
+        "round_robin", alias="DATABASE_REPLICA_STRATEGY"
+    )
+    database_replica_sticky_seconds: float = Field(5.0, alias="DATABASE_REPLICA_STICKY_SECONDS", ge=0)
+    # Replicas further behind than this are ejected until they catch up
+    database_replica_max_lag_seconds: float = Field(10.0, alias="DATABASE_REPLICA_MAX_LAG_SECONDS", gt=0)
+    database_replica_check_interval: float = Field(5.0, alias="DATABASE_REPLICA_CHECK_INTERVAL", gt=0)
+
+    # Argon2 executor (see app/core/hashing.py). Workers default to the CPU
+    # count; with several gunicorn workers, set it to cores / workers.
+    hashing_workers: Optional[int] = Field(None, alias="HASHING_WORKERS", ge=1)
+    # Jobs allowed to wait for a worker before requests get a 503
+    hashing_max_pending: int = Field(8, alias="HASHING_MAX_PENDING", ge=0)
+    # Argon2id costs for new password hashes (see app/core/security.py):
+    # memory in KiB, passes, lanes. scripts/calibrate_argon2.py picks them for
+    # the host; hashes made with other costs are redone at the next login.
+    argon2_memory_cost: int = Field(19456, alias="ARGON2_MEMORY_COST", ge=8)
+    argon2_time_cost: int = Field(2, alias="ARGON2_TIME_COST", ge=1)
+    argon2_parallelism: int = Field(1, alias="ARGON2_PARALLELISM", ge=1)
+
+    # Login rate limiting (see app/core/rate_limit.py). Attempts beyond either
+    # token bucket, per client IP and per username, get a 429 before any
+    # Argon2 work. "memory" keeps the buckets per worker; "postgres" shares
+    # them between workers and hosts through the rate_limit_buckets table.
+    login_rate_limit_enabled: bool = Field(True, alias="LOGIN_RATE_LIMIT_ENABLED")
+    login_rate_limit_backend: Literal["memory", "postgres"] = Field("memory", alias="LOGIN_RATE_LIMIT_BACKEND")
+    login_rate_limit_ip_per_minute: float = Field(10.0, alias="LOGIN_RATE_LIMIT_IP_PER_MINUTE", gt=0)
+    login_rate_limit_ip_burst: int = Field(20, alias="LOGIN_RATE_LIMIT_IP_BURST", ge=1)
+    login_rate_limit_username_per_minute: float = Field(2.0, alias="LOGIN_RATE_LIMIT_USERNAME_PER_MINUTE", gt=0)
+    login_rate_limit_username_burst: int = Field(10, alias="LOGIN_RATE_LIMIT_USERNAME_BURST", ge=1)
+    # Buckets kept in memory per worker; the least recently used go first
+    login_rate_limit_max_keys: int = Field(100000, alias="LOGIN_RATE_LIMIT_MAX_KEYS", ge=1)
+
+    # Authenticated-user cache (see app/core/user_cache.py).
+    # USER_CACHE_SIZE=0 disables caching. Setting USER_CACHE_NOTIFY_CHANNEL
+    # propagates invalidations to every worker through Postgres LISTEN/NOTIFY.
+    user_cache_size: int = Field(10000, alias="USER_CACHE_SIZE", ge=0)
+    user_cache_ttl_seconds: float = Field(30.0, alias="USER_CACHE_TTL_SECONDS", gt=0)
+    user_cache_notify_channel: Optional[str] = Field(
+        None, alias="USER_CACHE_NOTIFY_CHANNEL", pattern=r"^[a-z_][a-z0-9_]{0,62}$"
+    )
+
+    # Write-behind queue for audit events and users.last_login (see
+    # app/core/write_behind.py). Records are written in one transaction every
+    # WRITE_BEHIND_FLUSH_INTERVAL_MS, or as soon as WRITE_BEHIND_BATCH_SIZE are
+    # waiting. Beyond WRITE_BEHIND_MAX_PENDING new records are dropped (and
+    # counted) rather than slowing requests down. On shutdown each worker
+    # keeps flushing for up to WRITE_BEHIND_DRAIN_TIMEOUT seconds, which must
+    # stay below gunicorn's graceful timeout.
+    write_behind_flush_interval_ms: float = Field(200.0, alias="WRITE_BEHIND_FLUSH_INTERVAL_MS", gt=0)
+    write_behind_batch_size: int = Field(500, alias="WRITE_BEHIND_BATCH_SIZE", ge=1)
+    write_behind_max_pending: int = Field(10000, alias="WRITE_BEHIND_MAX_PENDING", ge=1)
+    write_behind_drain_timeout: float = Field(10.0, alias="WRITE_BEHIND_DRAIN_TIMEOUT", ge=0)
+
+    # Request/SQL/Argon2 metrics and the Prometheus /metrics endpoint (see
+    # app/core/metrics.py). Under gunicorn also set PROMETHEUS_MULTIPROC_DIR.
+    metrics_enabled: bool = Field(True, alias="METRICS_ENABLED")
+
+    # Opt-in request profiling (see app/core/profiling.py). Requests sending
+    # "X-Profile: <PROFILING_TOKEN>" are profiled, plus a random
+    # PROFILING_SAMPLE_RATE fraction of all requests. Both off by default.
+    profiling_token: Optional[str] = Field(None, alias="PROFILING_TOKEN", min_length=16)
+    profiling_sample_rate: float = Field(0.0, alias="PROFILING_SAMPLE_RATE", ge=0, le=1)
+    profiling_interval_ms: float = Field(5.0, alias="PROFILING_INTERVAL_MS", gt=0)
+    profiling_dir: str = Field("/tmp/profiles", alias="PROFILING_DIR")
+
+    # Web UI assets, held in memory (see app/core/static.py). STATIC_RELOAD
+    # picks up edits to the files without a restart; for development only.
+    static_dir: str = Field("web", alias="STATIC_DIR")
+    static_reload: bool = Field(False, alias="STATIC_RELOAD")
+
+    # Response compression (see app/middleware/compression.py): gzip, or
+    # brotli when the brotli package is installed and the client accepts it.
+    # Responses smaller than COMPRESSION_MINIMUM_SIZE bytes, or whose media
+    # type is not listed, are sent as they are. Lower levels trade bytes on
+    # the wire for CPU; see benchmarks/compression.py.
+    compression_enabled: bool = Field(True, alias="COMPRESSION_ENABLED")
+    compression_minimum_size: int = Field(1024, alias="COMPRESSION_MINIMUM_SIZE", ge=0)
+    compression_content_types: List[str] = Field(
+        ["application/json", "application/x-ndjson", "text/html", "text/plain", "text/css", "application/javascript"],
+        alias="COMPRESSION_CONTENT_TYPES",
+    )
+    compression_gzip_level: int = Field(6, alias="COMPRESSION_GZIP_LEVEL", ge=1, le=9)
+    compression_brotli_quality: int = Field(4, alias="COMPRESSION_BROTLI_QUALITY", ge=0, le=11)
 
     allowed_hosts: List[str] = Field(..., alias="ALLOWED_HOSTS")
     cors_origins: List[AnyHttpUrl] = Field(..., alias="CORS_ORIGINS")
 
+    # Item listing: keyset pagination and NDJSON streaming
+    items_page_size: int = Field(100, alias="ITEMS_PAGE_SIZE", ge=1)
+    items_page_size_max: int = Field(1000, alias="ITEMS_PAGE_SIZE_MAX", ge=1)
+    items_stream_batch_size: int = Field(500, alias="ITEMS_STREAM_BATCH_SIZE", ge=1)
+    # Largest array accepted by the /items/bulk endpoints
+    items_bulk_max_batch: int = Field(1000, alias="ITEMS_BULK_MAX_BATCH", ge=1)
+    # Serialize listings straight from rows, skipping ORM objects and
+    # response_model validation (see app/crud/item.py)
+    items_fast_json: bool = Field(False, alias="ITEMS_FAST_JSON")
+
+    @field_validator("db_prepare_threshold", mode="before")
+    @classmethod
+    def parse_prepare_threshold(cls, v: Any):
+        if isinstance(v, str) and v.strip().lower() in ("", "none", "off"):
+            return None
+        return v
+
     @field_validator("allowed_hosts", mode="before")
     @classmethod
     def parse_hosts(cls, v: Any):
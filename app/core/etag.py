@@ -0,0 +1,58 @@
+from typing import Dict, List, Optional, Set
+
+# HTTP validators for item reads.
+# Every item carries a version that each UPDATE increments, and every user
+# carries items_version, bumped by a trigger whenever any of their items is
+# inserted, updated or deleted (see app/models/item.py). The ETags below are
+# built from those counters alone, so a conditional GET can be answered with
+# 304 after reading one integer instead of loading and serializing rows.
+
+# Responses vary per user and must be revalidated, which is what makes the
+# browser send If-None-Match on its own
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+
+def item_etag(item_id: int, version: int) -> str:
+    return f'"{item_id}-{version}"'
+
+
+def collection_etag(owner_id: int, items_version: int, *parts: object) -> str:
+    # parts identify the representation (page position, size, format), since
+    # two pages of the same collection must never share a validator
+    suffix = "".join(f"-{part}" for part in parts)
+    return f'"items-{owner_id}-{items_version}{suffix}"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, **CACHE_HEADERS}
+
+
+def _parse(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2): a W/ prefix does not prevent a match
+    if not header:
+        return False
+    for tag in _parse(header):
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def if_match_versions(header: str, item_id: int) -> Optional[Set[int]]:
+    """
+    Versions of item_id that an If-Match header accepts, using strong comparison.
+    Returns None for "*" (any current version); an empty set means nothing can match.
+    """
+    versions: Set[int] = set()
+    for tag in _parse(header):
+        if tag == "*":
+            return None
+        if tag.startswith("W/") or len(tag) < 2 or tag[0] != '"' or tag[-1] != '"':
+            continue
+        tag_id, _, tag_version = tag[1:-1].partition("-")
+        if tag_id == str(item_id) and tag_version.isdigit():
+            versions.add(int(tag_version))
+    return versions
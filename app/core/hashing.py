@@ -0,0 +1,105 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import record_hashing
+
+# Dedicated executor for Argon2 work.
+# Each hash/verify costs ~19 MiB and tens of milliseconds of CPU. Running them
+# inline let a burst of logins occupy every threadpool worker, starving /items
+# and /health. argon2-cffi releases the GIL while hashing, so a plain thread
+# pool sized to the cores gets real parallelism without process-pool pickling.
+# Admission is bounded: at most workers + max_pending jobs are in flight, and
+# anything beyond that fails fast with HashingBusy (mapped to HTTP 503).
+
+T = TypeVar("T")
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing executor is saturated and the job was not queued."""
+
+
+class BoundedExecutor:
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.capacity = workers + max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+_executor: Optional[BoundedExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor() -> BoundedExecutor:
+    # Created lazily so worker threads are started after gunicorn forks
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = settings.hashing_workers or os.cpu_count() or 1
+                _executor = BoundedExecutor(workers, settings.hashing_max_pending)
+    return _executor
+
+
+def shutdown_hashing_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+# Both runners charge the wait, queueing included, to the current request's
+# hashing time; the Argon2 work itself is timed in app/core/security.py.
+
+
+def run_hashing(fn: Callable[..., T], *args: Any) -> T:
+    # For sync handlers: blocks the calling threadpool worker until done
+    future = get_hashing_executor().submit(fn, *args)
+    started = time.perf_counter()
+    try:
+        return future.result()
+    finally:
+        record_hashing(time.perf_counter() - started)
+
+
+async def run_hashing_async(fn: Callable[..., T], *args: Any) -> T:
+    # For async handlers: awaits the job without blocking the event loop
+    future = get_hashing_executor().submit(fn, *args)
+    started = time.perf_counter()
+    try:
+        return await asyncio.wrap_future(future)
+    finally:
+        record_hashing(time.perf_counter() - started)
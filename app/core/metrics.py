@@ -0,0 +1,148 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Prometheus metrics.
+# Under gunicorn each worker is its own process with its own counters. When
+# PROMETHEUS_MULTIPROC_DIR is set, prometheus_client keeps every worker's
+# values in mmap'd files in that directory and render_metrics() merges them,
+# so whichever worker answers a scrape reports totals for the whole server.
+# The directory must be emptied before the server starts (see
+# docker/entrypoint.sh), and dead workers are reaped by docker/gunicorn.conf.py.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+ARGON2_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to serve an HTTP request, body included",
+    ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served", multiprocess_mode="livesum"
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request",
+    ["method", "route"], buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per HTTP request",
+    ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_HASHING_SECONDS = Histogram(
+    "http_request_hashing_seconds", "Time spent waiting on Argon2 per HTTP request, queueing included",
+    ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time", buckets=QUERY_BUCKETS
+)
+ARGON2_SECONDS = Histogram(
+    "argon2_duration_seconds", "Argon2 computation time", ["operation"], buckets=ARGON2_BUCKETS
+)
+PASSWORD_REHASHES = Counter(
+    "password_rehashes_total", "Stored password hashes redone with the current Argon2 costs at login"
+)
+WRITE_BEHIND_PENDING = Gauge(
+    "write_behind_pending", "Records waiting in the write-behind queue", ["kind"], multiprocess_mode="livesum"
+)
+WRITE_BEHIND_WRITTEN = Counter(
+    "write_behind_written_total", "Records written to Postgres by the write-behind queue", ["kind"]
+)
+WRITE_BEHIND_DROPPED = Counter(
+    "write_behind_dropped_total", "Records discarded because the write-behind queue was full or could not flush",
+    ["kind"],
+)
+WRITE_BEHIND_FLUSH_SECONDS = Histogram(
+    "write_behind_flush_duration_seconds", "Time to write one write-behind batch", buckets=QUERY_BUCKETS
+)
+LOGIN_RATE_LIMITED = Counter(
+    "login_rate_limited_total", "Login attempts rejected by the rate limiter, by exhausted bucket", ["bucket"]
+)
+
+
+class RequestTimings:
+    """Per-request accumulator, filled in by the SQL and hashing hooks."""
+
+    __slots__ = ("queries", "db_seconds", "hashing_seconds")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.hashing_seconds = 0.0
+
+
+# Set by MetricsMiddleware for the duration of a request. Starlette copies the
+# context into the threadpool for sync handlers, so they see the same object.
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> Tuple[RequestTimings, Any]:
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token: Any) -> None:
+    _current.reset(token)
+
+
+def record_query(seconds: float) -> None:
+    DB_QUERY_SECONDS.observe(seconds)
+    timings = _current.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.db_seconds += seconds
+
+
+def record_hashing(seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.hashing_seconds += seconds
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, timings: RequestTimings) -> None:
+    REQUESTS.labels(method, route, str(status)).inc()
+    REQUEST_SECONDS.labels(method, route).observe(seconds)
+    REQUEST_DB_QUERIES.labels(method, route).observe(timings.queries)
+    REQUEST_DB_SECONDS.labels(method, route).observe(timings.db_seconds)
+    if timings.hashing_seconds:
+        REQUEST_HASHING_SECONDS.labels(method, route).observe(timings.hashing_seconds)
+
+
+def install_query_metrics(engine: Engine) -> None:
+    """Time every statement the engine executes. For an AsyncEngine, pass its sync_engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _query_started(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _query_finished(conn, cursor, statement, parameters, context, executemany) -> None:
+        record_query(time.perf_counter() - context._metrics_started)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Aggregate the files written by every worker, not just this one
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
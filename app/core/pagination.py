@@ -0,0 +1,72 @@
+import base64
+import binascii
+import hashlib
+from typing import Optional, Tuple
+
+# Keyset (cursor) pagination helpers.
+# A cursor points at the last row a client has seen, identified by the
+# (owner_id, id) pair that the items listing is ordered by. The value is
+# base64url-encoded so clients treat it as opaque and never build it by hand.
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+def encode_cursor(owner_id: int, last_id: int) -> str:
+    raw = f"{owner_id}:{last_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    # Restore the padding stripped by encode_cursor before decoding
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+        owner_part, id_part = raw.split(":", 1)
+        return int(owner_part), int(id_part)
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursor("Malformed pagination cursor") from exc
+
+
+def cursor_position(cursor: Optional[str], owner_id: int) -> int:
+    # Return the id to resume after, rejecting cursors minted for another owner
+    if cursor is None:
+        return 0
+    cursor_owner, last_id = decode_cursor(cursor)
+    if cursor_owner != owner_id:
+        raise InvalidCursor("Pagination cursor does not belong to this user")
+    return last_id
+
+
+# Search results are ordered by (rank DESC, id), so their cursors carry the
+# last rank as well. They are also tied to the query they were issued for: a
+# position in the results of one query means nothing for another.
+
+
+def _query_key(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()[:12]
+
+
+def encode_search_cursor(owner_id: int, query: str, rank: float, last_id: int) -> str:
+    # repr() round-trips the float exactly, which the rank comparison needs
+    raw = f"{owner_id}:{_query_key(query)}:{rank!r}:{last_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def search_cursor_position(cursor: Optional[str], owner_id: int, query: str) -> Optional[Tuple[float, int]]:
+    # Return the (rank, id) to resume after, or None for the first page
+    if cursor is None:
+        return None
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+        owner_part, query_key, rank_part, id_part = raw.split(":", 3)
+        cursor_owner, rank, last_id = int(owner_part), float(rank_part), int(id_part)
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursor("Malformed pagination cursor") from exc
+    if cursor_owner != owner_id:
+        raise InvalidCursor("Pagination cursor does not belong to this user")
+    if query_key != _query_key(query):
+        raise InvalidCursor("Pagination cursor was issued for a different query")
+    return rank, last_id
@@ -0,0 +1,199 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+# Opt-in request profiling.
+# A profiled request gets a sampler thread that reads the stacks of the
+# threads working on it (the event loop, plus the threadpool thread running a
+# sync endpoint) every PROFILING_INTERVAL_MS, and a list of the SQL statements
+# it issued. Both are dumped to PROFILING_DIR when the response is finished:
+#   <id>.collapsed         collapsed stacks, for flamegraph.pl / speedscope
+#   <id>.speedscope.json   speedscope's native format
+#   <id>.json              request metadata and SQL statements (no parameters)
+# Nothing is installed unless PROFILING_TOKEN or PROFILING_SAMPLE_RATE is set,
+# so the mode costs nothing when it is off.
+
+Frame = Tuple[str, str, int]  # function, file, first line
+Stack = Tuple[Frame, ...]  # root first
+
+
+def profiling_configured() -> bool:
+    return bool(settings.profiling_token) or settings.profiling_sample_rate > 0
+
+
+def _short_path(filename: str) -> str:
+    # Keep stacks readable: drop everything up to site-packages or the repo root
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    cwd = os.getcwd() + os.sep
+    return filename[len(cwd):] if filename.startswith(cwd) else filename
+
+
+def _stack(frame: Optional[FrameType]) -> Stack:
+    frames: List[Frame] = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_name, _short_path(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+
+def _is_idle(stack: Stack) -> bool:
+    # The event loop waiting in select() is not doing work for anyone
+    return bool(stack) and stack[-1][1].endswith("selectors.py")
+
+
+class RequestProfile:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.statements: List[Dict[str, Any]] = []
+        self.started_at = time.time()
+        self.duration = 0.0
+        # thread ident -> label used as the root frame of its samples
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def attach(self, ident: int, label: str) -> None:
+        with self._lock:
+            self._threads[ident] = label
+
+    def detach(self, ident: int) -> None:
+        with self._lock:
+            self._threads.pop(ident, None)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._threads.items())
+            for ident, label in threads:
+                stack = _stack(frames.get(ident))
+                if not stack or (label == "event-loop" and _is_idle(stack)):
+                    continue
+                self.samples[((label, "", 0),) + stack] += 1
+
+    def record_statement(self, statement: str, seconds: float, executemany: bool) -> None:
+        self.statements.append(
+            {"sql": statement, "duration_ms": round(seconds * 1000, 3), "executemany": executemany}
+        )
+
+    def collapsed(self) -> str:
+        lines = []
+        for stack, count in sorted(self.samples.items()):
+            names = ";".join(_frame_name(frame).replace(";", ":") for frame in stack)
+            lines.append(f"{names} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        frame_index: Dict[Frame, int] = {}
+        frames: List[Dict[str, Any]] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for stack, count in self.samples.items():
+            indexes = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    entry: Dict[str, Any] = {"name": frame[0]}
+                    if frame[1]:
+                        entry.update(file=frame[1], line=frame[2])
+                    frames.append(entry)
+                indexes.append(frame_index[frame])
+            samples.append(indexes)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+            "name": name,
+            "activeProfileIndex": 0,
+            "exporter": "app.core.profiling",
+        }
+
+    def dump(self, directory: str, profile_id: str, meta: Dict[str, Any]) -> None:
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, profile_id)
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as fh:
+            fh.write(self.collapsed())
+        with open(f"{base}.speedscope.json", "w", encoding="utf-8") as fh:
+            json.dump(self.speedscope(f"{meta['method']} {meta['route']}"), fh)
+        report = {
+            **meta,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": sum(self.samples.values()),
+            "sql": self.statements,
+        }
+        with open(f"{base}.json", "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+def _frame_name(frame: Frame) -> str:
+    function, filename, line = frame
+    return f"{function} ({filename}:{line})" if filename else function
+
+
+_active: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _active.get()
+
+
+def activate(profile: RequestProfile) -> Token:
+    return _active.set(profile)
+
+
+def deactivate(token: Token) -> None:
+    _active.reset(token)
+
+
+def install_sql_capture(engine: Engine) -> None:
+    """Attach the statements an engine executes to the profile of the current request, if any."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _statement_started(conn, cursor, statement, parameters, context, executemany) -> None:
+        if _active.get() is not None:
+            context._profile_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _statement_finished(conn, cursor, statement, parameters, context, executemany) -> None:
+        profile = _active.get()
+        if profile is not None:
+            profile.record_statement(statement, time.perf_counter() - context._profile_started, executemany)
@@ -0,0 +1,262 @@
+import ipaddress
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.metrics import LOGIN_RATE_LIMITED
+
+# Login rate limiting.
+# Every /auth/login attempt used to run a full Argon2 verification, which made
+# password guessing the cheapest way to burn the server's CPU. Attempts are now
+# charged against two token buckets, one per client IP and one per username,
+# before the user is even looked up; an empty bucket means a 429 with
+# Retry-After and no database or Argon2 work at all.
+# The buckets live in this worker's memory by default. With
+# LOGIN_RATE_LIMIT_BACKEND=postgres they live in the rate_limit_buckets table,
+# so the limits hold across gunicorn workers and hosts, at the cost of one
+# round-trip per bucket.
+
+# Seconds between purges of buckets that have refilled completely
+SWEEP_INTERVAL = 60.0
+
+
+class Limit(NamedTuple):
+    # Tokens added per second, and the bucket's capacity
+    rate: float
+    burst: float
+
+    @classmethod
+    def per_minute(cls, attempts: float, burst: float) -> "Limit":
+        return cls(attempts / 60.0, burst)
+
+
+def _refill(tokens: float, updated_at: float, now: float, limit: Limit) -> float:
+    return min(limit.burst, tokens + (now - updated_at) * limit.rate)
+
+
+class MemoryBucketStore:
+    """
+    Per-worker buckets, split across independently locked shards. Under the
+    GIL a take() is too short for lock contention to matter; the shards keep
+    expiry cheap instead: each sweep walks one shard while the others stay
+    available, rather than every bucket under a single lock.
+    A bucket is dropped once it has refilled, which is when it becomes
+    indistinguishable from a missing one; when a shard holds more than its
+    share of max_keys, the least recently used buckets go first.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._max_per_shard = max(1, max_keys // shards)
+        # key -> (tokens, updated_at, expires_at), in least recently used order
+        self._shards: List[Tuple[threading.Lock, Dict[str, Tuple[float, float, float]]]] = [
+            (threading.Lock(), {}) for _ in range(shards)
+        ]
+        self._swept = [clock()] * shards
+
+    def take(self, key: str, limit: Limit) -> float:
+        """Take one token. Returns 0 when allowed, else the seconds until a token is available."""
+        index = hash(key) % len(self._shards)
+        lock, buckets = self._shards[index]
+        now = self._clock()
+        with lock:
+            state = buckets.pop(key, None)
+            tokens = limit.burst if state is None else _refill(state[0], state[1], now, limit)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / limit.rate
+            buckets[key] = (tokens, now, now + (limit.burst - tokens) / limit.rate)
+            if now - self._swept[index] > SWEEP_INTERVAL:
+                self._sweep(buckets, now)
+                self._swept[index] = now
+            while len(buckets) > self._max_per_shard:
+                del buckets[next(iter(buckets))]
+        return retry_after
+
+    async def take_async(self, key: str, limit: Limit) -> float:
+        # Never blocks for long enough to be worth leaving the event loop
+        return self.take(key, limit)
+
+    @staticmethod
+    def _sweep(buckets: Dict[str, Tuple[float, float, float]], now: float) -> None:
+        for key in [key for key, state in buckets.items() if state[2] <= now]:
+            del buckets[key]
+
+    def clear(self) -> None:
+        for lock, buckets in self._shards:
+            with lock:
+                buckets.clear()
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for _, buckets in self._shards)
+
+
+# One atomic statement per attempt. The DO UPDATE only happens when the
+# refilled bucket holds a token, so rejected attempts leave it untouched; the
+# outer SELECT reads the row as it was before, to compute Retry-After.
+# Time comes from the database so workers on different hosts agree on it.
+_TAKE_SQL = text("""
+    WITH clock AS (
+        SELECT CAST(extract(epoch FROM clock_timestamp()) AS double precision) AS now
+    ),
+    taken AS (
+        INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at, expires_at)
+        SELECT :key, :burst - 1, now, now + 1 / :rate FROM clock
+        ON CONFLICT (key) DO UPDATE
+            SET tokens = LEAST(:burst, b.tokens + (EXCLUDED.updated_at - b.updated_at) * :rate) - 1,
+                updated_at = EXCLUDED.updated_at,
+                expires_at = EXCLUDED.updated_at + (
+                    :burst + 1 - LEAST(:burst, b.tokens + (EXCLUDED.updated_at - b.updated_at) * :rate)
+                ) / :rate
+            WHERE b.tokens + (EXCLUDED.updated_at - b.updated_at) * :rate >= 1
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT FROM taken) AS allowed, b.tokens, b.updated_at, clock.now
+    FROM clock LEFT JOIN rate_limit_buckets b ON b.key = :key
+""")
+
+_PURGE_SQL = text(
+    "DELETE FROM rate_limit_buckets "
+    "WHERE expires_at <= CAST(extract(epoch FROM clock_timestamp()) AS double precision)"
+)
+
+
+class PostgresBucketStore:
+    """Buckets in the rate_limit_buckets table (migration 0006), shared by every worker."""
+
+    def __init__(
+        self, engine: Callable[[], Engine], async_engine: Optional[Callable[[], AsyncEngine]] = None
+    ) -> None:
+        # Engine getters, called on first use: the limiter is built at import,
+        # which under gunicorn --preload happens in the master, before the fork
+        self._engine = engine
+        self._async_engine = async_engine
+        self._purged = time.monotonic()
+
+    @property
+    def engine(self) -> Engine:
+        return self._engine()
+
+    @property
+    def async_engine(self) -> Optional[AsyncEngine]:
+        return self._async_engine() if self._async_engine is not None else None
+
+    @staticmethod
+    def _params(key: str, limit: Limit) -> Dict[str, object]:
+        return {"key": key, "rate": float(limit.rate), "burst": float(limit.burst)}
+
+    @staticmethod
+    def _retry_after(row, limit: Limit) -> float:
+        allowed, tokens, updated_at, now = row
+        if allowed:
+            return 0.0
+        return (1 - _refill(tokens, updated_at, now, limit)) / limit.rate
+
+    def _purge_due(self) -> bool:
+        # Expired rows are harmless (they count as full), purging only keeps
+        # the table small; each worker does it at most once per interval
+        if time.monotonic() - self._purged <= SWEEP_INTERVAL:
+            return False
+        self._purged = time.monotonic()
+        return True
+
+    def take(self, key: str, limit: Limit) -> float:
+        with self.engine.begin() as conn:
+            row = conn.execute(_TAKE_SQL, self._params(key, limit)).one()
+            if self._purge_due():
+                conn.execute(_PURGE_SQL)
+        return self._retry_after(row, limit)
+
+    async def take_async(self, key: str, limit: Limit) -> float:
+        async_engine = self.async_engine
+        if async_engine is None:
+            raise RuntimeError("PostgresBucketStore needs an async_engine for take_async")
+        async with async_engine.begin() as conn:
+            row = (await conn.execute(_TAKE_SQL, self._params(key, limit))).one()
+            if self._purge_due():
+                await conn.execute(_PURGE_SQL)
+        return self._retry_after(row, limit)
+
+    def clear(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM rate_limit_buckets"))
+
+
+def client_key(host: Optional[str]) -> str:
+    # An IPv6 client usually controls a whole /64, so that is what gets limited
+    if not host:
+        return "unknown"
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return host
+    if address.version == 6:
+        if address.ipv4_mapped is not None:
+            return str(address.ipv4_mapped)
+        return str(ipaddress.ip_network(f"{address}/64", strict=False))
+    return str(address)
+
+
+class LoginRateLimiter:
+    def __init__(self, store: Union[MemoryBucketStore, PostgresBucketStore], per_ip: Limit, per_username: Limit) -> None:
+        self.store = store
+        self.per_ip = per_ip
+        self.per_username = per_username
+
+    def _buckets(self, host: Optional[str], username: str) -> List[Tuple[str, str, Limit]]:
+        # The IP bucket is charged first: an attempt it rejects must not
+        # also drain the username's bucket, or a blocked client could still
+        # lock a victim out
+        return [
+            ("ip", f"login:ip:{client_key(host)}", self.per_ip),
+            ("username", f"login:user:{username.strip().lower()}", self.per_username),
+        ]
+
+    def check(self, host: Optional[str], username: str) -> float:
+        """Charge one login attempt. Returns 0 when allowed, else the Retry-After in seconds."""
+        for bucket, key, limit in self._buckets(host, username):
+            retry_after = self.store.take(key, limit)
+            if retry_after:
+                LOGIN_RATE_LIMITED.labels(bucket).inc()
+                return retry_after
+        return 0.0
+
+    async def check_async(self, host: Optional[str], username: str) -> float:
+        for bucket, key, limit in self._buckets(host, username):
+            retry_after = await self.store.take_async(key, limit)
+            if retry_after:
+                LOGIN_RATE_LIMITED.labels(bucket).inc()
+                return retry_after
+        return 0.0
+
+    def reset(self) -> None:
+        self.store.clear()
+
+
+def _build_login_limiter() -> Optional[LoginRateLimiter]:
+    if not settings.login_rate_limit_enabled:
+        return None
+    if settings.login_rate_limit_backend == "postgres":
+        from app.db.session import get_async_engine, get_engine
+
+        store = PostgresBucketStore(get_engine, get_async_engine)
+    else:
+        store = MemoryBucketStore(max_keys=settings.login_rate_limit_max_keys)
+    return LoginRateLimiter(
+        store,
+        per_ip=Limit.per_minute(settings.login_rate_limit_ip_per_minute, settings.login_rate_limit_ip_burst),
+        per_username=Limit.per_minute(
+            settings.login_rate_limit_username_per_minute, settings.login_rate_limit_username_burst
+        ),
+    )
+
+
+# None when LOGIN_RATE_LIMIT_ENABLED=false
+login_limiter: Optional[LoginRateLimiter] = _build_login_limiter()
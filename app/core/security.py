@@ -1,8 +1,18 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-from jose import jwt, JWTError
-from passlib.context import CryptContext
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Dict, NamedTuple, Optional, Protocol, Tuple
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import ARGON2_SECONDS
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
 
 # Password Hashing Configuration
 
@@ -11,39 +21,233 @@ from app.core.config import settings
 # If we need to upgrade hashing parameters or add a new scheme (e.g., bcrypt),
 # passlib will automatically handle rehashing old passwords upon verification.
 
-# Argon2id parameters based on OWASP minimum recommendations:
+# Argon2id parameters come from Settings (ARGON2_MEMORY_COST, ARGON2_TIME_COST,
+# ARGON2_PARALLELISM). The defaults are the OWASP minimum recommendation:
 # m = 19 MiB (memory cost) 19 * 1024 = 19456 KiB
 # t = 2 (time cost / iterations)
 # p = 1 (parallelism)
+# scripts/calibrate_argon2.py measures the host and suggests stronger ones.
+# Changing them does not invalidate existing hashes: login verifies against
+# the costs stored in the hash, then replaces it (see verify_and_update).
 
-pwd_context = CryptContext(
-    schemes=["argon2"], # Default and only scheme is argon2
-    deprecated="auto", # Automatically mark old schemes as deprecated if new ones are added
-    argon2__type="ID",
-    argon2__memory_cost=19456,  # 19 MiB
-    argon2__time_cost=2,
-    argon2__parallelism=1,
-)
+# passlib and argon2-cffi are imported, and the context built, on the first
+# hash or verify: most requests never touch a password, and a worker should
+# not pay for them at startup (see warm_up for gunicorn --preload).
+_pwd_context: Optional["CryptContext"] = None
+_pwd_context_lock = threading.Lock()
+
+def get_pwd_context() -> "CryptContext":
+    global _pwd_context
+    if _pwd_context is None:
+        with _pwd_context_lock:
+            if _pwd_context is None:
+                from passlib.context import CryptContext
+
+                _pwd_context = CryptContext(
+                    schemes=["argon2"], # Default and only scheme is argon2
+                    deprecated="auto", # Automatically mark old schemes as deprecated if new ones are added
+                    argon2__type="ID",
+                    argon2__memory_cost=settings.argon2_memory_cost,
+                    argon2__time_cost=settings.argon2_time_cost,
+                    argon2__parallelism=settings.argon2_parallelism,
+                )
+    return _pwd_context
 
 def hash_password(plain_password: str) -> str:
-    return pwd_context.hash(plain_password)
+    started = time.perf_counter()
+    try:
+        return get_pwd_context().hash(plain_password)
+    finally:
+        ARGON2_SECONDS.labels("hash").observe(time.perf_counter() - started)
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
-    return pwd_context.verify(plain_password, password_hash)
+    started = time.perf_counter()
+    try:
+        return get_pwd_context().verify(plain_password, password_hash)
+    finally:
+        ARGON2_SECONDS.labels("verify").observe(time.perf_counter() - started)
+
+def verify_and_update(plain_password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify like verify_password; on success, also return a new hash when the
+    stored one was made with other Argon2 costs than the current settings.
+    """
+    if not verify_password(plain_password, password_hash):
+        return False, None
+    if not get_pwd_context().needs_update(password_hash):
+        return True, None
+    return True, hash_password(plain_password)
+
+# JWT Backends
+
+# Token signing and verification go through a small backend interface so the
+# implementation can be swapped via JWT_BACKEND without touching callers:
+#   jose  - python-jose (default)
+#   pyjwt - PyJWT, if installed
+#   hmac  - stdlib hmac/hashlib/json, HS256/HS384/HS512 only, and the fastest
+# All three produce and accept the same compact JWS tokens.
+
+class InvalidToken(Exception):
+    """Raised by token backends for bad signatures, malformed or expired tokens."""
+
+class TokenBackend(Protocol):
+    name: str
+
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str) -> str: ...
+
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]: ...
+
+class JoseBackend:
+    name = "jose"
+
+    @cached_property
+    def _jose(self) -> Any:
+        # Imported on first use: python-jose loads its cryptography backends,
+        # which cost tens of milliseconds of worker startup
+        import jose.jwt
+        return jose
+
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str) -> str:
+        return self._jose.jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]:
+        try:
+            return self._jose.jwt.decode(token, key, algorithms=[algorithm])
+        except self._jose.JWTError as exc:
+            raise InvalidToken(str(exc)) from exc
+
+class PyJWTBackend:
+    name = "pyjwt"
+
+    def __init__(self) -> None:
+        # Optional dependency, imported only when this backend is selected
+        import jwt as pyjwt
+        self._jwt = pyjwt
 
-def create_access_token(subject: str) -> str:
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]:
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._jwt.PyJWTError as exc:
+            raise InvalidToken(str(exc)) from exc
+
+def _b64url_encode(raw: bytes) -> bytes:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=")
+
+def _b64url_decode(segment: bytes) -> bytes:
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+class HMACBackend:
+    name = "hmac"
+    _digests = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+    def _digest(self, algorithm: str) -> Any:
+        try:
+            return self._digests[algorithm]
+        except KeyError:
+            raise ValueError(f"The hmac JWT backend does not support {algorithm}") from None
+
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str) -> str:
+        header = {"alg": algorithm, "typ": "JWT"}
+        signing_input = b".".join(
+            _b64url_encode(json.dumps(part, separators=(",", ":")).encode())
+            for part in (header, claims)
+        )
+        signature = hmac.new(key.encode(), signing_input, self._digest(algorithm)).digest()
+        return (signing_input + b"." + _b64url_encode(signature)).decode("ascii")
+
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]:
+        digest = self._digest(algorithm)
+        try:
+            signing_input, _, signature = token.encode("ascii").rpartition(b".")
+            header_segment, _, payload_segment = signing_input.partition(b".")
+            header = json.loads(_b64url_decode(header_segment))
+            expected = hmac.new(key.encode(), signing_input, digest).digest()
+            # Verify the algorithm first: never let the token choose it (e.g. "none")
+            if header.get("alg") != algorithm or not hmac.compare_digest(expected, _b64url_decode(signature)):
+                raise InvalidToken("Signature verification failed")
+            claims = json.loads(_b64url_decode(payload_segment))
+            if not isinstance(claims, dict):
+                raise InvalidToken("Malformed token")
+            # A signed token can still carry a non-numeric exp or nbf
+            now = time.time()
+            if "exp" in claims and float(claims["exp"]) <= now:
+                raise InvalidToken("Signature has expired")
+            if "nbf" in claims and float(claims["nbf"]) > now:
+                raise InvalidToken("The token is not yet valid")
+        except (TypeError, ValueError, UnicodeError, AttributeError) as exc:
+            raise InvalidToken("Malformed token") from exc
+        return claims
+
+def get_token_backend(name: str) -> TokenBackend:
+    if name == "pyjwt":
+        return PyJWTBackend()
+    if name == "hmac":
+        return HMACBackend()
+    return JoseBackend()
+
+token_backend: TokenBackend = get_token_backend(settings.jwt_backend)
+
+class TokenClaims(NamedTuple):
+    subject: str
+    # users.token_version at issue time; bumping the column revokes the token
+    version: int
+    expires_at: int
+
+# Verified-token cache
+
+# Repeat requests with the same bearer token skip signature verification and
+# claim parsing. Entries are keyed by the SHA-256 of the token (the token
+# itself is never stored) and never outlive the token's own exp. Only tokens
+# that verified successfully are cached, so garbage tokens cannot fill it.
+token_cache: TTLCache[bytes, TokenClaims] = TTLCache(
+    maxsize=settings.jwt_cache_size, ttl=settings.jwt_cache_ttl_seconds
+)
+
+def create_access_token(subject: str, version: int = 0) -> str:
     # Set the token expiration time
     expire = datetime.now(timezone.utc) + timedelta(
         minutes=settings.access_token_expire_minutes
     )
     # Payload to encode
-    to_encode = {"sub": subject, "exp": expire}
+    to_encode = {"sub": subject, "exp": int(expire.timestamp()), "ver": version}
     # Encode the token using the secret key and algorithm from settings
-    return jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    return token_backend.encode(to_encode, settings.jwt_secret_key, settings.jwt_algorithm)
 
-def decode_token(token: str) -> Optional[str]:
+def decode_access_token(token: str) -> Optional[TokenClaims]:
+    cache_key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(cache_key)
+    if claims is not None:
+        return claims
     try:
-        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        return payload.get("sub")
-    except JWTError:
-        return None
\ No newline at end of file
+        payload = token_backend.decode(token, settings.jwt_secret_key, settings.jwt_algorithm)
+    except InvalidToken:
+        return None
+    subject = payload.get("sub")
+    if not subject:
+        return None
+    # Tokens issued before versioning carry no "ver" claim and count as version 0
+    try:
+        claims = TokenClaims(subject=subject, version=int(payload.get("ver", 0)), expires_at=int(payload.get("exp", 0)))
+    except (TypeError, ValueError):
+        return None
+    if claims.expires_at:
+        # Translate the wall-clock exp onto the cache's monotonic clock
+        token_cache.set(cache_key, claims, expires_at=time.monotonic() + claims.expires_at - time.time())
+    return claims
+
+def decode_token(token: str) -> Optional[str]:
+    claims = decode_access_token(token)
+    return claims.subject if claims else None
+
+def warm_up() -> None:
+    """
+    Do the imports and setup the auth path defers: build the password hashing
+    context and sign and verify a throwaway token with the configured backend.
+    Run by the gunicorn master under --preload, so forked workers share it.
+    """
+    get_pwd_context()
+    token = token_backend.encode({"sub": "warm-up"}, settings.jwt_secret_key, settings.jwt_algorithm)
+    token_backend.decode(token, settings.jwt_secret_key, settings.jwt_algorithm)
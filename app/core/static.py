@@ -0,0 +1,218 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+from starlette.websockets import WebSocketClose
+
+from app.core.etag import if_none_match
+
+try:
+    # Optional dependency; without it assets are served gzip or uncompressed,
+    # unless a prebuilt <file>.br sits next to the source file
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# In-memory static assets for the bundled web UI.
+# web/ is read once at startup. Every file is kept as bytes together with its
+# gzip (and brotli) encodings and a content-hash ETag, so a request costs a
+# dict lookup instead of a stat() and open(). HTML pages are rewritten to
+# reference assets as /static/<name>?v=<hash>: those URLs change whenever the
+# file does, so they are served as immutable and browsers never revalidate them.
+# Unversioned URLs (and the pages themselves) are served with no-cache and
+# answered with 304 when the ETag still matches.
+# STATIC_RELOAD=true re-reads the directory when a file changes (development).
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Preferred first when the client accepts several
+ENCODINGS = ("br", "gzip")
+# Below this size the encoding overhead outweighs the savings
+MIN_COMPRESS_SIZE = 256
+RELOAD_CHECK_INTERVAL = 0.5
+
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+_PREBUILT = {".br": "br", ".gz": "gzip"}
+
+
+class Asset:
+    __slots__ = ("name", "content_type", "version", "bodies", "etags")
+
+    def __init__(self, name: str, content_type: str, body: bytes, prebuilt: Dict[str, bytes]) -> None:
+        self.name = name
+        self.content_type = content_type
+        self.version = hashlib.sha256(body).hexdigest()[:16]
+        # encoding ("identity", "gzip", "br") -> bytes
+        self.bodies: Dict[str, bytes] = {"identity": body}
+        if content_type.startswith(_COMPRESSIBLE) and len(body) >= MIN_COMPRESS_SIZE:
+            encoded = dict(prebuilt)
+            encoded.setdefault("gzip", gzip.compress(body, compresslevel=9, mtime=0))
+            if brotli is not None:
+                encoded.setdefault("br", brotli.compress(body))
+            for encoding, data in encoded.items():
+                if len(data) < len(body):
+                    self.bodies[encoding] = data
+        # Each encoding is a different representation and needs its own ETag
+        self.etags = {
+            encoding: f'"{self.version}"' if encoding == "identity" else f'"{self.version}-{encoding}"'
+            for encoding in self.bodies
+        }
+
+    @property
+    def compressible(self) -> bool:
+        return len(self.bodies) > 1
+
+    def negotiate(self, accept_encoding: Optional[str]) -> str:
+        if accept_encoding and self.compressible:
+            accepted = accepted_encodings(accept_encoding)
+            for encoding in ENCODINGS:
+                if encoding in self.bodies and encoding in accepted:
+                    return encoding
+        return "identity"
+
+
+def accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    if "*" in accepted:
+        accepted.update(ENCODINGS)
+    return accepted
+
+
+def _content_type(name: str) -> str:
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type == "application/javascript":
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+class AssetStore:
+    def __init__(self, directory: str, url_prefix: str = "/static", reload: bool = False) -> None:
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.reload = reload
+        self.assets: Dict[str, Asset] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def _scan(self) -> Dict[str, float]:
+        mtimes = {}
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                mtimes[os.path.relpath(path, self.directory).replace(os.sep, "/")] = os.stat(path).st_mtime
+        return mtimes
+
+    def load(self) -> None:
+        mtimes = self._scan()
+        sources: Dict[str, bytes] = {}
+        prebuilt: Dict[str, Dict[str, bytes]] = {}
+        for name in mtimes:
+            with open(os.path.join(self.directory, name), "rb") as fh:
+                data = fh.read()
+            base, ext = os.path.splitext(name)
+            if ext in _PREBUILT and base in mtimes:
+                # Precompressed at build time; ignored once the source is newer
+                if mtimes[name] >= mtimes[base]:
+                    prebuilt.setdefault(base, {})[_PREBUILT[ext]] = data
+                continue
+            sources[name] = data
+
+        assets: Dict[str, Asset] = {}
+        pages: List[str] = []
+        for name, data in sources.items():
+            if name.endswith(".html"):
+                pages.append(name)
+            else:
+                assets[name] = Asset(name, _content_type(name), data, prebuilt.get(name, {}))
+        # Pages are hashed after versioning their links, so a changed
+        # stylesheet also changes the ETag of every page using it
+        for name in pages:
+            page = self._version_links(sources[name], assets)
+            assets[name] = Asset(name, _content_type(name), page, {} if page != sources[name] else prebuilt.get(name, {}))
+
+        self.assets = assets
+        self._mtimes = mtimes
+        self._checked = time.monotonic()
+        logger.info("Loaded %d static assets from %s", len(assets), self.directory)
+
+    def _version_links(self, page: bytes, assets: Dict[str, Asset]) -> bytes:
+        for name, asset in assets.items():
+            for quote in (b'"', b"'"):
+                url = f"{self.url_prefix}/{name}".encode()
+                page = page.replace(quote + url + quote, quote + url + f"?v={asset.version}".encode() + quote)
+        return page
+
+    def get(self, name: str) -> Optional[Asset]:
+        if self.reload and time.monotonic() - self._checked > RELOAD_CHECK_INTERVAL:
+            with self._lock:
+                self._checked = time.monotonic()
+                if self._scan() != self._mtimes:
+                    self.load()
+        return self.assets.get(name)
+
+
+def asset_response(asset: Optional[Asset], method: str, request_headers: Headers, immutable: bool = False) -> Response:
+    if asset is None:
+        return PlainTextResponse("Not Found", status_code=404)
+    if method not in ("GET", "HEAD"):
+        return PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+
+    encoding = asset.negotiate(request_headers.get("accept-encoding"))
+    etag = asset.etags[encoding]
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE if immutable else REVALIDATE}
+    if asset.compressible:
+        headers["Vary"] = "Accept-Encoding"
+    if if_none_match(request_headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    # HEAD gets the same Content-Length; the server drops the body
+    return Response(asset.bodies[encoding], headers=headers, media_type=asset.content_type)
+
+
+class StaticAssets:
+    """ASGI app serving an AssetStore; a drop-in for a StaticFiles mount."""
+
+    def __init__(self, store: AssetStore) -> None:
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "websocket":
+            # Nothing to serve over a websocket; close it as the router does
+            # for an unmatched route
+            await WebSocketClose()(scope, receive, send)
+            return
+        if scope["type"] != "http":
+            raise RuntimeError(f"StaticAssets cannot serve a {scope['type']!r} scope")
+        # Mounted: root_path ends with the mount point, path still includes it
+        path, root_path = scope["path"], scope.get("root_path", "")
+        name = (path[len(root_path):] if path.startswith(root_path) else path).lstrip("/")
+        asset = self.store.get(name)
+        # Only the exact version we hold is immutable; a stale ?v= still gets
+        # the current bytes, but must be revalidated
+        version = QueryParams(scope["query_string"]).get("v")
+        immutable = asset is not None and version == asset.version
+        response = asset_response(asset, scope["method"], Headers(scope=scope), immutable)
+        await response(scope, receive, send)
@@ -0,0 +1,191 @@
+import logging
+import threading
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+# Authenticated-user cache.
+# get_current_user only needs to know that the token's user is still active
+# and that the token has not been revoked (token_version). Caching that pair
+# per user id removes a Postgres round-trip from every authenticated request.
+# Entries are dropped when a User's is_active/token_version change is
+# committed through the ORM, and, when USER_CACHE_NOTIFY_CHANNEL is set, the
+# same change is broadcast with NOTIFY so every gunicorn worker drops it too.
+#
+# A request that read the row before such a commit may only get to cache it
+# afterwards, which would put the revoked state back for a full TTL. So every
+# invalidation also bumps the user's generation: get_current_user takes the
+# generation before its database read, and remember_user stores nothing if
+# the generation has moved on since.
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "user_cache_invalidations"
+
+
+class CachedUser(NamedTuple):
+    is_active: bool
+    token_version: int
+
+
+class CurrentUser(NamedTuple):
+    # What route handlers receive from get_current_user
+    id: int
+
+
+user_cache: TTLCache[int, CachedUser] = TTLCache(
+    maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl_seconds
+)
+
+# (epoch, per-user count). The epoch moves when the whole cache is dropped,
+# and when the per-user counts are reset to keep them bounded.
+Generation = Tuple[int, int]
+
+_MAX_GENERATIONS = 100000
+_generations: Dict[int, int] = {}
+_epoch = 0
+# Makes check-and-store in remember_user atomic with invalidation
+_generation_lock = threading.Lock()
+
+
+def user_generation(user_id: int) -> Generation:
+    """Take before reading a user's auth state; pass to remember_user."""
+    with _generation_lock:
+        return _epoch, _generations.get(user_id, 0)
+
+
+def remember_user(
+    user_id: int, is_active: Optional[bool], token_version: int, generation: Optional[Generation] = None
+) -> CachedUser:
+    # Not cached if the user was invalidated after ``generation`` was taken:
+    # the state was read before the change and may be stale
+    state = CachedUser(is_active=bool(is_active), token_version=token_version)
+    with _generation_lock:
+        if generation is None or generation == (_epoch, _generations.get(user_id, 0)):
+            user_cache.set(user_id, state)
+    return state
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a user from this worker's cache. Call after deactivating or revoking outside the ORM."""
+    global _epoch
+    with _generation_lock:
+        if len(_generations) >= _MAX_GENERATIONS:
+            _generations.clear()
+            _epoch += 1
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+        user_cache.invalidate(user_id)
+
+
+def invalidate_all_users() -> None:
+    """Drop every user from this worker's cache, e.g. after missing notifications."""
+    global _epoch
+    with _generation_lock:
+        _generations.clear()
+        _epoch += 1
+        user_cache.clear()
+
+
+# --- ORM invalidation hooks ---
+# Invalidation happens after commit: dropping the entry at flush time would
+# let a concurrent request read and re-cache the still-committed old state
+# with a generation taken after the drop. Reads that started before the
+# commit are caught by the generation check in remember_user.
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    changed = any(
+        state.attrs[name].history.has_changes() for name in ("is_active", "token_version")
+    )
+    if changed:
+        _schedule_invalidation(connection, target)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target: User) -> None:
+    _schedule_invalidation(connection, target)
+
+
+def _schedule_invalidation(connection, target: User) -> None:
+    session = object_session(target)
+    if session is not None:
+        pending: Set[int] = session.info.setdefault(_PENDING_KEY, set())
+        pending.add(target.id)
+    if settings.user_cache_notify_channel:
+        # NOTIFY is transactional: other workers only hear about it on commit
+        connection.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": settings.user_cache_notify_channel, "payload": str(target.id)},
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+# --- Cross-worker invalidation over LISTEN/NOTIFY ---
+
+
+class UserCacheListener:
+    """Background thread that LISTENs on a channel and invalidates the user ids it receives."""
+
+    def __init__(self, database_url: str, channel: str) -> None:
+        # psycopg wants a plain postgresql:// DSN, without SQLAlchemy's driver suffix
+        self._dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._channel = channel
+        self._stop = threading.Event()
+        # Set while a LISTEN connection is established
+        self.listening = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="user-cache-listener", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        # Only needed once a listener runs, so not imported with the module
+        import psycopg
+        from psycopg import sql
+
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self._dsn, autocommit=True) as conn:
+                    conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self._channel)))
+                    # Changes made while we were not listening were missed
+                    invalidate_all_users()
+                    self.listening.set()
+                    backoff = 1.0
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            self._handle(notify.payload)
+            except psycopg.Error as exc:
+                self.listening.clear()
+                logger.warning("User cache listener disconnected (%s); retrying in %.0fs", exc, backoff)
+                invalidate_all_users()
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _handle(self, payload: str) -> None:
+        try:
+            invalidate_user(int(payload))
+        except ValueError:
+            logger.warning("Ignoring malformed user cache notification: %r", payload)
@@ -0,0 +1,251 @@
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import (
+    WRITE_BEHIND_DROPPED,
+    WRITE_BEHIND_FLUSH_SECONDS,
+    WRITE_BEHIND_PENDING,
+    WRITE_BEHIND_WRITTEN,
+)
+from app.crud import audit as crud_audit
+from app.crud import user as crud_user
+from app.db.session import get_engine
+
+# Write-behind queue for side effects a response does not wait on.
+# Handlers record audit events and logins here, which costs a lock and an
+# append; a background thread per worker writes them to Postgres in one
+# transaction per batch: a multi-row INSERT into audit_events and a single
+# UPDATE ... FROM (VALUES ...) for users.last_login. Logins are coalesced per
+# user, so a user logging in repeatedly between flushes is one row to update.
+#
+# A flush runs every flush_interval seconds, or as soon as batch_size records
+# are waiting. The queue is bounded: beyond max_pending, new records are
+# dropped and counted in write_behind_dropped_total instead of making the
+# request wait or letting memory grow while Postgres is unreachable. A batch
+# that fails to write goes back to the front of the queue and is retried on
+# the next flush.
+#
+# Started and stopped from the app lifespan. stop() keeps flushing for up to
+# drain_timeout seconds, so records taken before gunicorn sends SIGTERM are
+# written before the worker exits. The thread uses the sync engine, and so
+# serves the sync and the DB_ASYNC routers alike.
+
+logger = logging.getLogger(__name__)
+
+AUDIT = "audit"
+LAST_LOGIN = "last_login"
+
+# Longest wait between flush attempts while they keep failing
+FAILURE_BACKOFF_CAP = 5.0
+
+
+class AuditRecord(NamedTuple):
+    # Timestamped when recorded, not when the batch reaches Postgres
+    occurred_at: datetime
+    user_id: Optional[int]
+    action: str
+    item_id: Optional[int]
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        flush_interval: float,
+        batch_size: int,
+        max_pending: int,
+        drain_timeout: float,
+        engine: Callable[[], Engine] = get_engine,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.drain_timeout = drain_timeout
+        self._engine = engine
+        self._audit: Deque[AuditRecord] = deque()
+        self._logins: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        # Only one flush at a time: the thread's, or a direct flush() call
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._dropped = 0
+        self._gauges = {kind: WRITE_BEHIND_PENDING.labels(kind) for kind in (AUDIT, LAST_LOGIN)}
+        self._dropped_counters = {kind: WRITE_BEHIND_DROPPED.labels(kind) for kind in (AUDIT, LAST_LOGIN)}
+
+    @property
+    def pending(self) -> int:
+        return len(self._audit) + len(self._logins)
+
+    def audit(self, action: str, user_id: Optional[int] = None, item_ids: Iterable[Optional[int]] = (None,)) -> None:
+        """Record ``action`` by ``user_id``, once per item id (one event without items by default)."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            room = self.max_pending - self.pending
+            dropped = 0
+            for item_id in item_ids:
+                if room <= 0:
+                    dropped += 1
+                    continue
+                self._audit.append(AuditRecord(now, user_id, action, item_id))
+                room -= 1
+            self._dropped += dropped
+            depth = len(self._audit)
+        if dropped:
+            self._dropped_counters[AUDIT].inc(dropped)
+        self._gauges[AUDIT].set(depth)
+        self._wake_if_full()
+
+    def login(self, user_id: int) -> None:
+        """Record a successful login; users.last_login is set at the next flush."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            if user_id not in self._logins and self.pending >= self.max_pending:
+                self._dropped += 1
+                full = True
+            else:
+                self._logins[user_id] = now
+                full = False
+            depth = len(self._logins)
+        if full:
+            self._dropped_counters[LAST_LOGIN].inc()
+        self._gauges[LAST_LOGIN].set(depth)
+        self._wake_if_full()
+
+    def _wake_if_full(self) -> None:
+        if self.pending >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """
+        Write everything pending from the calling thread, batch_size records
+        per transaction. Returns the number of records written; on a database
+        error the unwritten records are queued again and the error is raised.
+        """
+        with self._flush_lock:
+            with self._lock:
+                audit, self._audit = list(self._audit), deque()
+                logins, self._logins = self._logins, {}
+                dropped, self._dropped = self._dropped, 0
+            if dropped:
+                logger.warning("Write-behind queue full: dropped %d records", dropped)
+            written, events = 0, []
+            try:
+                while audit or logins:
+                    events, audit = audit[: self.batch_size], audit[self.batch_size:]
+                    seen = dict(list(logins.items())[: self.batch_size - len(events)])
+                    self._write(events, seen)
+                    written += len(events) + len(seen)
+                    for user_id in seen:
+                        del logins[user_id]
+            except Exception:
+                self._requeue(events + audit, logins)
+                raise
+            finally:
+                self._update_gauges()
+            return written
+
+    def _write(self, events: List[AuditRecord], logins: Dict[int, datetime]) -> None:
+        started = time.perf_counter()
+        with self._engine().begin() as conn:
+            if events:
+                conn.execute(
+                    crud_audit.INSERT_EVENTS.execution_options(insertmanyvalues_page_size=self.batch_size),
+                    [event._asdict() for event in events],
+                )
+            if logins:
+                conn.execute(crud_user.last_login_stmt(logins))
+        WRITE_BEHIND_FLUSH_SECONDS.observe(time.perf_counter() - started)
+        if events:
+            WRITE_BEHIND_WRITTEN.labels(AUDIT).inc(len(events))
+        if logins:
+            WRITE_BEHIND_WRITTEN.labels(LAST_LOGIN).inc(len(logins))
+
+    def _requeue(self, audit: List[AuditRecord], logins: Dict[int, datetime]) -> None:
+        # Back in front of anything recorded since, within max_pending
+        with self._lock:
+            room = self.max_pending - self.pending
+            kept_audit = audit[: max(room, 0)]
+            room -= len(kept_audit)
+            for user_id, seen_at in logins.items():
+                if user_id in self._logins:
+                    # Recorded again meanwhile, with a later timestamp
+                    continue
+                if room <= 0:
+                    self._dropped_counters[LAST_LOGIN].inc()
+                    continue
+                self._logins[user_id] = seen_at
+                room -= 1
+            self._audit.extendleft(reversed(kept_audit))
+        if len(kept_audit) < len(audit):
+            self._dropped_counters[AUDIT].inc(len(audit) - len(kept_audit))
+
+    def _update_gauges(self) -> None:
+        self._gauges[AUDIT].set(len(self._audit))
+        self._gauges[LAST_LOGIN].set(len(self._logins))
+
+    def start(self) -> None:
+        # Started from the app lifespan, so each gunicorn worker runs its own
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flush thread, then write what is left within drain_timeout."""
+        # One budget for both steps: waiting for the thread and draining
+        deadline = time.monotonic() + self.drain_timeout
+        self._stop.set()
+        self._wake.set()
+        busy = False
+        if self._thread is not None:
+            self._thread.join(timeout=self.drain_timeout)
+            # Still in a flush that outlasted the budget: flushing here too
+            # would only wait for its lock
+            busy = self._thread.is_alive()
+            self._thread = None
+        while self.pending and not busy:
+            try:
+                self.flush()
+            except Exception:
+                if time.monotonic() >= deadline:
+                    break
+                logger.warning("Write-behind drain failed, retrying", exc_info=True)
+                time.sleep(min(self.flush_interval, max(deadline - time.monotonic(), 0)))
+        if self.pending:
+            logger.error("Write-behind queue not drained: %d records lost", self.pending)
+            with self._lock:
+                self._dropped_counters[AUDIT].inc(len(self._audit))
+                self._dropped_counters[LAST_LOGIN].inc(len(self._logins))
+                self._audit.clear()
+                self._logins.clear()
+            self._update_gauges()
+
+    def _run(self) -> None:
+        interval = self.flush_interval
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+                interval = self.flush_interval
+            except Exception:
+                # Back off while Postgres is unreachable; records keep queueing
+                interval = min(interval * 2, FAILURE_BACKOFF_CAP)
+                logger.exception("Write-behind flush failed; retrying in %.1fs", interval)
+
+
+write_behind = WriteBehindQueue(
+    flush_interval=settings.write_behind_flush_interval_ms / 1000,
+    batch_size=settings.write_behind_batch_size,
+    max_pending=settings.write_behind_max_pending,
+    drain_timeout=settings.write_behind_drain_timeout,
+)
@@ -0,0 +1,10 @@
+from sqlalchemy import insert
+
+from app.models.audit import AuditEvent
+
+# Executed with a list of parameter dicts, one per event. The psycopg dialect
+# only batches an executemany into multi-row INSERT ... VALUES statements
+# (insertmanyvalues) when it has RETURNING, hence the ids nobody reads; the
+# write-behind queue sets insertmanyvalues_page_size to its batch size so a
+# batch is one statement.
+INSERT_EVENTS = insert(AuditEvent).returning(AuditEvent.id)
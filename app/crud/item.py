@@ -0,0 +1,325 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from sqlalchemy import (
+    ARRAY,
+    Boolean,
+    Insert,
+    Integer,
+    Select,
+    Text,
+    Update,
+    and_,
+    any_,
+    bindparam,
+    case,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION, REGCONFIG
+from sqlalchemy.sql.dml import ReturningDelete, ReturningUpdate
+
+from pydantic import TypeAdapter
+
+from app.core.pagination import encode_cursor, encode_search_cursor
+from app.models.item import Item
+from app.schemas.item import (
+    ItemBulkResult,
+    ItemBulkUpdate,
+    ItemCreate,
+    ItemPage,
+    ItemPageRecord,
+    ItemRead,
+    ItemRecord,
+    ItemSuggestion,
+    ItemUpdate,
+)
+
+# Statement builders shared by the sync (app/api/items.py) and async
+# (app/api/aio/items.py) routers, so both always issue the same SQL.
+
+
+def owner_items_stmt(owner_id: int, after_id: int = 0) -> Select:
+    # Keyset scan over the (owner_id, id) index, resuming after after_id
+    return (
+        select(Item)
+        .where(Item.owner_id == owner_id, Item.id > after_id)
+        .order_by(Item.id)
+    )
+
+
+# Prebuilt like the hot statements in app/crud/user.py; execute with page_params()
+_OWNER_PAGE = (Item.owner_id == bindparam("owner_id"), Item.id > bindparam("after_id"))
+PAGE = select(Item).where(*_OWNER_PAGE).order_by(Item.id).limit(bindparam("limit"))
+
+
+def page_params(owner_id: int, after_id: int, limit: int) -> Dict[str, int]:
+    # Fetch one extra row to learn whether another page exists
+    return {"owner_id": owner_id, "after_id": after_id, "limit": limit + 1}
+
+
+def build_page(items: Sequence[Item], owner_id: int, limit: int) -> ItemPage:
+    # The extra row fetched by page_params() only signals another page
+    page = [ItemRead.model_validate(item) for item in items[:limit]]
+    next_cursor = encode_cursor(owner_id, page[-1].id) if len(items) > limit else None
+    return ItemPage(items=page, limit=limit, next_cursor=next_cursor)
+
+
+def ndjson_batch(items: Sequence[Item]) -> str:
+    # Serialize one streamed batch as newline-delimited JSON
+    return "".join(ItemRead.model_validate(item).model_dump_json() + "\n" for item in items)
+
+
+# --- Fast JSON listing (ITEMS_FAST_JSON) ---
+# The same pages and streams, selected as plain rows and serialized by
+# pydantic-core from dicts: no ORM objects, no ItemRead models, and no
+# response_model validation pass, which dominate the cost of large lists.
+
+# ItemRead's fields, in the order the JSON lists them
+_READ_COLUMNS = (Item.name, Item.description, Item.id, Item.owner_id)
+_RECORD_JSON = TypeAdapter(ItemRecord)
+_PAGE_JSON = TypeAdapter(ItemPageRecord)
+
+
+def owner_rows_stmt(owner_id: int, after_id: int = 0) -> Select:
+    return (
+        select(*_READ_COLUMNS)
+        .where(Item.owner_id == owner_id, Item.id > after_id)
+        .order_by(Item.id)
+    )
+
+
+PAGE_ROWS = select(*_READ_COLUMNS).where(*_OWNER_PAGE).order_by(Item.id).limit(bindparam("limit"))
+
+
+def _records(rows: Iterable[Sequence[Any]]) -> List[ItemRecord]:
+    # Unpacked in _READ_COLUMNS order
+    return [
+        ItemRecord(name=name, description=description, id=item_id, owner_id=owner_id)
+        for name, description, item_id, owner_id in rows
+    ]
+
+
+def page_json(rows: Sequence[Any], owner_id: int, limit: int) -> bytes:
+    # JSON body identical to build_page() once FastAPI has serialized it
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(owner_id, rows[-1].id)
+    return _PAGE_JSON.dump_json({"items": _records(rows), "limit": limit, "next_cursor": next_cursor})
+
+
+def ndjson_rows(rows: Sequence[Any]) -> bytes:
+    return b"".join(_RECORD_JSON.dump_json(record) + b"\n" for record in _records(rows))
+
+
+# --- Search ---
+# Full-text search runs on the generated items.search_vector column and its
+# GIN index; autocomplete is an ILIKE prefix match that the optional pg_trgm
+# index on name serves (see app/models/item.py).
+
+# Must match the configuration in Item's SEARCH_VECTOR_SQL
+SEARCH_CONFIG = "english"
+
+
+def _rank(query: Any) -> Any:
+    # Cover density: matches close together in the name rank highest.
+    # ts_rank_cd returns real, which is read back as its shortest decimal
+    # form; as double precision the cursor can hold the exact value.
+    return cast(func.ts_rank_cd(Item.search_vector, query), DOUBLE_PRECISION)
+
+
+def search_stmt(owner_id: int, q: str, after: Optional[Tuple[float, int]], limit: int) -> Select:
+    # websearch_to_tsquery accepts what users type (red shoes, -used,
+    # quoted phrases, a or b) and never raises a syntax error
+    query = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), q)
+    rank = _rank(query)
+    stmt = (
+        select(Item.name, Item.description, Item.id, Item.owner_id, rank.label("rank"))
+        .where(Item.owner_id == owner_id, Item.search_vector.op("@@")(query))
+        .order_by(rank.desc(), Item.id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        # Keyset over (rank DESC, id ASC)
+        after_rank, after_id = after
+        stmt = stmt.where(or_(rank < after_rank, and_(rank == after_rank, Item.id > after_id)))
+    return stmt
+
+
+def build_search_page(rows: Sequence[Any], owner_id: int, q: str, limit: int) -> ItemPage:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(owner_id, q, rows[-1].rank, rows[-1].id)
+    return ItemPage(items=[ItemRead.model_validate(row) for row in rows], limit=limit, next_cursor=next_cursor)
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def autocomplete_stmt(owner_id: int, prefix: str, limit: int) -> Select:
+    return (
+        select(Item.id, Item.name)
+        .where(Item.owner_id == owner_id, Item.name.ilike(_escape_like(prefix) + "%", escape="\\"))
+        .order_by(Item.name, Item.id)
+        .limit(limit)
+    )
+
+
+def suggestions(rows: Sequence[Any]) -> List[ItemSuggestion]:
+    return [ItemSuggestion(id=row.id, name=row.name) for row in rows]
+
+
+# --- Single-item reads and writes ---
+# Every statement is scoped to owner_id and writes use RETURNING, so each
+# endpoint is one round-trip: no db.get() before an update and no refresh
+# SELECT after the commit. No row back means "not found or not yours".
+
+# version is returned alongside the ItemRead fields so handlers can set ETags
+_ITEM_COLUMNS = (Item.id, Item.name, Item.description, Item.owner_id, Item.version)
+
+
+# Prebuilt; execute with item_params()
+_OWNER_ITEM = (Item.id == bindparam("item_id"), Item.owner_id == bindparam("owner_id"))
+OWNER_ITEM = select(*_ITEM_COLUMNS).where(*_OWNER_ITEM)
+# Enough to evaluate If-None-Match / If-Match without loading the row
+ITEM_VERSION = select(Item.version).where(*_OWNER_ITEM)
+
+
+def item_params(owner_id: int, item_id: int) -> Dict[str, int]:
+    return {"owner_id": owner_id, "item_id": item_id}
+
+
+def insert_stmt(owner_id: int, payload: ItemCreate) -> Insert:
+    return insert(Item).values(**payload.model_dump(), owner_id=owner_id).returning(*_ITEM_COLUMNS)
+
+
+def update_stmt(
+    owner_id: int, item_id: int, payload: ItemUpdate, versions: Optional[Set[int]] = None
+) -> Union[ReturningUpdate[Any], Select[Any]]:
+    # versions, from If-Match, restricts the write to those item versions
+    changes = payload.model_dump(exclude_unset=True)
+    stmt: Union[ReturningUpdate[Any], Select[Any]]
+    if not changes:
+        # Nothing to SET; an empty update still answers with the current row
+        stmt = select(*_ITEM_COLUMNS).where(Item.id == item_id, Item.owner_id == owner_id)
+    else:
+        stmt = (
+            update(Item)
+            .where(Item.id == item_id, Item.owner_id == owner_id)
+            .values(**changes, version=Item.version + 1)
+            .returning(*_ITEM_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+    if versions is not None:
+        stmt = stmt.where(Item.version.in_(versions))
+    return stmt
+
+
+def delete_stmt(owner_id: int, item_id: int, versions: Optional[Set[int]] = None) -> ReturningDelete[Tuple[int]]:
+    stmt = (
+        delete(Item)
+        .where(Item.id == item_id, Item.owner_id == owner_id)
+        .returning(Item.id)
+        .execution_options(synchronize_session=False)
+    )
+    if versions is not None:
+        stmt = stmt.where(Item.version.in_(versions))
+    return stmt
+
+
+# --- Bulk writes ---
+# Each bulk endpoint is a single statement with RETURNING, so a batch costs
+# one round-trip instead of one INSERT/UPDATE/DELETE per item.
+
+
+def bulk_insert_stmt(batch_size: int) -> Insert:
+    # Executed with a list of parameter dicts; sort_by_parameter_order
+    # guarantees RETURNING rows line up with the input order, and a page size
+    # covering the whole batch keeps it to one INSERT ... VALUES statement.
+    return (
+        insert(Item)
+        .returning(*_ITEM_COLUMNS, sort_by_parameter_order=True)
+        .execution_options(insertmanyvalues_page_size=batch_size)
+    )
+
+
+def bulk_insert_params(owner_id: int, payloads: Sequence[ItemCreate]) -> List[Dict[str, Any]]:
+    return [{**payload.model_dump(), "owner_id": owner_id} for payload in payloads]
+
+
+def bulk_update_stmt(owner_id: int, updates: Sequence[ItemBulkUpdate]) -> Update:
+    # UPDATE items ... FROM (VALUES ...) AS v, scoped to owner_id.
+    # The *_set flags keep partial-update semantics: a field is only written
+    # when the client sent it, so an explicit null still clears it.
+    rows = []
+    for entry in updates:
+        fields = entry.model_dump(exclude_unset=True)
+        rows.append(
+            (
+                entry.id,
+                "name" in fields,
+                fields.get("name"),
+                "description" in fields,
+                fields.get("description"),
+            )
+        )
+    changes = values(
+        column("id", Integer),
+        column("name_set", Boolean),
+        column("name", Text),
+        column("description_set", Boolean),
+        column("description", Text),
+        name="changes",
+    ).data(rows)
+    return (
+        update(Item)
+        .where(Item.id == changes.c.id, Item.owner_id == owner_id)
+        .values(
+            name=case((changes.c.name_set, changes.c.name), else_=Item.name),
+            description=case((changes.c.description_set, changes.c.description), else_=Item.description),
+            version=Item.version + 1,
+        )
+        .returning(*_ITEM_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bulk_delete_stmt(owner_id: int, item_ids: Sequence[int]) -> ReturningDelete[Tuple[int]]:
+    # One array parameter (= ANY(:ids)) instead of an IN list per id
+    return (
+        delete(Item)
+        .where(Item.owner_id == owner_id, Item.id == any_(bindparam("ids", list(item_ids), type_=ARRAY(Integer))))
+        .returning(Item.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def created_results(rows: Iterable[Any]) -> List[ItemBulkResult]:
+    return [ItemBulkResult(id=row.id, status="created", item=ItemRead.model_validate(row)) for row in rows]
+
+
+def updated_results(updates: Sequence[ItemBulkUpdate], rows: Iterable[Any]) -> List[ItemBulkResult]:
+    returned = {row.id: row for row in rows}
+    return [
+        ItemBulkResult(id=entry.id, status="updated", item=ItemRead.model_validate(returned[entry.id]))
+        if entry.id in returned
+        else ItemBulkResult(id=entry.id, status="not_found")
+        for entry in updates
+    ]
+
+
+def deleted_results(item_ids: Sequence[int], deleted_ids: Iterable[int]) -> List[ItemBulkResult]:
+    deleted = set(deleted_ids)
+    return [
+        ItemBulkResult(id=item_id, status="deleted" if item_id in deleted else "not_found")
+        for item_id in item_ids
+    ]
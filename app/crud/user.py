@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import DateTime, Insert, Integer, Update, bindparam, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.user import User
+
+# Statements run on nearly every request are built once, with named bind
+# parameters, and executed with their values:
+#     db.execute(crud_user.AUTH_STATE, {"user_id": user_id})
+# Building a select() per call also meant recomputing its SQL compilation
+# cache key, which cost more client CPU than the round-trip itself (see
+# benchmarks/statements.py). The SQL text never changes either, so psycopg
+# prepares these server-side once they hit DB_PREPARE_THRESHOLD.
+
+BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+# Only the columns get_current_user checks, not the whole row
+AUTH_STATE = select(User.is_active, User.token_version).where(User.id == bindparam("user_id"))
+
+# Collection version behind the GET /items ETag
+ITEMS_VERSION = select(User.items_version).where(User.id == bindparam("user_id"))
+
+
+# Rehash at login (see verify_and_update in app/core/security.py). Matching the
+# old hash keeps a password changed in the meantime from being overwritten.
+REHASH = (
+    update(User)
+    .where(User.id == bindparam("user_id"), User.hashed_password == bindparam("old_hash"))
+    .values(hashed_password=bindparam("new_hash"))
+    .execution_options(synchronize_session=False)
+)
+
+
+def register_stmt(email: str, hashed_password: str) -> Insert:
+    # One INSERT ... RETURNING instead of INSERT + refresh SELECT. ON CONFLICT
+    # covers a concurrent registration racing past the email check: no row
+    # comes back and the caller answers as for a duplicate email.
+    return (
+        insert(User)
+        .values(email=email, hashed_password=hashed_password)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.id, User.email, User.is_active)
+    )
+
+
+def last_login_stmt(logins: Dict[int, datetime]) -> Update:
+    # One UPDATE users ... FROM (VALUES ...) for a write-behind batch of logins.
+    # GREATEST (which skips NULLs) keeps a batch that lost a race with a newer
+    # one from moving last_login backwards.
+    seen = values(column("id", Integer), column("last_login", DateTime(timezone=True)), name="logins").data(
+        list(logins.items())
+    )
+    return (
+        update(User)
+        .where(User.id == seen.c.id)
+        .values(last_login=func.greatest(User.last_login, seen.c.last_login))
+        .execution_options(synchronize_session=False)
+    )
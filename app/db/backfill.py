@@ -0,0 +1,107 @@
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Batched, resumable data migrations.
+# A single UPDATE over a large table holds its row locks, and bloats WAL,
+# until it commits, and an interrupted run starts over. run_batched walks the
+# table by primary key range instead: each batch is one statement that also
+# records how far it got, committed together, so a killed migration picks up
+# at the next batch when it runs again and never holds locks longer than one
+# batch. Call it from a migration inside
+# op.get_context().autocommit_block(), so every batch commits on its own:
+#
+#     with op.get_context().autocommit_block():
+#         run_batched(
+#             op.get_bind(), "0008_backfill_slugs", "items",
+#             "UPDATE items SET slug = lower(name) WHERE id > :lo AND id <= :hi",
+#         )
+#
+# No migration in the series needs it yet. The one large backfill so far,
+# items.search_vector (0005), is a stored generated column: Postgres computes
+# it for every row while adding the column, and an UPDATE cannot set it, so
+# there is nothing to batch. A plain column filled from existing data is
+# what this is for.
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TABLE = "migration_checkpoints"
+
+_CREATE_SQL = text(f"""
+    CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+        name text PRIMARY KEY,
+        position bigint NOT NULL,
+        finished boolean NOT NULL DEFAULT false,
+        updated_at timestamptz NOT NULL DEFAULT now()
+    )
+""")
+
+_CHECKPOINT_SQL = f"""
+    INSERT INTO {CHECKPOINT_TABLE} (name, position) VALUES (:name, :hi)
+    ON CONFLICT (name) DO UPDATE SET position = excluded.position, updated_at = now()
+"""
+
+
+def run_batched(
+    conn: Connection,
+    name: str,
+    table: str,
+    statement: str,
+    batch_size: int = 10000,
+    key: str = "id",
+    pause: float = 0.0,
+    max_batches: Optional[int] = None,
+) -> int:
+    """
+    Run an INSERT/UPDATE/DELETE statement over ``table`` in ranges of
+    ``batch_size`` keys, where ``:lo`` and ``:hi`` bind the exclusive lower and
+    inclusive upper bound of each range. Progress is checkpointed under
+    ``name``; rows added after the run started are not visited. ``pause``
+    sleeps between batches to leave room for regular traffic, and
+    ``max_batches`` stops early. Returns the number of batches run.
+    """
+    # get_isolation_level() asks the server, which never reports AUTOCOMMIT
+    driver_connection = conn.connection.driver_connection
+    if driver_connection is None or not driver_connection.autocommit:
+        raise RuntimeError("run_batched needs an autocommit connection (op.get_context().autocommit_block())")
+    conn.execute(_CREATE_SQL)
+    row = conn.execute(
+        text(f"SELECT position, finished FROM {CHECKPOINT_TABLE} WHERE name = :name"), {"name": name}
+    ).first()
+    if row is not None and row.finished:
+        return 0
+
+    quote = conn.dialect.identifier_preparer.quote
+    lo, last = conn.execute(text(f"SELECT min({quote(key)}) - 1, max({quote(key)}) FROM {quote(table)}")).one()
+    if row is not None:
+        lo = row.position
+    batch = text(f"WITH batch AS ({statement}) {_CHECKPOINT_SQL}")
+    batches = 0
+    while last is not None and lo < last:
+        if max_batches is not None and batches >= max_batches:
+            return batches
+        hi = min(lo + batch_size, last)
+        started = time.perf_counter()
+        conn.execute(batch, {"name": name, "lo": lo, "hi": hi})
+        batches += 1
+        logger.info("%s: %s %s..%s done in %.2fs", name, key, lo, hi, time.perf_counter() - started)
+        lo = hi
+        if pause:
+            time.sleep(pause)
+    conn.execute(
+        text(f"""
+            INSERT INTO {CHECKPOINT_TABLE} (name, position, finished) VALUES (:name, :position, true)
+            ON CONFLICT (name) DO UPDATE SET finished = true, updated_at = now()
+        """),
+        {"name": name, "position": lo or 0},
+    )
+    return batches
+
+
+def forget_checkpoint(conn: Connection, name: str) -> None:
+    """Drop a backfill's checkpoint, e.g. in the migration's downgrade, so it runs again."""
+    conn.execute(_CREATE_SQL)
+    conn.execute(text(f"DELETE FROM {CHECKPOINT_TABLE} WHERE name = :name"), {"name": name})
@@ -3,4 +3,6 @@ from app.db.base_class import Base
 
 # Import all the models, so that Base has them registered and Alembic can see them.
 from app.models.user import User  # noqa
-from app.models.item import Item  # noqa
\ No newline at end of file
+from app.models.item import Item  # noqa
+from app.models.rate_limit import RateLimitBucket  # noqa
+from app.models.audit import AuditEvent  # noqa
@@ -0,0 +1,120 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, PoolProxiedConnection, QueuePool
+
+# Connection pool instrumentation.
+# The pool classes below time every checkout (queue wait plus, for overflow
+# connections, connect time) into a histogram, which is what tells us whether
+# requests are starving on the pool rather than on Postgres itself.
+
+# Upper bounds, in seconds, of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolStats:
+    """Cumulative checkout wait histogram for one engine's pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.bucket_counts: List[int] = [0] * len(WAIT_BUCKETS)
+        self.count = 0
+        self.total_wait = 0.0
+        self.timeouts = 0
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_wait += seconds
+            if timed_out:
+                self.timeouts += 1
+            for index, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.bucket_counts[index] += 1
+                    break
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            # Prometheus-style cumulative buckets, "+Inf" equals the total count
+            cumulative: Dict[str, int] = {}
+            running = 0
+            for bound, bucket_count in zip(WAIT_BUCKETS, self.bucket_counts):
+                running += bucket_count
+                cumulative[str(bound)] = running
+            cumulative["+Inf"] = self.count
+            return {
+                "count": self.count,
+                "sum_seconds": self.total_wait,
+                "timeouts": self.timeouts,
+                "buckets": cumulative,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    # Each pool (the primary's, every replica's) has its own stats, handed
+    # on by recreate() so they survive engine.dispose()
+
+    def __init__(self, *args: Any, stats: Optional[PoolStats] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = stats if stats is not None else PoolStats()
+
+    def recreate(self) -> QueuePool:
+        pool = super().recreate()
+        if isinstance(pool, InstrumentedQueuePool):
+            pool.stats = self.stats
+        return pool
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.stats.observe(time.perf_counter() - started, timed_out)
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+def install_idle_pre_ping(engine: Engine, idle_seconds: float) -> None:
+    """
+    Ping connections on checkout only if they sat idle in the pool longer than idle_seconds.
+    Busy connections skip the extra round-trip that pool_pre_ping=True pays on every checkout.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _record_checkin(dbapi_connection: Any, connection_record: Any) -> None:
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as ping_error:
+            # The pool discards this connection and retries with a fresh one
+            raise exc.DisconnectionError() from ping_error
+
+
+def pool_status(pool: Pool) -> Dict[str, Any]:
+    status: Dict[str, Any] = {}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    stats = getattr(pool, "stats", None)
+    if isinstance(stats, PoolStats):
+        status["checkout_wait"] = stats.snapshot()
+    return status
@@ -0,0 +1,222 @@
+import itertools
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from app.core.cache import TTLCache
+
+# Read-replica routing.
+# GET /items traffic outnumbers writes by far, so read-only handlers take a
+# ReadSession (see get_read_db in app/db/session.py) whose statements go to one
+# of the DATABASE_REPLICA_URLS, while every other session stays on the primary.
+# Read-your-writes: when a session tagged with a user id commits on the
+# primary, that user's reads stay on the primary for
+# DATABASE_REPLICA_STICKY_SECONDS, which should exceed the replication lag.
+# The window is tracked per worker, so it covers the requests this worker
+# serves; with several gunicorn workers a read landing on another worker
+# right after a write can still see the replica's slightly older state.
+# Replicas failing a connection, or lagging more than
+# DATABASE_REPLICA_MAX_LAG_SECONDS, are ejected until a health check passes;
+# with none left, reads fall back to the primary.
+# Authentication state (is_active, token_version) is never read from a
+# replica: see get_current_user in app/api/items.py.
+
+logger = logging.getLogger(__name__)
+
+# Seconds a replica gets to accept a connection before it counts as down
+CONNECT_TIMEOUT = 3
+
+# Zero when the replica has replayed everything it received, so an idle
+# primary (no new transactions to replay) does not look like lag
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class Replica:
+    def __init__(self, url: str, engine: Engine, async_engine: AsyncEngine) -> None:
+        self.url = url
+        self.engine = engine
+        self.async_engine = async_engine
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.ejected_reason: Optional[str] = None
+
+    def bind(self, use_async: bool) -> Engine:
+        # An AsyncSession's sync session needs the sync face of the async engine
+        return self.async_engine.sync_engine if use_async else self.engine
+
+    def checked_out(self, use_async: bool) -> int:
+        # Only a QueuePool counts checkouts; any other pool ranks as idle
+        pool = self.bind(use_async).pool
+        return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+    def status(self) -> Dict[str, Any]:
+        # Served by the unauthenticated /health/pool, so no url
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "ejected_reason": self.ejected_reason,
+            "checked_out": self.checked_out(False) + self.checked_out(True),
+        }
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        replicas: List[Replica],
+        strategy: str = "round_robin",
+        sticky_seconds: float = 5.0,
+        max_lag_seconds: float = 10.0,
+        check_interval: float = 5.0,
+    ) -> None:
+        self.replicas = replicas
+        self.strategy = strategy
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        # user id -> True while that user's reads must stay on the primary
+        self.recent_writers: TTLCache[int, bool] = TTLCache(maxsize=100000, ttl=sticky_seconds)
+        self.sticky_seconds = sticky_seconds
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        for replica in replicas:
+            self._watch_errors(replica)
+
+    # --- Routing ---
+
+    def pick(self, use_async: bool = False) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        start = next(self._counter) % len(healthy)
+        if self.strategy == "round_robin":
+            return healthy[start]
+        # Least connections; rotating the start spreads ties evenly
+        rotated = healthy[start:] + healthy[:start]
+        return min(rotated, key=lambda replica: replica.checked_out(use_async))
+
+    def note_write(self, user_id: int) -> None:
+        if self.sticky_seconds > 0:
+            self.recent_writers.set(user_id, True)
+
+    def recently_wrote(self, user_id: int) -> bool:
+        return self.recent_writers.get(user_id) is not None
+
+    # --- Health ---
+
+    def eject(self, replica: Replica, reason: str) -> None:
+        with self._lock:
+            if replica.healthy:
+                logger.warning("Ejecting read replica %s: %s", replica.url, reason)
+            replica.healthy = False
+            replica.ejected_reason = reason
+
+    def _readmit(self, replica: Replica) -> None:
+        with self._lock:
+            if not replica.healthy:
+                logger.info("Read replica %s is healthy again", replica.url)
+            replica.healthy = True
+            replica.ejected_reason = None
+
+    def check(self) -> None:
+        """Probe every replica once: eject the unreachable or lagging ones, readmit the others."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    replica.lag = float(conn.execute(LAG_SQL).scalar_one())
+            except Exception as exc:
+                replica.lag = None
+                self.eject(replica, f"health check failed: {exc.__class__.__name__}")
+                continue
+            if replica.lag > self.max_lag_seconds:
+                self.eject(replica, f"replication lag {replica.lag:.1f}s")
+            else:
+                self._readmit(replica)
+
+    def _watch_errors(self, replica: Replica) -> None:
+        # Requests notice a dead replica before the next health check does
+        def _on_error(context: Any) -> None:
+            if context.connection is None or context.is_disconnect:
+                self.eject(replica, f"connection error: {context.original_exception.__class__.__name__}")
+
+        event.listen(replica.engine, "handle_error", _on_error)
+        event.listen(replica.async_engine.sync_engine, "handle_error", _on_error)
+
+    def start(self) -> None:
+        # Started from the app lifespan, so each gunicorn worker runs its own
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.check_interval)
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+    async def dispose_async(self) -> None:
+        for replica in self.replicas:
+            await replica.async_engine.dispose()
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [replica.status() for replica in self.replicas]
+
+
+class ReadSession(Session):
+    """
+    Session for read-only handlers. Its bind is the primary (or whatever the
+    request's primary session is bound to); statements go to a replica picked
+    on first use instead, unless the session's user wrote recently or every
+    replica is ejected.
+    """
+
+    def __init__(self, *args: Any, router: ReplicaRouter, use_async: bool = False, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.router = router
+        self.use_async = use_async
+        self._read_bind: Optional[Any] = None
+
+    def get_bind(self, mapper: Optional[Any] = None, **kwargs: Any) -> Any:
+        if self._read_bind is None:
+            # Chosen once, so every statement of the request sees one server
+            user_id = self.info.get("user_id")
+            replica = None
+            if user_id is None or not self.router.recently_wrote(user_id):
+                replica = self.router.pick(self.use_async)
+            self._read_bind = replica.bind(self.use_async) if replica else super().get_bind(mapper, **kwargs)
+        return self._read_bind
+
+
+def install_read_your_writes(router: ReplicaRouter) -> Callable[[Session], None]:
+    """
+    Make a user's reads sticky to the primary after any commit of a session
+    tagged with their id. Returns the Session event listener it installed.
+    """
+
+    @event.listens_for(Session, "after_commit")
+    def _note_write(session: Session) -> None:
+        user_id = session.info.get("user_id")
+        if user_id is not None and not isinstance(session, ReadSession):
+            router.note_write(user_id)
+
+    return _note_write
@@ -1,15 +1,187 @@
+import threading
+from typing import Any, Optional
+from fastapi import Depends
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.metrics import install_query_metrics
+from app.core.profiling import install_sql_capture, profiling_configured
+from app.db.pool import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, install_idle_pre_ping
+from app.db.replicas import CONNECT_TIMEOUT, ReadSession, Replica, ReplicaRouter, install_read_your_writes
 
-# Create engine and session factory
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Pool tuning shared by the sync and async engines (see DB_POOL_* settings).
+# Size the pool per worker: gunicorn workers x (pool_size + max_overflow)
+# must stay below Postgres' max_connections.
+pool_options = dict(
+    pool_pre_ping=settings.db_pool_pre_ping == "always",
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+)
+# Passed to psycopg's connect(); see DB_PREPARE_THRESHOLD
+connect_args = {"prepare_threshold": settings.db_prepare_threshold}
+
+# Engines are created on first use, not at import: building one loads the
+# psycopg driver, and under gunicorn --preload the app is imported by the
+# master before it forks, where no pool should exist yet. The session
+# factories are bound when their engine is created.
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+# Read replicas (see app/db/replicas.py), built with the same care; see
+# get_replica_router
+_replica_router: Optional[ReplicaRouter] = None
+_engine_lock = threading.Lock()
+SessionFactory = sessionmaker(autocommit=False, autoflush=False)
+# expire_on_commit=False: attribute access after commit would otherwise
+# trigger an implicit (and, under asyncio, forbidden) lazy load.
+AsyncSessionFactory = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def _instrument(sync_engine: Engine) -> None:
+    if settings.db_pool_pre_ping == "idle":
+        install_idle_pre_ping(sync_engine, settings.db_pool_pre_ping_idle_seconds)
+    if settings.metrics_enabled:
+        # Per-statement timing feeding the per-request SQL metrics
+        install_query_metrics(sync_engine)
+    if profiling_configured():
+        # Statements are attached to the profile of the request that ran them
+        install_sql_capture(sync_engine)
+
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(
+                    settings.database_url, poolclass=InstrumentedQueuePool, connect_args=connect_args, **pool_options
+                )
+                _instrument(engine)
+                SessionFactory.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    # Used when DB_ASYNC is enabled. create_async_engine picks psycopg's async
+    # driver for the same postgresql+psycopg:// URL, so no separate setting is
+    # needed. No connection is opened until the first async session is used.
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                async_engine = create_async_engine(
+                    settings.database_url,
+                    poolclass=InstrumentedAsyncAdaptedQueuePool,
+                    connect_args=connect_args,
+                    **pool_options,
+                )
+                _instrument(async_engine.sync_engine)
+                AsyncSessionFactory.configure(bind=async_engine)
+                _async_engine = async_engine
+    return _async_engine
+
+
+async def dispose_engines() -> None:
+    # Only the engines this worker actually created
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+
+
+def __getattr__(name: str) -> Any:
+    # The former module-level names, resolved on first access
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    if name == "SessionLocal":
+        get_engine()
+        return SessionFactory
+    if name == "AsyncSessionLocal":
+        get_async_engine()
+        return AsyncSessionFactory
+    if name == "replica_router":
+        return get_replica_router()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _replica(url: str) -> Replica:
+    # Same pool sizing as the primary, per replica; a replica that does not
+    # answer within CONNECT_TIMEOUT fails fast and gets ejected
+    options = dict(pool_options, connect_args=dict(connect_args, connect_timeout=CONNECT_TIMEOUT))
+    replica = Replica(
+        make_url(url).render_as_string(hide_password=True),
+        create_engine(url, poolclass=InstrumentedQueuePool, **options),
+        create_async_engine(url, poolclass=InstrumentedAsyncAdaptedQueuePool, **options),
+    )
+    _instrument(replica.engine)
+    _instrument(replica.async_engine.sync_engine)
+    return replica
+
+
+def get_replica_router() -> Optional[ReplicaRouter]:
+    # None when DATABASE_REPLICA_URLS is empty. Like the primary's engines,
+    # the replicas' are created on first use, in the worker (the lifespan
+    # asks for the router first), never in a --preload master.
+    global _replica_router
+    if _replica_router is None and settings.database_replica_urls:
+        with _engine_lock:
+            if _replica_router is None:
+                router = ReplicaRouter(
+                    [_replica(url) for url in settings.database_replica_urls],
+                    strategy=settings.database_replica_strategy,
+                    sticky_seconds=settings.database_replica_sticky_seconds,
+                    max_lag_seconds=settings.database_replica_max_lag_seconds,
+                    check_interval=settings.database_replica_check_interval,
+                )
+                install_read_your_writes(router)
+                _replica_router = router
+    return _replica_router
 
 # Dependency for FastAPI routes
 def get_db():
-    db = SessionLocal()
+    db = SessionFactory(bind=get_engine())
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Async dependency for the app/api/aio routers
+async def get_async_db():
+    async with AsyncSessionFactory(bind=get_async_engine()) as db:
+        yield db
+
+# Dependencies for read-only handlers. Without replicas they hand out the
+# request's primary session; with replicas, a ReadSession whose fallback is
+# whatever that primary session is bound to. get_current_user tags both
+# sessions with the user id, which drives read-your-writes stickiness.
+def get_read_db(db: Session = Depends(get_db)):
+    replica_router = get_replica_router()
+    if replica_router is None:
+        yield db
+        return
+    read_db = ReadSession(bind=db.get_bind(), autoflush=False, router=replica_router)
+    try:
+        yield read_db
+    finally:
+        read_db.close()
+
+async def get_async_read_db(db: AsyncSession = Depends(get_async_db)):
+    replica_router = get_replica_router()
+    if replica_router is None:
+        yield db
+        return
+    async with AsyncSession(
+        bind=db.bind,
+        autoflush=False,
+        expire_on_commit=False,
+        sync_session_class=ReadSession,
+        router=replica_router,
+        use_async=True,
+    ) as read_db:
+        yield read_db
@@ -1,67 +1,144 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
-from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
-from app.api.auth import router as auth_router
-from app.api.items import router as items_router
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
 from app.core.config import settings 
+from app.core.hashing import shutdown_hashing_executor
+from app.core.metrics import render_metrics
+from app.core.profiling import profiling_configured
+from app.core.security import warm_up as warm_up_security
+from app.core.static import AssetStore, StaticAssets, asset_response
+from app.core.user_cache import UserCacheListener, user_cache
+from app.core.write_behind import write_behind
+from app.db.pool import pool_status
+from app.db.session import dispose_engines, get_async_engine, get_engine, get_replica_router
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.security import SecurityMiddleware
 import os
 
+# DB_ASYNC selects the AsyncSession routers, which keep database waits on the
+# event loop instead of holding a threadpool worker per request.
+if settings.db_async:
+    from app.api.aio.auth import router as auth_router
+    from app.api.aio.items import router as items_router
+else:
+    from app.api.auth import router as auth_router
+    from app.api.items import router as items_router
 
-app = FastAPI(title=settings.project_name, version="1.0.0")
+
+def warm_up() -> None:
+    """
+    Build the state workers can share read-only, for gunicorn --preload (see
+    docker/gunicorn.conf.py): the master calls this after importing the app
+    and before forking. Engines and threads are still created per worker.
+    """
+    import psycopg  # noqa: F401  the driver the engines load on first use
+
+    warm_up_security()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One listener per worker keeps this worker's user cache in sync
+    listener = None
+    if settings.user_cache_notify_channel:
+        listener = UserCacheListener(settings.database_url, settings.user_cache_notify_channel)
+        listener.start()
+    # Replica health checks, also one thread per worker
+    replica_router = get_replica_router()
+    if replica_router is not None:
+        replica_router.start()
+    # Audit events and last_login updates, flushed in batches
+    write_behind.start()
+    yield
+    # Drained first, while the engine it writes through is still open
+    # Off the event loop, which would otherwise stall for the whole drain
+    await asyncio.to_thread(write_behind.stop)
+    if listener is not None:
+        listener.stop()
+    # Close pooled connections cleanly when the worker shuts down
+    if replica_router is not None:
+        replica_router.stop()
+        await replica_router.dispose_async()
+        replica_router.dispose()
+    await dispose_engines()
+    shutdown_hashing_executor()
+
+
+app = FastAPI(title=settings.project_name, version="1.0.0", lifespan=lifespan)
 
 # PRODUCTION-READY MIDDLEWARE CONFIGURATION
 # This application follows security best practices by being secure by default
 # and loading its configuration from the environment (via the settings module).
 # This avoids hardcoding development settings like ["*"] into the codebase.
 
-# Protect against Host Header attacks
-# Loads the list of allowed hosts directly from settings
-app.add_middleware(
-    TrustedHostMiddleware,
-    allowed_hosts=settings.allowed_hosts
-)
-
-# Configure Cross-Origin Resource Sharing (CORS)
-# Loads the list of allowed origins directly from settings
+# Host header validation, CORS and, optionally, proxy headers with HTTPS
+# redirect, all handled by one pure ASGI middleware (app/middleware/security.py)
+# that reads the request headers once instead of once per concern.
+# Allowed hosts and CORS origins are loaded directly from settings.
+# The proxy handling is disabled by default and can be enabled in production
+# when a proxy (like Nginx or a load balancer) terminates TLS.
+# Env var: ENABLE_HTTPS_REDIRECT=true
+# Trusts X-Forwarded-Proto and X-Forwarded-For from any host ("*"), and
+# redirects to HTTPS based on the scheme the proxy reports
+https_redirect = os.getenv("ENABLE_HTTPS_REDIRECT", "false").lower() == "true"
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[str(origin) for origin in settings.cors_origins],
+    SecurityMiddleware,
+    allowed_hosts=settings.allowed_hosts,
+    # AnyHttpUrl appends "/", which a browser's Origin header never has
+    allow_origins=[str(origin).rstrip("/") for origin in settings.cors_origins],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
     allow_headers=["*"],
+    proxy_trusted_hosts=["*"] if https_redirect else None,
+    https_redirect=https_redirect,
 )
 
-# --- OPTIONAL PRODUCTION MIDDLEWARE ---
-# These are disabled by default but can be enabled in production
-# by setting the corresponding environment variables.
+# Response compression (gzip, or brotli when installed) for JSON, NDJSON
+# and text bodies of COMPRESSION_MINIMUM_SIZE bytes or more. The static
+# assets are precompressed and pass through untouched.
+# Env var: COMPRESSION_ENABLED=false turns it off, e.g. behind a proxy that
+# already compresses
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        content_types=settings.compression_content_types,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
 
-# Enable this if you plan to use a proxy (like Nginx or a load balancer)
-# that handles TLS termination (HTTPS).
-# Env var: ENABLE_HTTPS_REDIRECT=true
-if os.getenv("ENABLE_HTTPS_REDIRECT", "false").lower() == "true":
-    # Trusts X-Forwarded-Proto and X-Forwarded-For from any host ("*")
-    app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
-    app.add_middleware(HTTPSRedirectMiddleware)
+# Opt-in request profiling, only installed when PROFILING_TOKEN or
+# PROFILING_SAMPLE_RATE is set. Sits inside the metrics middleware so
+# profiled requests still show up in the latency histograms.
+if profiling_configured():
+    app.add_middleware(ProfilingMiddleware)
+
+# Request metrics. Added last so it is the outermost middleware and its
+# latency includes the time spent in the ones above.
+# Env var: METRICS_ENABLED=false turns it and /metrics off
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
 
 
 # STATIC FILES SERVING
-# Mounts the 'web' directory to serve static files (HTML, CSS, JS)
+# Loads the 'web' directory (HTML, CSS, JS) into memory, precompressed, and
+# serves it from there (see app/core/static.py).
 # This allows the frontend to be served directly from the same application.
 # Files in the 'web' folder are accessible via the "/static" URL path.
-app.mount("/static", StaticFiles(directory="web"), name="static")
+static_assets = AssetStore(settings.static_dir, url_prefix="/static", reload=settings.static_reload)
+app.mount("/static", StaticAssets(static_assets), name="static")
 
 
 @app.get("/", include_in_schema=False)
-async def root():
+async def root(request: Request):
     """
     Serves the main index.html file as the root of the application.
     This allows users to navigate directly to http://localhost:8000 to see the frontend.
     """
-    return FileResponse('web/index.html')
+    return asset_response(static_assets.get("index.html"), request.method, request.headers)
 
 
 @app.get("/health", tags=["Health"])
@@ -72,6 +149,42 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/health/pool", tags=["Health"])
+def health_pool():
+    """
+    Connection pool usage for this worker: checked-out and overflow connections,
+    plus a histogram of how long requests waited to check a connection out.
+    With read replicas, also each replica's health, lag and connections in use,
+    in DATABASE_REPLICA_URLS order. Hosts are left out: the endpoint has no
+    authentication.
+    """
+    active = get_async_engine().sync_engine if settings.db_async else get_engine()
+    status = {"mode": "async" if settings.db_async else "sync", "pool": pool_status(active.pool)}
+    replica_router = get_replica_router()
+    if replica_router is not None:
+        status["replicas"] = replica_router.status()
+    return status
+
+
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """
+        Prometheus text exposition of request, SQL and Argon2 metrics,
+        aggregated across workers when PROMETHEUS_MULTIPROC_DIR is set.
+        """
+        body, content_type = render_metrics()
+        return Response(content=body, media_type=content_type)
+
+
+@app.get("/health/cache", tags=["Health"])
+def health_cache():
+    """
+    Hit/miss counters of this worker's authenticated-user cache.
+    """
+    return {"user_cache": user_cache.stats()}
+
+
 # --- API ROUTERS ---
 # Include the API endpoints for authentication and items.
 # These are the core business logic of the application.
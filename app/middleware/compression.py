@@ -0,0 +1,230 @@
+import re
+import zlib
+from typing import Dict, Iterable, Optional, Protocol, Tuple, cast
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.static import ENCODINGS, accepted_encodings, brotli
+
+# Response compression as a plain ASGI middleware.
+# The encoding is negotiated from Accept-Encoding (brotli first when the
+# package is installed, then gzip). The decision to compress waits for the
+# first body chunk: a complete body under minimum_size, a media type outside
+# the allowlist, an existing Content-Encoding (the precompressed static
+# assets), a range, or Cache-Control: no-transform leave the response as it
+# is. Streamed responses (NDJSON item exports) are compressed chunk by chunk
+# and flushed after each, so rows still reach the client as they are produced.
+# A HEAD response gets the same decision as the GET would: when it comes
+# without a body, the size is taken from its Content-Length, and if it is
+# compressed the Content-Length is dropped, the compressed size being unknown.
+#
+# ETags: each content coding is a different representation and gets its own
+# strong validator, "<etag>-gzip" or "<etag>-br", as the static assets do.
+# Clients send those back, so before the request reaches the app the
+# If-None-Match and If-Match headers also carry the tags without the
+# suffix. The handlers then compare against their own validators as usual,
+# and a 304 is sent with the ETag the client holds.
+
+_CODED_TAG = re.compile(r'^(W/)?"(.*)-(' + "|".join(ENCODINGS) + r')"$')
+_CONDITIONAL = (b"if-none-match", b"if-match")
+
+
+class _Encoder(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        # wbits 31: gzip container rather than a raw zlib stream
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int) -> None:
+        self._c = brotli.Compressor(quality=quality)
+
+    # The brotli package ships without type hints
+    def compress(self, data: bytes) -> bytes:
+        return cast(bytes, self._c.process(data))
+
+    def flush(self) -> bytes:
+        return cast(bytes, self._c.flush())
+
+    def finish(self) -> bytes:
+        return cast(bytes, self._c.finish())
+
+
+def coded_etag(etag: str, encoding: str) -> str:
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def uncoded_tags(header: str) -> Dict[str, str]:
+    """Map each content-coded tag of a conditional header, minus its suffix, to the tag itself."""
+    tags = {}
+    for tag in header.split(","):
+        match = _CODED_TAG.match(tag.strip())
+        if match:
+            tags[f'{match.group(1) or ""}"{match.group(2)}"'] = tag.strip()
+    return tags
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        content_types: Iterable[str] = ("application/json",),
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = frozenset(content_type.lower() for content_type in content_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        if not accept_encoding:
+            return None
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding in accepted and (encoding != "br" or brotli is not None):
+                return encoding
+        return None
+
+    def encoder(self, encoding: str) -> _Encoder:
+        return _Brotli(self.brotli_quality) if encoding == "br" else _Gzip(self.gzip_level)
+
+    def compressible(self, status: int, headers: MutableHeaders) -> bool:
+        if status < 200 or status in (204, 206, 304):
+            return False
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return False
+        media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+        return media_type in self.content_types
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = self.negotiate(request_headers.get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        scope, held_tags = _with_uncoded_conditionals(scope)
+        responder = _Responder(self, encoding, held_tags, send, head=scope["method"] == "HEAD")
+        await self.app(scope, receive, responder.send)
+
+
+def _with_uncoded_conditionals(scope: Scope) -> Tuple[Scope, Dict[str, str]]:
+    held: Dict[str, str] = {}
+    headers = []
+    for name, value in scope["headers"]:
+        if name in _CONDITIONAL:
+            tags = uncoded_tags(value.decode("latin-1"))
+            if tags:
+                held.update(tags)
+                value += (", " + ", ".join(tags)).encode("latin-1")
+        headers.append((name, value))
+    if not held:
+        return scope, held
+    return dict(scope, headers=headers), held
+
+
+class _Responder:
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        encoding: str,
+        held_tags: Dict[str, str],
+        send: Send,
+        head: bool = False,
+    ) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        # Uncoded tag -> the coded tag the client sent
+        self.held_tags = held_tags
+        self.head = head
+        self._send = send
+        self._start: Optional[Message] = None
+        self._encoder: Optional[_Encoder] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows how much is coming
+            self._start = message
+            return
+        if self._start is not None:
+            start, self._start = self._start, None
+            if message["type"] == "http.response.body":
+                await self._begin(start, message)
+                return
+            await self._send(start)
+        if self._encoder is None or message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        more_body = message.get("more_body", False)
+        body = self._encoder.compress(message.get("body", b""))
+        body += self._encoder.flush() if more_body else self._encoder.finish()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def _begin(self, start: Message, message: Message) -> None:
+        headers = MutableHeaders(raw=list(start["headers"]))
+        etag = headers.get("etag")
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        size: Optional[int] = None if more_body else len(body)
+        # A HEAD response without its body: go by the length a GET would send
+        headers_only = self.head and not body and not more_body
+        if headers_only:
+            length = headers.get("content-length")
+            size = int(length) if length is not None and length.isdigit() else None
+
+        if not self.middleware.compressible(start["status"], headers) or (
+            size is not None and size < self.middleware.minimum_size
+        ):
+            if start["status"] == 304 and etag in self.held_tags:
+                # Revalidated through the uncoded tag: confirm the one the client has
+                headers["etag"] = self.held_tags[etag]
+            await self._send({**start, "headers": headers.raw})
+            await self._send(message)
+            return
+
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if etag:
+            headers["etag"] = coded_etag(etag, self.encoding)
+        if headers_only:
+            del headers["content-length"]
+            await self._send({**start, "headers": headers.raw})
+            await self._send(message)
+            return
+        self._encoder = self.middleware.encoder(self.encoding)
+        body = self._encoder.compress(body)
+        if more_body:
+            del headers["content-length"]
+            body += self._encoder.flush()
+        else:
+            body += self._encoder.finish()
+            headers["content-length"] = str(len(body))
+        await self._send({**start, "headers": headers.raw})
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
@@ -0,0 +1,54 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import REQUESTS_IN_PROGRESS, end_request, observe_request, start_request
+
+# Request metrics as a plain ASGI middleware.
+# BaseHTTPMiddleware would wrap every response in an extra task and memory
+# stream; this one only intercepts send() to learn the status code, and its
+# timer stops when the last body chunk has been sent, so streamed responses
+# are measured in full.
+
+
+def route_label(scope: Scope, root_path: str) -> str:
+    # The route template ("/items/{item_id}"), never the raw path, keeps label
+    # cardinality bounded. The router stores the matched route in the scope.
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounted apps (StaticFiles) extend root_path instead
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        return mounted[len(root_path):] + "/{path}"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        timings, token = start_request()
+        REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_PROGRESS.dec()
+            end_request(token)
+            observe_request(scope["method"], route_label(scope, root_path), status_code, elapsed, timings)
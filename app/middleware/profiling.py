@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import hmac
+import inspect
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, Callable
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.profiling import RequestProfile, activate, current_profile, deactivate
+from app.middleware.metrics import route_label
+
+# Opt-in request profiling (see app/core/profiling.py).
+# A request is profiled when it carries "X-Profile: <PROFILING_TOKEN>" or is
+# picked by PROFILING_SAMPLE_RATE. The response then gets an X-Profile-Id
+# header naming the files written to PROFILING_DIR. main.py only adds this
+# middleware when one of the two settings is set.
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+
+def _requested(scope: Scope) -> bool:
+    token = settings.profiling_token
+    if token:
+        supplied = Headers(scope=scope).get(PROFILE_HEADER)
+        if supplied is not None and hmac.compare_digest(supplied.encode(), token.encode()):
+            return True
+    rate = settings.profiling_sample_rate
+    return rate > 0 and random.random() < rate
+
+
+def _slug(route: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profile = RequestProfile(settings.profiling_interval_ms / 1000)
+        profile.attach(threading.get_ident(), "event-loop")
+        token = activate(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.stop()
+            deactivate(token)
+            route = route_label(scope, root_path)
+            meta = {
+                "id": profile_id,
+                "method": scope["method"],
+                "route": route,
+                "path": scope["path"],
+                "status": status_code,
+            }
+            name = f"{profile_id}-{scope['method']}-{_slug(route)}"
+            try:
+                # File writes stay off the event loop
+                await asyncio.to_thread(profile.dump, settings.profiling_dir, name, meta)
+            except OSError:
+                logger.exception("Could not write request profile %s", name)
+
+
+def _attach_worker_thread(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # Sync endpoints run in Starlette's threadpool, on a thread the profile
+    # does not know about. The context (and so the profile) is copied into
+    # that thread, which registers itself for the duration of the call.
+    @functools.wraps(endpoint)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        profile = current_profile()
+        if profile is None:
+            return endpoint(*args, **kwargs)
+        ident = threading.get_ident()
+        profile.attach(ident, "threadpool")
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profile.detach(ident)
+
+    wrapper._profiled = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose sync endpoints are sampled when their request is profiled."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        # include_router() copies routes with their already wrapped endpoint
+        if not inspect.iscoroutinefunction(endpoint) and not getattr(endpoint, "_profiled", False):
+            endpoint = _attach_worker_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
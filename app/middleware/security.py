@@ -0,0 +1,270 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Host validation, CORS, proxy headers and HTTPS redirect as one ASGI middleware.
+# It replaces Starlette's TrustedHostMiddleware and CORSMiddleware and
+# uvicorn's ProxyHeadersMiddleware / HTTPSRedirectMiddleware, which each
+# rebuilt a Headers object from the scope on every request. Here the request
+# headers are scanned once, every allow-list is turned into a set (plus a
+# suffix tuple for "*.example.com" hosts) when the app starts, and the
+# response headers of each distinct preflight are built once and reused.
+#
+# Order of the checks, from the outside in:
+#   1. proxy headers (X-Forwarded-Proto / X-Forwarded-For) from trusted peers
+#   2. HTTPS redirect, judged on the scheme the proxy reported
+#   3. Host header against ALLOWED_HOSTS
+#   4. CORS preflight answered here; other requests get CORS response headers
+
+SAFELISTED_HEADERS = {"accept", "accept-language", "content-language", "content-type"}
+# Distinct preflights (origin, method, requested headers) kept with their
+# prebuilt responses. Browsers send a handful of combinations per origin.
+PREFLIGHT_CACHE_SIZE = 256
+
+_WANTED = {
+    b"host",
+    b"origin",
+    b"access-control-request-method",
+    b"access-control-request-headers",
+    b"x-forwarded-proto",
+    b"x-forwarded-for",
+}
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+
+def _header_list(headers: Dict[str, str]) -> RawHeaders:
+    return [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+
+
+def _plain_response(status: int, body: bytes, headers: RawHeaders) -> Tuple[Message, Message]:
+    start = {
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    }
+    return start, {"type": "http.response.body", "body": body}
+
+
+class SecurityMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        allowed_hosts: Sequence[str] = ("*",),
+        allow_origins: Sequence[str] = (),
+        allow_methods: Sequence[str] = ("GET",),
+        allow_headers: Sequence[str] = (),
+        allow_credentials: bool = False,
+        max_age: int = 600,
+        proxy_trusted_hosts: Optional[Iterable[str]] = None,
+        https_redirect: bool = False,
+    ) -> None:
+        self.app = app
+
+        # Hosts: exact names in a set, "*.example.com" as ".example.com" suffixes
+        for pattern in allowed_hosts:
+            if "*" in pattern[1:] or (pattern.startswith("*") and pattern != "*" and not pattern.startswith("*.")):
+                raise ValueError("Domain wildcard patterns must be like '*.example.com'.")
+        self.allow_any_host = "*" in allowed_hosts
+        self.exact_hosts = frozenset(p.lower() for p in allowed_hosts if not p.startswith("*"))
+        self.host_suffixes = tuple(p[1:].lower() for p in allowed_hosts if p.startswith("*."))
+
+        # CORS
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_origins = frozenset(allow_origins)
+        self.allow_methods = frozenset(allow_methods)
+        self.allow_all_headers = "*" in allow_headers
+        self.allow_headers = SAFELISTED_HEADERS | {h.lower() for h in allow_headers}
+        self.allow_credentials = allow_credentials
+        # Wildcard origin cannot be combined with credentials, so the origin is
+        # then mirrored back like an explicit one
+        self.mirror_origin = not self.allow_all_origins or allow_credentials
+
+        simple = {}
+        if allow_credentials:
+            simple["Access-Control-Allow-Credentials"] = "true"
+        if not self.mirror_origin:
+            simple["Access-Control-Allow-Origin"] = "*"
+        self.simple_headers = _header_list(simple)
+
+        preflight = {
+            "Access-Control-Allow-Methods": ", ".join(allow_methods),
+            "Access-Control-Max-Age": str(max_age),
+        }
+        if not self.allow_all_headers:
+            preflight["Access-Control-Allow-Headers"] = ", ".join(sorted(self.allow_headers))
+        if allow_credentials:
+            preflight["Access-Control-Allow-Credentials"] = "true"
+        if self.mirror_origin:
+            preflight["Vary"] = "Origin"
+        else:
+            preflight["Access-Control-Allow-Origin"] = "*"
+        self.preflight_headers = _header_list(preflight)
+        self._preflights: Dict[Tuple[bytes, bytes, Optional[bytes]], Tuple[Message, Message]] = {}
+
+        # Proxy headers: None disables them, "*" trusts every peer
+        if proxy_trusted_hosts is None:
+            self.proxy_trust_any, self.proxy_trusted = False, None
+        else:
+            trusted = frozenset(proxy_trusted_hosts)
+            self.proxy_trust_any, self.proxy_trusted = "*" in trusted, trusted
+        self.https_redirect = https_redirect
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        # One pass over the raw headers for everything the checks below need
+        found: Dict[bytes, bytes] = {}
+        for name, value in scope["headers"]:
+            if name in _WANTED and name not in found:
+                found[name] = value
+
+        if self.proxy_trusted is not None:
+            self._apply_proxy_headers(scope, found, self.proxy_trusted)
+
+        if self.https_redirect and scope["scheme"] in ("http", "ws"):
+            await self._redirect_to_https(scope, found, send)
+            return
+
+        if not self.allow_any_host:
+            host = found.get(b"host", b"").decode("latin-1").split(":")[0].lower()
+            if host not in self.exact_hosts and not host.endswith(self.host_suffixes):
+                await self._reject_host(scope, host, found, send)
+                return
+
+        origin = found.get(b"origin")
+        if origin is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in found:
+            start, body = self._preflight(origin, found)
+            # Copies: the cached messages must not see header edits made by
+            # the servers or middleware further out
+            await send({**start, "headers": list(start["headers"])})
+            await send(dict(body))
+            return
+
+        if not self._origin_allowed(origin):
+            await self.app(scope, receive, send)
+            return
+
+        extra = list(self.simple_headers)
+        if self.mirror_origin:
+            extra.append((b"access-control-allow-origin", origin))
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [(k, v) for k, v in message.get("headers", []) if k != b"access-control-allow-origin"]
+                if self.mirror_origin:
+                    _add_vary_origin(headers)
+                headers.extend(extra)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _origin_allowed(self, origin: bytes) -> bool:
+        return self.allow_all_origins or origin.decode("latin-1") in self.allow_origins
+
+    def _preflight(self, origin: bytes, found: Dict[bytes, bytes]) -> Tuple[Message, Message]:
+        method = found[b"access-control-request-method"]
+        requested = found.get(b"access-control-request-headers")
+        key = (origin, method, requested)
+        cached = self._preflights.get(key)
+        if cached is not None:
+            return cached
+
+        headers = list(self.preflight_headers)
+        failures = []
+        if self._origin_allowed(origin):
+            if self.mirror_origin:
+                headers.append((b"access-control-allow-origin", origin))
+        else:
+            failures.append("origin")
+        if method.decode("latin-1") not in self.allow_methods:
+            failures.append("method")
+        if self.allow_all_headers and requested is not None:
+            # Allowing every header means mirroring back the requested ones
+            headers.append((b"access-control-allow-headers", requested))
+        elif requested is not None:
+            names = {h.strip() for h in requested.decode("latin-1").lower().split(",")}
+            if not names <= self.allow_headers:
+                failures.append("headers")
+
+        if failures:
+            response = _plain_response(400, ("Disallowed CORS " + ", ".join(failures)).encode(), headers)
+        else:
+            response = _plain_response(200, b"OK", headers)
+        if len(self._preflights) < PREFLIGHT_CACHE_SIZE:
+            self._preflights[key] = response
+        return response
+
+    def _apply_proxy_headers(self, scope: Scope, found: Dict[bytes, bytes], trusted: FrozenSet[str]) -> None:
+        client = scope.get("client")
+        if not self.proxy_trust_any and (client is None or client[0] not in trusted):
+            return
+        proto = found.get(b"x-forwarded-proto")
+        if proto is not None:
+            proto_text = proto.decode("latin-1").strip()
+            if proto_text in ("http", "https", "ws", "wss"):
+                if scope["type"] == "websocket":
+                    proto_text = proto_text.replace("http", "ws")
+                scope["scheme"] = proto_text
+        forwarded_for = found.get(b"x-forwarded-for")
+        if forwarded_for is not None:
+            hosts = [h.strip() for h in forwarded_for.decode("latin-1").split(",")]
+            # Each proxy appends the peer it saw: the client is the last
+            # address that is not one of our own proxies
+            host = hosts[0]
+            if not self.proxy_trust_any:
+                host = next((h for h in reversed(hosts) if h not in trusted), hosts[0])
+            if host:
+                scope["client"] = (host, 0)
+
+    async def _redirect_to_https(self, scope: Scope, found: Dict[bytes, bytes], send: Send) -> None:
+        scheme = "https" if scope["scheme"] == "http" else "wss"
+        netloc = found.get(b"host", b"").decode("latin-1")
+        hostname, _, port = netloc.partition(":")
+        if port in ("80", "443"):
+            netloc = hostname
+        await self._send_redirect(scope, send, f"{scheme}://{netloc}", 307)
+
+    async def _reject_host(self, scope: Scope, host: str, found: Dict[bytes, bytes], send: Send) -> None:
+        # Same courtesy as TrustedHostMiddleware: example.com -> www.example.com
+        # when only the www name is allowed
+        if "www." + host in self.exact_hosts and scope["type"] == "http":
+            netloc = "www." + found[b"host"].decode("latin-1")
+            await self._send_redirect(scope, send, f"{scope['scheme']}://{netloc}", 307)
+            return
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        start, body = _plain_response(400, b"Invalid host header", [])
+        await send(start)
+        await send(body)
+
+    @staticmethod
+    async def _send_redirect(scope: Scope, send: Send, base: str, status: int) -> None:
+        location = base + scope.get("root_path", "") + scope["path"]
+        if scope.get("query_string"):
+            location += "?" + scope["query_string"].decode("latin-1")
+        location = quote(location, safe=":/%#?=@[]!$&'()*+,;")
+        start, body = _plain_response(status, b"", [(b"location", location.encode("latin-1"))])
+        await send(start)
+        await send(body)
+
+
+def _add_vary_origin(headers: RawHeaders) -> None:
+    for index, (name, value) in enumerate(headers):
+        if name == b"vary":
+            headers[index] = (name, value + b", Origin")
+            return
+    headers.append((b"vary", b"Origin"))
@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+from app.db.base_class import Base
+
+class AuditEvent(Base):
+    """One audited write, inserted in batches by the write-behind queue (see app/core/write_behind.py)."""
+
+    __tablename__ = "audit_events"
+    # No foreign keys: the trail outlives the users and items it mentions,
+    # and rows arrive after the request that caused them has committed
+    __table_args__ = (Index("ix_audit_events_user_id_occurred_at", "user_id", "occurred_at"),)
+
+    id = Column(BigInteger, primary_key=True)
+    # When the handler recorded it, not when the batch was written
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    user_id = Column(Integer, nullable=True)
+    action = Column(String(64), nullable=False)
+    item_id = Column(Integer, nullable=True)
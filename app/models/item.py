@@ -1,7 +1,16 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, Column, Computed, Integer, String, ForeignKey, Index, Text, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from app.db.base_class import Base
 
+# Full-text search document: name (weight A) ranks above description (weight B).
+# The text search configuration is spelled out so the expression is immutable,
+# as a generated column requires. Kept identical to migration 0005.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')"
+)
+
 class Item(Base):
     __tablename__ = "items"
 
@@ -9,6 +18,69 @@ class Item(Base):
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Incremented by every UPDATE; the item's ETag is "<id>-<version>"
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Maintained by Postgres; deferred so regular item loads never fetch it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
 
     # Optional relationship; used for convenience in joins (not required by CRUD)
     owner = relationship("User")
+
+    # Composite index backing every owner-scoped query (see migration 0002)
+    # and the GIN index behind GET /items/search (see migration 0005)
+    __table_args__ = (
+        Index("ix_items_owner_id_id", "owner_id", "id"),
+        Index("ix_items_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+
+# users.items_version is the collection version behind the GET /items ETag.
+# Statement-level triggers with transition tables bump it once per owner per
+# statement, so bulk writes do not update the users row once per item and
+# single writes stay one round-trip. Kept identical to migration 0004.
+ITEMS_VERSION_TRIGGERS = DDL("""
+CREATE OR REPLACE FUNCTION bump_items_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE users SET items_version = items_version + 1
+        WHERE id IN (SELECT owner_id FROM new_items);
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE users SET items_version = items_version + 1
+        WHERE id IN (SELECT owner_id FROM new_items UNION SELECT owner_id FROM old_items);
+    ELSE
+        UPDATE users SET items_version = items_version + 1
+        WHERE id IN (SELECT owner_id FROM old_items);
+    END IF;
+    RETURN NULL;
+END
+$$;
+CREATE TRIGGER items_version_insert AFTER INSERT ON items
+    REFERENCING NEW TABLE AS new_items
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_items_version();
+CREATE TRIGGER items_version_update AFTER UPDATE ON items
+    REFERENCING OLD TABLE AS old_items NEW TABLE AS new_items
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_items_version();
+CREATE TRIGGER items_version_delete AFTER DELETE ON items
+    REFERENCING OLD TABLE AS old_items
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_items_version();
+""")
+
+event.listen(Item.__table__, "after_create", ITEMS_VERSION_TRIGGERS.execute_if(dialect="postgresql"))
+
+
+# Trigram index for name autocomplete (ILIKE 'prefix%'). pg_trgm ships with
+# Postgres' contrib package, which not every server has installed; without it
+# autocomplete still works, on the owner index alone. Kept identical to
+# migration 0005.
+NAME_TRIGRAM_INDEX = DDL("""
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS ix_items_name_trgm ON items USING gin (name gin_trgm_ops);
+    END IF;
+END
+$$;
+""")
+
+event.listen(Item.__table__, "after_create", NAME_TRIGRAM_INDEX.execute_if(dialect="postgresql"))
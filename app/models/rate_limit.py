@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Float, Text
+from app.db.base_class import Base
+
+class RateLimitBucket(Base):
+    """Token bucket shared by every worker (LOGIN_RATE_LIMIT_BACKEND=postgres, see app/core/rate_limit.py)."""
+
+    __tablename__ = "rate_limit_buckets"
+    # Losing the buckets on a crash only resets the limits, so skip the WAL
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key = Column(Text, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    # Epoch seconds from the database clock, so every host agrees on "now"
+    updated_at = Column(Float, nullable=False)
+    # When the bucket is full again and the row can be purged
+    expires_at = Column(Float, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, Boolean
 from app.db.base_class import Base
 
 class User(Base):
@@ -7,4 +7,11 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
-    is_active = Column(Boolean, default=True)
\ No newline at end of file
+    is_active = Column(Boolean, default=True)
+    # Embedded in access tokens as "ver"; incrementing it revokes issued tokens
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped by a trigger on every write to this user's items (see app/models/item.py)
+    items_version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Written in batches by the write-behind queue, so it can trail a login by
+    # up to WRITE_BEHIND_FLUSH_INTERVAL_MS (see app/core/write_behind.py)
+    last_login = Column(DateTime(timezone=True), nullable=True)
@@ -1,4 +1,7 @@
+from typing import List, Literal, Optional
+
 from pydantic import BaseModel
+from typing_extensions import TypedDict
 
 class ItemBase(BaseModel):
     name: str
@@ -18,3 +21,39 @@ class ItemRead(ItemBase):
     class Config:
         from_attributes = True
 
+class ItemPage(BaseModel):
+    # One page of a keyset-paginated listing.
+    # next_cursor is None once the client has reached the last page.
+    items: List[ItemRead]
+    limit: int
+    next_cursor: Optional[str] = None
+
+# Plain-dict twins of ItemRead and ItemPage for the ITEMS_FAST_JSON path,
+# which serializes rows straight from the database without building models.
+# Keep their fields in sync with the models above.
+class ItemRecord(TypedDict):
+    name: str
+    description: Optional[str]
+    id: int
+    owner_id: int
+
+class ItemPageRecord(TypedDict):
+    items: List[ItemRecord]
+    limit: int
+    next_cursor: Optional[str]
+
+class ItemSuggestion(BaseModel):
+    # One GET /items/autocomplete match
+    id: int
+    name: str
+
+class ItemBulkUpdate(ItemUpdate):
+    id: int
+
+class ItemBulkResult(BaseModel):
+    # Outcome for one entry of a bulk request, in request order.
+    # not_found covers items that do not exist or belong to someone else.
+    id: Optional[int] = None
+    status: Literal["created", "updated", "deleted", "not_found"]
+    item: Optional[ItemRead] = None
+
@@ -0,0 +1,88 @@
+"""
+Compare a benchmark run against a stored baseline.
+
+Flags every workload metric that got worse by more than --threshold (a
+fraction: 0.15 means 15%) and exits with status 1 if anything regressed,
+so it can gate a CI job.
+
+    python -m benchmarks.compare benchmarks/baselines/inproc.json /tmp/current.json --threshold 0.15
+"""
+import argparse
+import json
+import math
+import sys
+from typing import Any, Dict, List, NamedTuple
+
+# Metric name -> True when a larger value is better
+METRICS: Dict[str, bool] = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+}
+
+
+class Finding(NamedTuple):
+    workload: str
+    metric: str
+    baseline: float
+    current: float
+    change: float  # relative change, positive means worse
+    regressed: bool
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Finding]:
+    findings: List[Finding] = []
+    for workload, base in baseline["workloads"].items():
+        now = current["workloads"].get(workload)
+        if now is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            before, after = float(base[metric]), float(now[metric])
+            if math.isnan(before) or math.isnan(after) or before == 0:
+                continue
+            change = (after - before) / before
+            if higher_is_better:
+                change = -change
+            findings.append(Finding(workload, metric, before, after, change, change > threshold))
+        # A workload that used to succeed and now returns errors is a regression
+        # whatever its latency looks like
+        if now.get("errors") and not base.get("errors"):
+            errors = float(sum(now["errors"].values()))
+            findings.append(Finding(workload, "errors", 0.0, errors, math.inf, True))
+    return findings
+
+
+def main(args: argparse.Namespace) -> int:
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    with open(args.current, encoding="utf-8") as fh:
+        current = json.load(fh)
+
+    missing = sorted(set(baseline["workloads"]) - set(current["workloads"]))
+    if missing:
+        print(f"not in current run, skipped: {', '.join(missing)}")
+    for key in ("target", "workers", "concurrency", "cpu_count", "db_async"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"warning: {key} differs ({baseline['meta'].get(key)} vs {current['meta'].get(key)})")
+
+    findings = compare(baseline, current, args.threshold)
+    print(f"{'workload':<9} {'metric':<15} {'baseline':>10} {'current':>10} {'worse by':>9}")
+    for f in findings:
+        marker = "  REGRESSION" if f.regressed else ""
+        print(f"{f.workload:<9} {f.metric:<15} {f.baseline:>10.1f} {f.current:>10.1f} {f.change:>+9.1%}{marker}")
+
+    regressions = [f for f in findings if f.regressed]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print(f"no regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15, help="tolerated relative slowdown")
+    sys.exit(main(parser.parse_args()))
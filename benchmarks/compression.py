@@ -0,0 +1,105 @@
+"""
+Response compression benchmark: CPU time against bytes on the wire.
+
+Builds GET /items-shaped JSON pages of --items items (names plus a sentence
+of description drawn from a fixed vocabulary, seeded) and compresses them
+with the encoders CompressionMiddleware uses, at every gzip level in
+--gzip-levels and, when the brotli package is installed, every quality in
+--brotli-qualities. For each it reports the compressed size, the ratio, the
+CPU time per response and the time to send it over a --link-mbps link,
+whose sum is what a client on that link waits for. The ndjson rows compress
+the same items as a stream flushed every --stream-batch rows, as
+GET /items?stream=true does.
+
+No database or server is needed.
+
+    python -m benchmarks.compression --items 1000 --link-mbps 10
+"""
+import argparse
+import json
+import random
+import time
+from typing import List, Tuple
+
+from app.core.static import brotli
+from app.middleware.compression import CompressionMiddleware
+
+WORDS = (
+    "alpha bravo charlie delta echo invoice order shipment pending paid customer warehouse "
+    "backorder priority express standard return refund label pallet crate fragile"
+).split()
+
+
+def payload(items: int) -> Tuple[bytes, List[bytes]]:
+    rng = random.Random(42)
+    rows = [
+        {
+            "name": f"item-{n}",
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 16))),
+            "id": 100000 + n,
+            "owner_id": 640,
+        }
+        for n in range(items)
+    ]
+    page = json.dumps({"items": rows, "limit": items, "next_cursor": None}, separators=(",", ":")).encode()
+    lines = [json.dumps(row, separators=(",", ":")).encode() + b"\n" for row in rows]
+    return page, lines
+
+
+def compress(middleware: CompressionMiddleware, encoding: str, chunks: List[bytes]) -> bytes:
+    # Same calls the middleware makes: flush after every chunk but the last
+    encoder = middleware.encoder(encoding)
+    out = []
+    for chunk in chunks[:-1]:
+        out.append(encoder.compress(chunk) + encoder.flush())
+    out.append(encoder.compress(chunks[-1]) + encoder.finish())
+    return b"".join(out)
+
+
+def measure(middleware: CompressionMiddleware, encoding: str, chunks: List[bytes], repeat: int) -> Tuple[int, float]:
+    size = len(compress(middleware, encoding, chunks))
+    started = time.process_time()
+    for _ in range(repeat):
+        compress(middleware, encoding, chunks)
+    return size, (time.process_time() - started) / repeat
+
+
+def main(args: argparse.Namespace) -> None:
+    page, lines = payload(args.items)
+    batches = [b"".join(lines[n:n + args.stream_batch]) for n in range(0, len(lines), args.stream_batch)]
+    bytes_per_second = args.link_mbps * 1e6 / 8
+
+    cases = [("identity", 0)]
+    cases += [("gzip", level) for level in args.gzip_levels]
+    if brotli is not None:
+        cases += [("br", quality) for quality in args.brotli_qualities]
+    else:
+        print("brotli is not installed; gzip only\n")
+
+    print(f"{args.items} items, {len(page):,} bytes as JSON; {args.link_mbps:g} Mbit/s link")
+    print(f"{'body':<8} {'encoding':<10} {'size':>10} {'ratio':>7} {'cpu':>10} {'transfer':>10} {'total':>10}")
+    for body, chunks in (("json", [page]), ("ndjson", batches)):
+        raw = sum(map(len, chunks))
+        for encoding, level in cases:
+            if encoding == "identity":
+                size, cpu = raw, 0.0
+            else:
+                middleware = CompressionMiddleware(None, gzip_level=level or 1, brotli_quality=level)
+                size, cpu = measure(middleware, encoding, chunks, args.repeat)
+            transfer = size / bytes_per_second
+            label = encoding if encoding == "identity" else f"{encoding}-{level}"
+            print(
+                f"{body:<8} {label:<10} {size:>10,} {raw / size:>6.1f}x {cpu * 1000:>7.2f} ms"
+                f" {transfer * 1000:>7.1f} ms {(cpu + transfer) * 1000:>7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--link-mbps", type=float, default=10.0, help="client bandwidth for the transfer column")
+    parser.add_argument("--stream-batch", type=int, default=500, help="rows per flushed ndjson chunk")
+    parser.add_argument("--gzip-levels", type=int, nargs="+", default=[1, 3, 6, 9])
+    parser.add_argument("--brotli-qualities", type=int, nargs="+", default=[1, 4, 6, 11])
+    main(parser.parse_args())
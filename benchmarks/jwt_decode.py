@@ -0,0 +1,57 @@
+"""
+JWT decode microbenchmark.
+
+Compares verification throughput of every available token backend in
+app/core/security.py, and the cached decode_access_token path that repeat
+requests with the same bearer token take.
+
+    python -m benchmarks.jwt_decode --iterations 20000
+"""
+import argparse
+import time
+from typing import Callable, List, Tuple
+
+from app.core import security
+from app.core.config import settings
+
+
+def measure(fn: Callable[[], object], iterations: int) -> float:
+    # Returns decodes per second
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - started)
+
+
+def available_backends() -> List[security.TokenBackend]:
+    backends: List[security.TokenBackend] = [security.JoseBackend(), security.HMACBackend()]
+    try:
+        backends.append(security.PyJWTBackend())
+    except ImportError:
+        print("pyjwt: not installed, skipped")
+    return backends
+
+
+def main(args: argparse.Namespace) -> None:
+    key, algorithm = settings.jwt_secret_key, settings.jwt_algorithm
+    claims = {"sub": "1", "exp": int(time.time()) + 3600, "ver": 0}
+    results: List[Tuple[str, float]] = []
+
+    for backend in available_backends():
+        token = backend.encode(claims, key, algorithm)
+        results.append((f"{backend.name} (uncached)", measure(lambda: backend.decode(token, key, algorithm), args.iterations)))
+
+    token = security.create_access_token(subject="1")
+    security.token_cache.clear()
+    security.decode_access_token(token)  # warm the cache
+    results.append((f"decode_access_token cached ({security.token_backend.name})", measure(lambda: security.decode_access_token(token), args.iterations)))
+
+    baseline = results[0][1]
+    for name, rate in results:
+        print(f"{name:<45} {rate:>12,.0f} decodes/s  {rate / baseline:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    main(parser.parse_args())
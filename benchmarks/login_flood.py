@@ -0,0 +1,97 @@
+"""
+Login flood benchmark: latency of GET /items while /auth/login is saturated.
+
+Runs two phases against a live server and prints p50/p95/p99 for /items:
+a baseline with only item readers, then the same readers while a pool of
+clients hammers /auth/login. With the bounded hashing executor, /items p99
+should stay close to the baseline and surplus logins should get 503s.
+With the login rate limiter on, most of the flood gets 429s instead, before
+reaching the executor; disable it to measure the executor on its own.
+
+Start the API first, for example:
+    LOGIN_RATE_LIMIT_ENABLED=false gunicorn -k uvicorn.workers.UvicornWorker -w 4 -b 127.0.0.1:8000 app.main:app
+then run:
+    python -m benchmarks.login_flood --base-url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.stats import summarize
+
+PASSWORD = "benchmark_password_123"
+
+
+async def create_account(client: httpx.AsyncClient, items: int) -> str:
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    res = await client.post("/auth/register", json={"email": email, "password": PASSWORD})
+    res.raise_for_status()
+    res = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+    res.raise_for_status()
+    token = res.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for n in range(items):
+        (await client.post("/items/", json={"name": f"bench-{n}"}, headers=headers)).raise_for_status()
+    return email
+
+
+async def items_reader(client: httpx.AsyncClient, headers: Dict[str, str], deadline: float, samples: List[float]) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        res = await client.get("/items/", headers=headers)
+        res.raise_for_status()
+        samples.append(time.perf_counter() - started)
+
+
+async def login_flooder(client: httpx.AsyncClient, email: str, deadline: float, statuses: Counter) -> None:
+    while time.perf_counter() < deadline:
+        res = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        statuses[res.status_code] += 1
+
+
+async def run_phase(args: argparse.Namespace, email: str, flood: bool) -> Dict[str, object]:
+    limits = httpx.Limits(max_connections=args.readers + args.flooders + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        res = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+        res.raise_for_status()
+        headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+        samples: List[float] = []
+        statuses: Counter = Counter()
+        deadline = time.perf_counter() + args.duration
+        tasks = [items_reader(client, headers, deadline, samples) for _ in range(args.readers)]
+        if flood:
+            tasks += [login_flooder(client, email, deadline, statuses) for _ in range(args.flooders)]
+        await asyncio.gather(*tasks)
+
+    result: Dict[str, object] = {"items": summarize(samples)}
+    if flood:
+        result["login_statuses"] = dict(statuses)
+    return result
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        email = await create_account(client, args.items)
+
+    for name, flood in (("baseline", False), ("login flood", True)):
+        result = await run_phase(args, email, flood)
+        items = result["items"]
+        print(f"[{name}] /items " + " ".join(f"{k}={v:.1f}" for k, v in items.items()))  # type: ignore[union-attr]
+        if flood:
+            print(f"[{name}] /auth/login statuses: {result['login_statuses']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per phase")
+    parser.add_argument("--readers", type=int, default=8, help="concurrent /items clients")
+    parser.add_argument("--flooders", type=int, default=64, help="concurrent /auth/login clients")
+    parser.add_argument("--items", type=int, default=50, help="items created for the reader account")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,128 @@
+"""
+Login rate limiter overhead benchmark.
+
+Times what the limiter adds to every login attempt and what it saves on
+rejected ones:
+
+  store       one take() on MemoryBucketStore and on PostgresBucketStore
+  contention  takes per second from --threads threads on one shared memory
+              store, with a single shard against the default 16
+  login       POST /auth/login in-process for a wrong password (401, one
+              Argon2 verification) against a rate-limited attempt (429)
+
+The Postgres store needs DATABASE_URL migrated to head (migration 0006);
+its rows are removed afterwards. The login case seeds one account.
+
+    python -m benchmarks.rate_limit --repeat 2000 --threads 8
+"""
+import argparse
+import asyncio
+import threading
+import time
+import uuid
+from typing import Callable, List
+
+import httpx
+
+from app.api import auth
+from app.core.rate_limit import Limit, LoginRateLimiter, MemoryBucketStore, PostgresBucketStore
+from app.db.session import engine
+from app.main import app
+from benchmarks.seed import seed
+from benchmarks.stats import summarize
+
+# Generous enough that the store cases never reject
+OPEN = Limit(rate=1e9, burst=1e9)
+
+
+def timed(fn: Callable[[], object], repeat: int) -> List[float]:
+    fn()  # warm up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def report(name: str, samples: List[float]) -> None:
+    stats = summarize(samples)
+    print(f"  {name:<28} p50 {stats['p50_ms'] * 1000:>9.1f} us  p95 {stats['p95_ms'] * 1000:>9.1f} us")
+
+
+def store_cases(repeat: int) -> None:
+    print("store.take()")
+    memory = MemoryBucketStore()
+    keys = [f"login:ip:10.0.{n // 256}.{n % 256}" for n in range(1000)]
+    counter = iter(range(10**9))
+    report("memory", timed(lambda: memory.take(keys[next(counter) % len(keys)], OPEN), repeat))
+
+    postgres = PostgresBucketStore(lambda: engine)
+    try:
+        report("postgres", timed(lambda: postgres.take(keys[next(counter) % len(keys)], OPEN), max(1, repeat // 10)))
+    finally:
+        postgres.clear()
+
+
+def contention_cases(repeat: int, threads: int) -> None:
+    print(f"memory store, {threads} threads")
+    for shards in (1, 16):
+        store = MemoryBucketStore(shards=shards)
+        barrier = threading.Barrier(threads + 1)
+
+        def worker(worker_id: int) -> None:
+            keys = [f"login:user:{worker_id}-{n}@example.com" for n in range(100)]
+            barrier.wait()
+            for n in range(repeat):
+                store.take(keys[n % 100], OPEN)
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for thread in pool:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        print(f"  {shards:>2} shard(s)                  {threads * repeat / elapsed:>12,.0f} takes/s")
+
+
+async def login_cases(repeat: int) -> None:
+    print("POST /auth/login")
+    account = seed(1, 0)[0]
+    form = {"username": account.email, "password": "wrong-password"}
+    original = auth.login_limiter
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+            async def attempt(expected: int) -> List[float]:
+                samples = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    res = await client.post("/auth/login", data=form)
+                    samples.append(time.perf_counter() - started)
+                    assert res.status_code == expected, res.status_code
+                return samples
+
+            auth.login_limiter = None
+            report("401, Argon2 verify", await attempt(401))
+            # A limiter that has nothing left for this client
+            limiter = LoginRateLimiter(MemoryBucketStore(), Limit(1e-9, 1), Limit(1e-9, 1))
+            limiter.check("127.0.0.1", f"{uuid.uuid4().hex}@example.com")
+            auth.login_limiter = limiter
+            report("429, rate limited", await attempt(429))
+    finally:
+        auth.login_limiter = original
+
+
+def main(args: argparse.Namespace) -> None:
+    store_cases(args.repeat)
+    contention_cases(args.repeat, args.threads)
+    asyncio.run(login_cases(max(1, args.repeat // 100)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    main(parser.parse_args())
@@ -0,0 +1,143 @@
+"""
+Item search benchmark on a large table (1M items by default).
+
+Seeds --items items spread over --owners users with INSERT ... SELECT from
+generate_series, so seeding a million rows takes seconds rather than hours,
+then times the statements behind GET /items/search and /items/autocomplete
+for one owner against an unindexed ILIKE '%term%' scan of the same rows.
+The plan of each search is printed so index use can be checked.
+
+Point DATABASE_URL at a scratch database migrated to head; seeded rows are
+not cleaned up.
+
+    python -m benchmarks.search --items 1000000 --owners 10 --repeat 20
+    python -m benchmarks.search --owner <id printed by the first run>
+"""
+import argparse
+import re
+import time
+import uuid
+from typing import Callable, List
+
+from sqlalchemy import Select, func, select, text
+
+import app.db.base  # noqa: F401  (registers every model)
+from app.crud import item as crud_item
+from app.db.session import SessionLocal
+from app.models.item import Item
+from app.models.user import User
+from benchmarks.stats import summarize
+
+WORDS = [
+    "red", "green", "blue", "steel", "wooden", "glass", "vintage", "compact", "wireless", "portable",
+    "kettle", "lamp", "chair", "keyboard", "bottle", "jacket", "backpack", "speaker", "notebook", "camera",
+    "garden", "kitchen", "office", "travel", "outdoor", "running", "winter", "summer", "spare", "deluxe",
+]
+DESCRIPTIONS = [
+    "Barely used, in its original box",
+    "Bought for a trip and never unpacked",
+    "Works fine, some scratches on the side",
+    "Spare one from the office move",
+    "Gift that did not fit, still with tags",
+]
+
+
+def seed_items(items: int, owners: int) -> List[int]:
+    run_id = uuid.uuid4().hex[:8]
+    with SessionLocal() as db:
+        owner_ids = db.scalars(
+            User.__table__.insert()
+            .returning(User.id)
+            .values([{"email": f"search-{run_id}-{n}@example.com", "hashed_password": "unused"} for n in range(owners)])
+        ).all()
+        started = time.perf_counter()
+        # Names are two vocabulary words plus a serial number, so common
+        # words match ~7% of rows and the serial numbers match exactly one
+        db.execute(
+            text("""
+                WITH v AS (
+                    SELECT CAST(:words AS text[]) AS w, CAST(:descriptions AS text[]) AS d,
+                           CAST(:owners AS integer[]) AS o
+                )
+                INSERT INTO items (name, description, owner_id)
+                SELECT w[1 + (i * 7) % cardinality(w)] || ' ' || w[1 + (i / 31) % cardinality(w)] || ' ' || i,
+                       d[1 + i % cardinality(d)],
+                       o[1 + i % cardinality(o)]
+                FROM v, generate_series(1, :items) AS i
+            """),
+            {"words": WORDS, "descriptions": DESCRIPTIONS, "owners": list(owner_ids), "items": items},
+        )
+        db.commit()
+        db.execute(text("ANALYZE items"))
+        db.commit()
+        print(f"seeded {items} items for {owners} owners in {time.perf_counter() - started:.1f}s")
+    return list(owner_ids)
+
+
+def ilike_scan_stmt(owner_id: int, term: str, limit: int) -> Select:
+    # What a client-side filter amounts to when pushed into SQL as-is
+    pattern = f"%{term}%"
+    return (
+        select(Item.name, Item.description, Item.id, Item.owner_id)
+        .where(Item.owner_id == owner_id, (Item.name.ilike(pattern)) | (Item.description.ilike(pattern)))
+        .order_by(Item.id)
+        .limit(limit + 1)
+    )
+
+
+def time_stmt(build: Callable[[], Select], repeat: int) -> List[float]:
+    samples = []
+    with SessionLocal() as db:
+        db.execute(build()).all()  # warm up
+        for _ in range(repeat):
+            started = time.perf_counter()
+            db.execute(build()).all()
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def plan(stmt: Select) -> str:
+    with SessionLocal() as db:
+        connection = db.connection()
+        compiled = stmt.compile(connection)
+        lines = connection.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).scalars().all()
+    # Every index the plan touches, or the scan type when it uses none
+    indexes = [m.group(1) for m in map(re.compile(r"Index (?:Only )?Scan (?:on|using) (\w+)").search, lines) if m]
+    if indexes:
+        return "indexes: " + ", ".join(dict.fromkeys(indexes))
+    scans = [line.strip() for line in lines if "Scan" in line]
+    return scans[-1] if scans else lines[0]
+
+
+def main(args: argparse.Namespace) -> None:
+    owner = args.owner or seed_items(args.items, args.owners)[0]
+    limit = args.limit
+    with SessionLocal() as db:
+        trigram = db.execute(
+            text("SELECT 1 FROM pg_indexes WHERE indexname = 'ix_items_name_trgm'")
+        ).first()
+        total = db.scalar(select(func.count()).select_from(Item).where(Item.owner_id == owner))
+    print(f"owner {owner} has {total} items; trigram index: {'yes' if trigram else 'no (pg_trgm unavailable)'}\n")
+
+    cases = [
+        ("search common word", lambda: crud_item.search_stmt(owner, "kettle", None, limit)),
+        ("search two words", lambda: crud_item.search_stmt(owner, "steel kettle", None, limit)),
+        ("search rare serial", lambda: crud_item.search_stmt(owner, "424242", None, limit)),
+        ("autocomplete 'kett'", lambda: crud_item.autocomplete_stmt(owner, "kett", 10)),
+        ("ilike scan 'kettle'", lambda: ilike_scan_stmt(owner, "kettle", limit)),
+        ("ilike scan '424242'", lambda: ilike_scan_stmt(owner, "424242", limit)),
+    ]
+    print(f"{'case':<22} {'p50':>9} {'p95':>9}  plan")
+    for name, build in cases:
+        stats = summarize(time_stmt(build, args.repeat))
+        print(f"{name:<22} {stats['p50_ms']:>7.1f}ms {stats['p95_ms']:>7.1f}ms  {plan(build())}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--owners", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=100, help="page size")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--owner", type=int, help="reuse an owner seeded by an earlier run instead of seeding")
+    main(parser.parse_args())
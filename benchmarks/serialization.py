@@ -0,0 +1,104 @@
+"""
+Item listing serialization benchmark: ORM + response_model vs ITEMS_FAST_JSON.
+
+Seeds one account with --items items (10k by default), then times both ways
+of producing the listing:
+
+  page    one page holding every item, from the SELECT to the JSON body bytes:
+          ORM objects + ItemPage + FastAPI's response_model serialization,
+          against plain rows + TypeAdapter.dump_json
+  stream  GET /items/?stream=true through the app in-process, so routing,
+          auth and the NDJSON writer are included
+
+Point DATABASE_URL at a scratch database; seeded rows are not cleaned up.
+
+    python -m benchmarks.serialization --items 10000 --repeat 20
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, List
+
+import httpx
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.core.config import settings
+from app.crud import item as crud_item
+from app.db.session import SessionLocal
+from app.main import app
+from benchmarks.seed import Account, seed
+from benchmarks.stats import summarize
+
+
+async def timed(fn: Callable[[], Awaitable[object]], repeat: int) -> List[float]:
+    await fn()  # warm up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def list_route() -> APIRoute:
+    return next(r for r in app.routes if isinstance(r, APIRoute) and r.path == "/items/" and "GET" in r.methods)
+
+
+async def page_cases(account: Account, items: int, repeat: int) -> None:
+    field = list_route().response_field
+
+    async def model_path() -> bytes:
+        with SessionLocal() as db:
+            rows = db.scalars(crud_item.PAGE, crud_item.page_params(account.user_id, 0, items)).all()
+            page = crud_item.build_page(rows, account.user_id, items)
+        content = await serialize_response(field=field, response_content=page)
+        return JSONResponse(content).body
+
+    async def fast_path() -> bytes:
+        with SessionLocal() as db:
+            rows = db.execute(crud_item.PAGE_ROWS, crud_item.page_params(account.user_id, 0, items)).all()
+        return crud_item.page_json(rows, account.user_id, items)
+
+    assert await model_path() == await fast_path(), "the two paths must produce the same body"
+    report(f"page of {items}", await timed(model_path, repeat), await timed(fast_path, repeat))
+
+
+async def stream_cases(account: Account, items: int, repeat: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        async def fetch() -> int:
+            res = await client.get("/items/", params={"stream": "true"}, headers=account.headers)
+            res.raise_for_status()
+            return len(res.content)
+
+        settings.items_fast_json = False
+        model = await timed(fetch, repeat)
+        settings.items_fast_json = True
+        fast = await timed(fetch, repeat)
+    report(f"stream of {items}", model, fast)
+
+
+def report(name: str, model: List[float], fast: List[float]) -> None:
+    before, after = summarize(model), summarize(fast)
+    print(f"{name}")
+    for label, stats in (("orm + response_model", before), ("rows + dump_json", after)):
+        print(f"  {label:<22} p50 {stats['p50_ms']:>8.1f} ms  p95 {stats['p95_ms']:>8.1f} ms")
+    print(f"  speedup (p50)          {before['p50_ms'] / after['p50_ms']:>8.1f}x")
+
+
+async def main(args: argparse.Namespace) -> None:
+    account = seed(1, args.items)[0]
+    original = settings.items_fast_json
+    try:
+        await page_cases(account, args.items, args.repeat)
+        await stream_cases(account, args.items, args.repeat)
+    finally:
+        settings.items_fast_json = original
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,105 @@
+"""
+Hot statement benchmark: select() built per call vs prebuilt, with and
+without server-side prepared statements.
+
+Seeds one account with --items items, then runs the statements behind
+get_current_user, GET /items and GET /items/{id} --repeat times each on a
+single connection and reports the client CPU time (process_time) and wall
+time per call. "per call" rebuilds the select() with the values inlined, as
+the crud builders used to; "prebuilt" executes the module-level statement
+with its parameters. Each way runs with psycopg's prepare_threshold=None (no
+prepared statements, as behind PgBouncer in transaction mode) and 0
+(prepared on first use).
+
+Point DATABASE_URL at a scratch database; seeded rows are not cleaned up.
+
+    python -m benchmarks.statements --items 100 --repeat 5000
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import item as crud_item
+from app.crud import user as crud_user
+from app.models.item import Item
+from app.models.user import User
+from benchmarks.seed import seed
+
+Case = Tuple[str, Callable[[Session], Any], Callable[[Session], Any]]
+
+
+def cases(user_id: int, item_id: int, limit: int) -> List[Case]:
+    page = crud_item.page_params(user_id, 0, limit)
+    item = crud_item.item_params(user_id, item_id)
+    return [
+        (
+            "auth state",
+            lambda db: db.execute(
+                select(User.is_active, User.token_version).where(User.id == user_id)
+            ).first(),
+            lambda db: db.execute(crud_user.AUTH_STATE, {"user_id": user_id}).first(),
+        ),
+        (
+            "items version",
+            lambda db: db.execute(select(User.items_version).where(User.id == user_id)).scalar_one(),
+            lambda db: db.execute(crud_user.ITEMS_VERSION, {"user_id": user_id}).scalar_one(),
+        ),
+        (
+            f"page of {limit} (ORM)",
+            lambda db: db.scalars(
+                select(Item).where(Item.owner_id == user_id, Item.id > 0).order_by(Item.id).limit(limit + 1)
+            ).all(),
+            lambda db: db.scalars(crud_item.PAGE, page).all(),
+        ),
+        (
+            "item by id",
+            lambda db: db.execute(
+                select(Item.id, Item.name, Item.description, Item.owner_id, Item.version)
+                .where(Item.id == item_id, Item.owner_id == user_id)
+            ).first(),
+            lambda db: db.execute(crud_item.OWNER_ITEM, item).first(),
+        ),
+    ]
+
+
+def measure(db: Session, fn: Callable[[Session], Any], repeat: int) -> Dict[str, float]:
+    for _ in range(50):
+        fn(db)  # warm up: compiled cache, and past any prepare threshold
+        db.expunge_all()
+    cpu, wall = time.process_time(), time.perf_counter()
+    for _ in range(repeat):
+        fn(db)
+        db.expunge_all()
+    return {
+        "cpu_us": (time.process_time() - cpu) / repeat * 1e6,
+        "wall_us": (time.perf_counter() - wall) / repeat * 1e6,
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    account = seed(1, args.items)[0]
+    print(f"{'statement':<20} {'prepare':>8} {'per call cpu':>13} {'prebuilt cpu':>13} {'per call wall':>14} {'prebuilt wall':>14}")
+    for threshold in (None, 0):
+        engine = create_engine(settings.database_url, connect_args={"prepare_threshold": threshold})
+        try:
+            with Session(engine) as db:
+                for name, per_call, prebuilt in cases(account.user_id, account.item_ids[0], args.items):
+                    before, after = measure(db, per_call, args.repeat), measure(db, prebuilt, args.repeat)
+                    label = "off" if threshold is None else str(threshold)
+                    print(
+                        f"{name:<20} {label:>8} {before['cpu_us']:>10.1f} us {after['cpu_us']:>10.1f} us"
+                        f" {before['wall_us']:>11.1f} us {after['wall_us']:>11.1f} us"
+                    )
+        finally:
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100, help="items seeded, also the page size")
+    parser.add_argument("--repeat", type=int, default=5000)
+    main(parser.parse_args())
@@ -0,0 +1,314 @@
+"""
+API benchmark suite.
+
+Seeds users and items through benchmarks.seed, then drives each workload for
+a fixed duration with a pool of concurrent clients and records throughput and
+p50/p95/p99 latency. Results are written as JSON that benchmarks.compare can
+check against a stored baseline.
+
+Targets:
+    inproc    the ASGI app in this process, through httpx's ASGITransport
+    http      an already running server at --base-url
+    uvicorn   a uvicorn server started on --port for the run
+    gunicorn  a gunicorn + UvicornWorker server started on --port for the run
+
+Examples:
+    python -m benchmarks.suite --target inproc --output benchmarks/baselines/inproc.json
+    python -m benchmarks.suite --target gunicorn --workers 4 --output /tmp/current.json
+    python -m benchmarks.compare benchmarks/baselines/inproc.json /tmp/current.json
+
+Seeded rows are left in the database DATABASE_URL points at, so point it at a
+scratch database.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+# The login workload measures Argon2 throughput from a single client address,
+# which the login rate limiter would turn into a stream of 429s. Set before the
+# app settings load; spawned servers inherit it through the environment.
+os.environ.setdefault("LOGIN_RATE_LIMIT_ENABLED", "false")
+
+from benchmarks.seed import PASSWORD, Account, seed
+from benchmarks.stats import summarize
+
+# Items created through POST /items/bulk whenever the delete workload runs out
+REFILL_BATCH = 500
+
+
+class Context:
+    """State shared by the workers of a run: seeded accounts and items left to delete."""
+
+    def __init__(self, accounts: List[Account]) -> None:
+        self.accounts = accounts
+        self.rng = random.Random(0)
+        self.run_id = uuid.uuid4().hex[:8]
+        self._emails = itertools.count()
+        # Reads and updates use the first half of each account's items, deletes
+        # consume the second half, so reads never race a delete into a 404
+        self.readable: List[Tuple[Account, List[int]]] = [
+            (account, account.item_ids[: max(1, len(account.item_ids) // 2)])
+            for account in accounts
+            if account.item_ids
+        ]
+        self.deletable: List[Tuple[Account, int]] = [
+            (account, item_id)
+            for account in accounts
+            for item_id in account.item_ids[max(1, len(account.item_ids) // 2):]
+        ]
+        self.rng.shuffle(self.deletable)
+        self.refill_lock = asyncio.Lock()
+
+    def account(self) -> Account:
+        return self.rng.choice(self.accounts)
+
+    def item(self) -> Tuple[Account, int]:
+        account, item_ids = self.rng.choice(self.readable)
+        return account, self.rng.choice(item_ids)
+
+    def new_email(self) -> str:
+        return f"bench-{self.run_id}-new-{next(self._emails)}@example.com"
+
+
+# A workload builds the next request; only sending it is timed, so any setup
+# (picking an account, refilling items to delete) stays out of the samples
+Workload = Callable[[httpx.AsyncClient, Context], Awaitable[httpx.Request]]
+
+
+async def register(client: httpx.AsyncClient, ctx: Context) -> httpx.Request:
+    return client.build_request("POST", "/auth/register", json={"email": ctx.new_email(), "password": PASSWORD})
+
+
+async def login(client: httpx.AsyncClient, ctx: Context) -> httpx.Request:
+    return client.build_request("POST", "/auth/login", data={"username": ctx.account().email, "password": PASSWORD})
+
+
+async def list_items(client: httpx.AsyncClient, ctx: Context) -> httpx.Request:
+    return client.build_request("GET", "/items/", params={"limit": 100}, headers=ctx.account().headers)
+
+
+async def read_item(client: httpx.AsyncClient, ctx: Context) -> httpx.Request:
+    account, item_id = ctx.item()
+    return client.build_request("GET", f"/items/{item_id}", headers=account.headers)
+
+
+async def create_item(client: httpx.AsyncClient, ctx: Context) -> httpx.Request:
+    return client.build_request("POST", "/items/", json={"name": "bench-created"}, headers=ctx.account().headers)
+
+
+async def update_item(client: httpx.AsyncClient, ctx: Context) -> httpx.Request:
+    account, item_id = ctx.item()
+    body = {"description": f"updated {ctx.rng.random():.6f}"}
+    return client.build_request("PUT", f"/items/{item_id}", json=body, headers=account.headers)
+
+
+async def delete_item(client: httpx.AsyncClient, ctx: Context) -> httpx.Request:
+    async with ctx.refill_lock:
+        if not ctx.deletable:
+            account = ctx.account()
+            res = await client.post("/items/bulk", json=[{"name": "bench-doomed"}] * REFILL_BATCH, headers=account.headers)
+            res.raise_for_status()
+            ctx.deletable.extend((account, entry["id"]) for entry in res.json())
+    account, item_id = ctx.deletable.pop()
+    return client.build_request("DELETE", f"/items/{item_id}", headers=account.headers)
+
+
+# Run order: delete goes last so the lists the other workloads read stay full
+WORKLOADS: Dict[str, Workload] = {
+    "register": register,
+    "login": login,
+    "list": list_items,
+    "read": read_item,
+    "create": create_item,
+    "update": update_item,
+    "delete": delete_item,
+}
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    workload: Workload,
+    ctx: Context,
+    deadline: float,
+    samples: Optional[List[float]],
+    errors: Counter,
+) -> None:
+    while time.perf_counter() < deadline:
+        request = await workload(client, ctx)
+        started = time.perf_counter()
+        res = await client.send(request)
+        elapsed = time.perf_counter() - started
+        if samples is None:
+            continue  # warmup
+        if res.is_success:
+            samples.append(elapsed)
+        else:
+            errors[str(res.status_code)] += 1
+
+
+async def run_workload(
+    client: httpx.AsyncClient, workload: Workload, ctx: Context, args: argparse.Namespace
+) -> Dict[str, object]:
+    errors: Counter = Counter()
+    if args.warmup > 0:
+        deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(*(_worker(client, workload, ctx, deadline, None, errors) for _ in range(args.concurrency)))
+        errors.clear()
+
+    samples: List[float] = []
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(_worker(client, workload, ctx, deadline, samples, errors) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result: Dict[str, object] = summarize(samples)
+    result["throughput_rps"] = len(samples) / elapsed if elapsed > 0 else 0.0
+    result["duration_s"] = elapsed
+    result["errors"] = dict(errors)
+    return result
+
+
+def _wait_until_healthy(base_url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not become healthy within {timeout:.0f}s")
+
+
+def _server_command(args: argparse.Namespace) -> List[str]:
+    if args.target == "uvicorn":
+        return [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(args.port),
+            "--workers", str(args.workers), "--no-access-log",
+        ]
+    return [
+        sys.executable, "-m", "gunicorn", "app.main:app",
+        "-k", "uvicorn.workers.UvicornWorker",
+        "-w", str(args.workers), "-b", f"127.0.0.1:{args.port}",
+    ]
+
+
+@asynccontextmanager
+async def open_client(args: argparse.Namespace) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    if args.target == "inproc":
+        from app.main import app
+
+        # ASGITransport does not send lifespan events, so run them here
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=60) as client:
+                yield client
+        return
+
+    if args.target == "http":
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+            yield client
+        return
+
+    # "localhost" rather than 127.0.0.1 so the default ALLOWED_HOSTS accept it
+    base_url = f"http://localhost:{args.port}"
+    process = subprocess.Popen(_server_command(args))
+    try:
+        _wait_until_healthy(base_url, process)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            yield client
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _meta(args: argparse.Namespace) -> Dict[str, object]:
+    from app.core.config import settings
+
+    return {
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "target": args.target,
+        "workers": args.workers if args.target in ("uvicorn", "gunicorn") else None,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "users": args.users,
+        "items_per_user": args.items,
+        "db_async": settings.db_async,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+async def main(args: argparse.Namespace) -> Dict[str, object]:
+    names = args.workloads.split(",") if args.workloads else list(WORKLOADS)
+    unknown = [name for name in names if name not in WORKLOADS]
+    if unknown:
+        raise SystemExit(f"unknown workloads: {', '.join(unknown)} (choose from {', '.join(WORKLOADS)})")
+
+    ctx = Context(seed(args.users, args.items))
+    results: Dict[str, object] = {}
+    async with open_client(args) as client:
+        for name in names:
+            result = await run_workload(client, WORKLOADS[name], ctx, args)
+            results[name] = result
+            print(
+                f"{name:<9} {result['throughput_rps']:>9.1f} req/s"
+                f"  p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms p99={result['p99_ms']:.1f}ms"
+                + (f"  errors={result['errors']}" if result["errors"] else "")
+            )
+    return {"meta": _meta(args), "workloads": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("inproc", "http", "uvicorn", "gunicorn"), default="inproc")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="server for --target http")
+    parser.add_argument("--port", type=int, default=8765, help="port for spawned servers")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for spawned servers")
+    parser.add_argument("--workloads", help=f"comma-separated subset of: {', '.join(WORKLOADS)}")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--items", type=int, default=200, help="seeded items per user")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients per workload")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per workload")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unmeasured seconds per workload")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    cli_args = parser.parse_args()
+
+    report = asyncio.run(main(cli_args))
+    if cli_args.output:
+        with open(cli_args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"results written to {cli_args.output}")
@@ -0,0 +1,79 @@
+"""
+Write-behind benchmark: audit and last_login writes inline vs queued.
+
+Seeds --users accounts, then records --events logins spread over them, each
+being one audit event plus a last_login update, two ways. "inline" does what
+a handler would do without the queue: INSERT the event, UPDATE the user and
+commit, one transaction per login. "queued" records them on a
+WriteBehindQueue and flushes it, batch_size records per transaction. The
+"request" column is the time a handler spends per login, the "total" column
+the time until everything is in Postgres.
+
+Point DATABASE_URL at a scratch database; seeded rows and audit events are
+not cleaned up.
+
+    python -m benchmarks.write_behind --users 100 --events 10000 --batch-size 500
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+from app.core.write_behind import WriteBehindQueue
+from app.crud import audit as crud_audit
+from app.crud import user as crud_user
+from benchmarks.seed import seed
+
+
+def inline(engine, user_ids, events: int) -> float:
+    started = time.perf_counter()
+    for n in range(events):
+        user_id = user_ids[n % len(user_ids)]
+        now = datetime.now(timezone.utc)
+        with engine.begin() as conn:
+            conn.execute(
+                crud_audit.INSERT_EVENTS,
+                [{"occurred_at": now, "user_id": user_id, "action": "bench.login", "item_id": None}],
+            )
+            conn.execute(crud_user.last_login_stmt({user_id: now}))
+    return time.perf_counter() - started
+
+
+def queued(engine, user_ids, events: int, batch_size: int):
+    # Not started: the flush runs here, after every record is taken, so the
+    # two phases are timed apart
+    queue = WriteBehindQueue(
+        flush_interval=1.0, batch_size=batch_size, max_pending=events * 2, drain_timeout=0, engine=lambda: engine
+    )
+    started = time.perf_counter()
+    for n in range(events):
+        user_id = user_ids[n % len(user_ids)]
+        queue.login(user_id)
+        queue.audit("bench.login", user_id)
+    recorded = time.perf_counter() - started
+    queue.flush()
+    return recorded, time.perf_counter() - started
+
+
+def main(args: argparse.Namespace) -> None:
+    user_ids = [account.user_id for account in seed(args.users, 0)]
+    engine = create_engine(settings.database_url)
+    try:
+        inline_total = inline(engine, user_ids, args.events)
+        recorded, queued_total = queued(engine, user_ids, args.events, args.batch_size)
+    finally:
+        engine.dispose()
+    print(f"{args.events} logins over {args.users} users, batch size {args.batch_size}")
+    print(f"{'mode':<8} {'request':>12} {'total':>10}")
+    print(f"{'inline':<8} {inline_total / args.events * 1e6:>9.1f} us {inline_total:>8.2f} s")
+    print(f"{'queued':<8} {recorded / args.events * 1e6:>9.1f} us {queued_total:>8.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=settings.write_behind_batch_size)
+    main(parser.parse_args())
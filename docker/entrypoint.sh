@@ -1,6 +1,12 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
+# Per-worker metric files from a previous run would be merged into /metrics
+if [[ -n "${PROMETHEUS_MULTIPROC_DIR:-}" ]]; then
+  rm -rf "${PROMETHEUS_MULTIPROC_DIR}"
+  mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+fi
+
 if [[ "${AUTO_MIGRATE:-false}" == "true" ]]; then
   echo "[entrypoint] Applying DB migrations..."
   python scripts/migrate.py
@@ -0,0 +1,35 @@
+import gc
+import os
+
+# Loaded automatically by gunicorn from the working directory (/app).
+
+# Preload: the master imports app.main once (settings parsed, routes and
+# schemas built, static assets compressed) and forks every worker from it,
+# so a new worker starts serving without importing anything. Engines, pools
+# and background threads are created per worker, after the fork: on first
+# use and in the app lifespan. Set GUNICORN_PRELOAD=false to have each
+# worker import the app itself, e.g. so HUP reloads pick up new code.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def when_ready(server):
+    # Runs in the master after the preload and before the first fork
+    if not preload_app:
+        return
+    from app.main import warm_up
+
+    warm_up()
+    # Move everything allocated so far out of the collector's reach, so GC
+    # passes in the workers do not touch (and copy) the shared pages
+    gc.freeze()
+
+
+# Metrics of a worker that exited would otherwise stay in the live gauges
+# that /metrics aggregates from PROMETHEUS_MULTIPROC_DIR.
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,107 @@
+"""
+Pick Argon2id costs for this host.
+
+Follows the RFC 9106 procedure: take the largest memory cost the budget
+allows, halve it while a single pass is already slower than the target, then
+add passes while a verify stays within the target. Passes never go below the
+OWASP minimum for the chosen memory, even if that overshoots the target.
+
+The budget is per concurrent hash: the hashing pool runs HASHING_WORKERS of
+them at once in every gunicorn worker, so peak memory is
+gunicorn workers x HASHING_WORKERS x ARGON2_MEMORY_COST. Run it on the
+production hardware (or the same instance type), with nothing else busy.
+
+    python scripts/calibrate_argon2.py --target-ms 100 --memory-mib 64
+
+Prints ARGON2_* lines for .env. Existing hashes are redone with the new costs
+when their owners next log in.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from argon2.low_level import Type, hash_secret_raw
+
+# OWASP Password Storage Cheat Sheet: equivalent (memory KiB, passes) pairs
+OWASP_MINIMUMS = ((47104, 1), (19456, 2), (12288, 3), (9216, 4), (7168, 5))
+# Below this no amount of passes is recommended
+MIN_MEMORY_KIB = 7168
+
+
+def min_time_cost(memory_kib: int) -> int:
+    for memory, passes in OWASP_MINIMUMS:
+        if memory_kib >= memory:
+            return passes
+    return OWASP_MINIMUMS[-1][1]
+
+
+def verify_ms(memory_kib: int, time_cost: int, parallelism: int, samples: int) -> float:
+    # A verify costs one hash with the stored parameters; take the median
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hash_secret_raw(
+            b"correct horse battery staple", os.urandom(16),
+            time_cost=time_cost, memory_cost=memory_kib, parallelism=parallelism, hash_len=32, type=Type.ID,
+        )
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, memory_kib: int, parallelism: int, samples: int):
+    def trial(memory: int, passes: int) -> float:
+        elapsed = verify_ms(memory, passes, parallelism, samples)
+        print(f"  m={memory:>7} KiB t={passes:>2} p={parallelism}: {elapsed:8.1f} ms")
+        return elapsed
+
+    memory = memory_kib
+    elapsed = trial(memory, 1)
+    while elapsed > target_ms and memory // 2 >= MIN_MEMORY_KIB:
+        memory //= 2
+        elapsed = trial(memory, 1)
+
+    passes = 1
+    while True:
+        elapsed = trial(memory, passes + 1)
+        if elapsed > target_ms:
+            break
+        passes += 1
+    floor = min_time_cost(memory)
+    if passes < floor:
+        print(f"  raised to t={floor}, the OWASP minimum for m={memory} KiB")
+        passes = floor
+    return memory, passes
+
+
+def main(args: argparse.Namespace) -> None:
+    memory_kib = int(args.memory_mib * 1024)
+    if memory_kib < MIN_MEMORY_KIB:
+        raise SystemExit(f"--memory-mib must allow at least {MIN_MEMORY_KIB} KiB")
+    print(f"Target {args.target_ms:g} ms per verify, at most {args.memory_mib:g} MiB per hash")
+    memory, passes = calibrate(args.target_ms, memory_kib, args.parallelism, args.samples)
+
+    cores = os.cpu_count() or 1
+    concurrent = args.hashing_workers or cores
+    print()
+    print(f"ARGON2_MEMORY_COST={memory}")
+    print(f"ARGON2_TIME_COST={passes}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+    print()
+    print(
+        f"Peak per gunicorn worker: HASHING_WORKERS={concurrent} x {memory} KiB = "
+        f"{concurrent * memory / 1024:.0f} MiB ({cores} CPUs on this host)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=100.0, help="verify latency to stay within")
+    parser.add_argument("--memory-mib", type=float, default=64.0, help="memory budget per concurrent hash")
+    parser.add_argument("--parallelism", type=int, default=1, help="lanes per hash; keep 1 when the pool uses every core")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument(
+        "--hashing-workers", type=int, default=int(os.environ.get("HASHING_WORKERS", "0")) or None,
+        help="concurrent hashes per process (HASHING_WORKERS, default the CPU count)",
+    )
+    main(parser.parse_args())
@@ -1,64 +1,153 @@
-import os, time, sys
+import ast, configparser, os, random, time, sys
+from pathlib import Path
 import psycopg  # PostgreSQL client library
-from alembic.config import Config  # Alembic configuration loader
-from alembic import command  # Alembic migration commands
 
 # Get the database URL from environment variables
 DB_URL = os.environ.get("DATABASE_URL")
 
-# Exit if is not configured
-if not DB_URL:
-    print("Error: DATABASE_URL environment variable is not set.", file=sys.stderr)
-    sys.exit("DATABASE_URL not set")
-
 # psycopg (used for wait_db and the lock) requires a ‘postgresql://’ URL
 # SQLAlchemy (used by Alembic) requires ‘postgresql+psycopg://’
 # We create a version of the URL specific to psycopg
-PSYCOPG_DB_URL = DB_URL.replace("postgresql+psycopg://", "postgresql://")
+PSYCOPG_DB_URL = DB_URL.replace("postgresql+psycopg://", "postgresql://") if DB_URL else None
 
 # Arbitrary constant used for advisory locking
 LOCK_KEY = 42
 
+# Seconds to wait for the database to accept connections, and for another
+# replica's migration run to release the lock
+WAIT_TIMEOUT = float(os.environ.get("MIGRATE_WAIT_TIMEOUT", "120"))
+LOCK_TIMEOUT = float(os.environ.get("MIGRATE_LOCK_TIMEOUT", "600"))
+# Longest pause between attempts at the lock (see acquire_lock)
+LOCK_RETRY_CAP = 2.0
+
+# Readiness backoff: first retry after up to 0.1s, doubling up to 5s
+BACKOFF_BASE = 0.1
+BACKOFF_CAP = 5.0
+
+
+def backoff_delays(base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP):
+    # Exponential backoff with full jitter, so replicas started together do
+    # not retry in lockstep
+    attempt = 0
+    while True:
+        yield random.uniform(0, min(cap, base * 2 ** attempt))
+        attempt += 1
+
+
 # Function to wait until the database is ready
-def wait_db(url: str, attempts=60, sleep=2):
-    for i in range(attempts):
+def wait_db(url: str, timeout: float = WAIT_TIMEOUT) -> bool:
+    deadline = time.monotonic() + timeout
+    for attempt, delay in enumerate(backoff_delays(), start=1):
         try:
             # Try to connect to the database with a short timeout
             with psycopg.connect(url, connect_timeout=3) as _:
-                print("[wait_db] DB connection successful.")
+                print(f"[wait_db] DB connection successful (attempt {attempt}).")
                 return True  # Connection successful
-        except Exception as e:
-            # Añadido: Imprime el error para depuración
-            print(f"[wait_db] DB not ready (Attempt {i+1}/{attempts}). Retrying... Error: {e}", file=sys.stderr)
-            time.sleep(sleep)  # Wait before retrying
-    return False  # Failed to connect after all attempts
-
-
-# Exit if the database URL is missing or the DB is not ready
-if not wait_db(PSYCOPG_DB_URL): 
-    sys.exit("DB not ready after multiple attempts.")
-
-# Connect to the database with autocommit enabled
-with psycopg.connect(PSYCOPG_DB_URL, autocommit=True) as conn: 
-    with conn.cursor() as cur:
-        # Try to acquire an advisory lock to prevent concurrent migrations
-        print("[migrate.py] Waiting to acquire migration lock...")
-        while True:
-            cur.execute("SELECT pg_try_advisory_lock(%s)", (LOCK_KEY,))
-            if cur.fetchone()[0]:  # Lock acquired
-                print("[migrate.py] Migration lock acquired.")
-                break
-            time.sleep(1)  # Wait and retry
+        except psycopg.Error as e:
+            if time.monotonic() + delay > deadline:
+                print(f"[wait_db] DB not ready after {attempt} attempts: {e}", file=sys.stderr)
+                return False  # Out of time
+            print(f"[wait_db] DB not ready (attempt {attempt}), retrying in {delay:.2f}s: {e}", file=sys.stderr)
+            time.sleep(delay)  # Wait before retrying
+    return False
 
-        try:
-            # Load Alembic configuration and apply migrations up to the latest version
-            print("[migrate.py] Running Alembic migrations (upgrade head)...")
-            cfg = Config("alembic.ini")
-            # Alembic usará la variable de entorno DATABASE_URL original 
-            # (leída desde alembic/env.py), lo cual es correcto.
-            command.upgrade(cfg, "head")
-            print("[migrate.py] Migrations applied successfully.")
-        finally:
-            # Release the advisory lock
-            cur.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
-            print("[migrate.py] Migration lock released.")
\ No newline at end of file
+
+def head_revisions(ini: str = "alembic.ini") -> set:
+    # Parsed straight from the revision files' "revision = ..." and
+    # "down_revision = ..." lines: importing Alembic and SQLAlchemy to ask
+    # them would cost more than the whole up-to-date check
+    parser = configparser.ConfigParser()
+    parser.read(ini)
+    revisions, parents = set(), set()
+    for path in Path(parser.get("alembic", "script_location"), "versions").glob("*.py"):
+        for node in ast.parse(path.read_text(encoding="utf-8")).body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                name, value = node.targets[0].id, node.value
+                if name == "revision":
+                    revisions.add(ast.literal_eval(value))
+                elif name == "down_revision":
+                    down = ast.literal_eval(value)
+                    # A merge revision has a tuple of parents
+                    parents.update(down if isinstance(down, (tuple, list)) else [down])
+    return revisions - parents
+
+
+def current_revisions(cur) -> set:
+    # Empty for a database that was never migrated
+    cur.execute("SELECT to_regclass('alembic_version') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return set()
+    cur.execute("SELECT version_num FROM alembic_version")
+    return {row[0] for row in cur.fetchall()}
+
+
+def acquire_lock(cur, timeout: float) -> bool:
+    # Polled with pg_try_advisory_lock rather than blocking in
+    # pg_advisory_lock: a statement waiting on the lock holds a snapshot, and
+    # CREATE INDEX CONCURRENTLY in the holder's migrations waits for every
+    # older snapshot to go away, a deadlock the server cannot see. A try-lock
+    # returns at once, so between attempts this session holds no snapshot.
+    # Retries back off with jitter up to LOCK_RETRY_CAP until the deadline.
+    deadline = time.monotonic() + timeout
+    for delay in backoff_delays(cap=LOCK_RETRY_CAP):
+        cur.execute("SELECT pg_try_advisory_lock(%s)", (LOCK_KEY,))
+        if cur.fetchone()[0]:
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+    return False
+
+
+def main() -> None:
+    # Exit if is not configured
+    if not DB_URL:
+        print("Error: DATABASE_URL environment variable is not set.", file=sys.stderr)
+        sys.exit("DATABASE_URL not set")
+
+    # Exit if the DB is not ready
+    if not wait_db(PSYCOPG_DB_URL):
+        sys.exit("DB not ready after multiple attempts.")
+
+    heads = head_revisions()
+
+    # Connect to the database with autocommit enabled
+    with psycopg.connect(PSYCOPG_DB_URL, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            # Fast path: replicas starting after the first one find the
+            # database at head and skip the lock entirely
+            if current_revisions(cur) == heads:
+                print(f"[migrate.py] Database already at head ({', '.join(sorted(heads))}); nothing to do.")
+                return
+
+            # Wait for the replica running the migrations, if any, to finish
+            print("[migrate.py] Waiting to acquire migration lock...")
+            if not acquire_lock(cur, LOCK_TIMEOUT):
+                sys.exit(f"Migration lock not acquired within {LOCK_TIMEOUT:.0f}s.")
+            print("[migrate.py] Migration lock acquired.")
+
+            try:
+                # Whoever held the lock may have just finished the job
+                if current_revisions(cur) == heads:
+                    print("[migrate.py] Another replica applied the migrations; nothing to do.")
+                    return
+                # Apply migrations up to the latest version. Each revision
+                # commits on its own (see alembic/env.py), so an interrupted
+                # run resumes from the last completed one.
+                print("[migrate.py] Running Alembic migrations (upgrade head)...")
+                from alembic.config import Config  # Alembic configuration loader
+                from alembic import command  # Alembic migration commands
+
+                # Alembic will use the original DATABASE_URL environment
+                # variable (read from alembic/env.py), which is correct.
+                command.upgrade(Config("alembic.ini"), "head")
+                print("[migrate.py] Migrations applied successfully.")
+            finally:
+                # Release the advisory lock
+                cur.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+                print("[migrate.py] Migration lock released.")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ from sqlalchemy.orm import sessionmaker, Session
 from app.main import app
 from app.db.base import Base
 from app.db.session import get_db
+from app.core.rate_limit import login_limiter
+from app.core.user_cache import user_cache
 
 # Get the test database URL from the environment variable
 # This is set in ci.yml for the CI environment
@@ -48,4 +50,20 @@ def db_session() -> Generator[Session, None, None]:
     # Roll back the transaction and close the connection
     session.close()
     transaction.rollback()
-    connection.close()
\ No newline at end of file
+    connection.close()
+
+
+@pytest.fixture(scope="function")
+def client(db_session: Session) -> Generator[TestClient, None, None]:
+    """
+    Fixture to provide a TestClient whose requests share the test's transactional session.
+    """
+    # Cached user state must not leak between tests that reuse user ids
+    user_cache.clear()
+    # Nor login attempts, which all come from the same test client address
+    if login_limiter is not None:
+        login_limiter.reset()
+    app.dependency_overrides[get_db] = lambda: db_session
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
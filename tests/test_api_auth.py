@@ -1,8 +1,10 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from app.models.user import User
-from app.core.security import hash_password
+from app.core.security import get_pwd_context, hash_password
+from passlib.hash import argon2
 
 # Note: The 'client' and 'db_session' fixtures are automatically provided
 # from tests/conftest.py. We just need to type-hint them.
@@ -100,4 +102,36 @@ def test_login_user_not_found(client: TestClient):
     )
     
     assert response.status_code == 401
-    assert "Incorrect email or password" in response.json()["detail"]
\ No newline at end of file
+    assert "Incorrect email or password" in response.json()["detail"]
+
+
+def test_login_rehashes_outdated_hash(client: TestClient, db_session: Session):
+    # Stored with weaker costs than the current ARGON2_* settings
+    outdated = argon2.using(type="ID", memory_cost=8192, time_cost=1).hash("mypassword123")
+    user = User(email="rehash@example.com", hashed_password=outdated, is_active=True)
+    db_session.add(user)
+    db_session.commit()
+
+    form = {"username": "rehash@example.com", "password": "wrong_password"}
+    assert client.post("/auth/login", data=form).status_code == 401
+    db_session.refresh(user)
+    assert user.hashed_password == outdated
+
+    form["password"] = "mypassword123"
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement.split()[0])
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        assert client.post("/auth/login", data=form).status_code == 200
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    # The lookup and the rehash; no refresh of the user the commit expired
+    assert statements == ["SELECT", "UPDATE"]
+    db_session.refresh(user)
+    assert user.hashed_password != outdated
+    assert not get_pwd_context().needs_update(user.hashed_password)
+    # And the new hash still logs in
+    assert client.post("/auth/login", data=form).status_code == 200
\ No newline at end of file
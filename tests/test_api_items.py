@@ -0,0 +1,318 @@
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.pagination import encode_cursor
+from app.core.security import create_access_token, hash_password
+from app.models.item import Item
+from app.models.user import User
+
+
+def _create_user(db_session: Session, email: str) -> User:
+    user = User(email=email, hashed_password=hash_password("a_very_long_password_123"))
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def _auth_headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(subject=str(user.id))}"}
+
+
+def _seed_items(db_session: Session, owner: User, count: int) -> None:
+    db_session.add_all(
+        [Item(name=f"item-{i}", description=None, owner_id=owner.id) for i in range(count)]
+    )
+    db_session.commit()
+
+
+def test_list_items_paginates_with_cursor(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "pager@example.com")
+    _seed_items(db_session, owner, 5)
+
+    first = client.get("/items/", params={"limit": 2}, headers=_auth_headers(owner))
+    assert first.status_code == 200
+    page = first.json()
+    assert page["limit"] == 2
+    assert [item["name"] for item in page["items"]] == ["item-0", "item-1"]
+    assert page["next_cursor"]
+
+    seen = [item["id"] for item in page["items"]]
+    cursor = page["next_cursor"]
+    while cursor:
+        res = client.get(
+            "/items/", params={"limit": 2, "cursor": cursor}, headers=_auth_headers(owner)
+        )
+        assert res.status_code == 200
+        seen.extend(item["id"] for item in res.json()["items"])
+        cursor = res.json()["next_cursor"]
+
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+
+def test_list_items_only_returns_own_items(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "owner@example.com")
+    other = _create_user(db_session, "other@example.com")
+    _seed_items(db_session, owner, 2)
+    _seed_items(db_session, other, 3)
+
+    res = client.get("/items/", headers=_auth_headers(owner))
+    assert res.status_code == 200
+    assert {item["owner_id"] for item in res.json()["items"]} == {owner.id}
+    assert res.json()["next_cursor"] is None
+
+
+def test_list_items_rejects_foreign_or_malformed_cursor(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "cursor@example.com")
+    other = _create_user(db_session, "cursor-other@example.com")
+
+    foreign = client.get(
+        "/items/",
+        params={"cursor": encode_cursor(other.id, 1)},
+        headers=_auth_headers(owner),
+    )
+    assert foreign.status_code == 400
+
+    malformed = client.get("/items/", params={"cursor": "not-a-cursor"}, headers=_auth_headers(owner))
+    assert malformed.status_code == 400
+
+
+def test_list_items_streams_ndjson(client: TestClient, db_session: Session, monkeypatch):
+    owner = _create_user(db_session, "stream@example.com")
+    _seed_items(db_session, owner, 3)
+    # Several batches, so the cursor outlives the first one
+    monkeypatch.setattr(settings, "items_stream_batch_size", 2)
+
+    res = client.get("/items/", params={"stream": "true"}, headers=_auth_headers(owner))
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [row["name"] for row in rows] == ["item-0", "item-1", "item-2"]
+
+
+def test_fast_json_listing_matches_model_path(client: TestClient, db_session: Session, monkeypatch):
+    owner = _create_user(db_session, "fast-json@example.com")
+    _seed_items(db_session, owner, 5)
+    db_session.add(Item(name='quote " and ünïcode', description="described", owner_id=owner.id))
+    db_session.commit()
+    headers = _auth_headers(owner)
+    requests = [{"limit": 4}, {"limit": 100}, {"stream": "true"}]
+
+    default = [client.get("/items/", params=params, headers=headers) for params in requests]
+    monkeypatch.setattr(settings, "items_fast_json", True)
+    fast = [client.get("/items/", params=params, headers=headers) for params in requests]
+
+    for slow_res, fast_res in zip(default, fast):
+        assert fast_res.status_code == 200
+        assert fast_res.headers["content-type"] == slow_res.headers["content-type"]
+        assert fast_res.headers["etag"] == slow_res.headers["etag"]
+        assert fast_res.content == slow_res.content
+
+
+def test_bulk_create_returns_items_in_request_order(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "bulk-create@example.com")
+    payload = [{"name": f"bulk-{i}", "description": f"d{i}"} for i in range(5)]
+
+    res = client.post("/items/bulk", json=payload, headers=_auth_headers(owner))
+    assert res.status_code == 201
+    results = res.json()
+    assert [r["status"] for r in results] == ["created"] * 5
+    assert [r["item"]["name"] for r in results] == [p["name"] for p in payload]
+    assert all(r["item"]["owner_id"] == owner.id for r in results)
+    ids = [r["id"] for r in results]
+    assert ids == sorted(ids)
+
+
+def test_bulk_update_is_partial_and_owner_scoped(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "bulk-update@example.com")
+    other = _create_user(db_session, "bulk-intruder@example.com")
+    mine = Item(name="mine", description="keep", owner_id=owner.id)
+    theirs = Item(name="theirs", description="keep", owner_id=other.id)
+    cleared = Item(name="cleared", description="drop", owner_id=owner.id)
+    db_session.add_all([mine, theirs, cleared])
+    db_session.commit()
+
+    res = client.patch(
+        "/items/bulk",
+        json=[
+            {"id": mine.id, "name": "renamed"},
+            {"id": theirs.id, "name": "hijacked"},
+            {"id": cleared.id, "description": None},
+        ],
+        headers=_auth_headers(owner),
+    )
+    assert res.status_code == 200
+    results = res.json()
+    assert [r["status"] for r in results] == ["updated", "not_found", "updated"]
+    assert results[0]["item"] == {"id": mine.id, "name": "renamed", "description": "keep", "owner_id": owner.id}
+    assert results[2]["item"]["name"] == "cleared"
+    assert results[2]["item"]["description"] is None
+
+    db_session.expire_all()
+    assert db_session.get(Item, theirs.id).name == "theirs"
+
+
+def test_bulk_update_rejects_duplicate_ids(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "bulk-dupes@example.com")
+    res = client.patch(
+        "/items/bulk", json=[{"id": 1, "name": "a"}, {"id": 1, "name": "b"}], headers=_auth_headers(owner)
+    )
+    assert res.status_code == 400
+
+
+def test_bulk_delete_reports_per_item_status(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "bulk-delete@example.com")
+    other = _create_user(db_session, "bulk-bystander@example.com")
+    _seed_items(db_session, owner, 2)
+    _seed_items(db_session, other, 1)
+    own_ids = [i.id for i in db_session.query(Item).filter_by(owner_id=owner.id).order_by(Item.id)]
+    other_id = db_session.query(Item).filter_by(owner_id=other.id).one().id
+
+    res = client.request("DELETE", "/items/bulk", json=own_ids + [other_id], headers=_auth_headers(owner))
+    assert res.status_code == 200
+    assert [(r["id"], r["status"]) for r in res.json()] == [
+        (own_ids[0], "deleted"),
+        (own_ids[1], "deleted"),
+        (other_id, "not_found"),
+    ]
+    assert db_session.query(Item).filter_by(owner_id=owner.id).count() == 0
+    assert db_session.query(Item).filter_by(owner_id=other.id).count() == 1
+
+
+def test_bulk_batch_size_is_limited(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "bulk-limit@example.com")
+    headers = _auth_headers(owner)
+    too_many = settings.items_bulk_max_batch + 1
+
+    assert client.post("/items/bulk", json=[{"name": "x"}] * too_many, headers=headers).status_code == 422
+    assert client.request("DELETE", "/items/bulk", json=list(range(too_many)), headers=headers).status_code == 422
+    assert client.post("/items/bulk", json=[], headers=headers).status_code == 422
+
+
+def test_get_item_etag_and_conditional_get(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "etag-item@example.com")
+    headers = _auth_headers(owner)
+    created = client.post("/items/", json={"name": "cached"}, headers=headers)
+    item_id = created.json()["id"]
+    etag = created.headers["ETag"]
+
+    res = client.get(f"/items/{item_id}", headers=headers)
+    assert res.headers["ETag"] == etag
+    assert "no-cache" in res.headers["Cache-Control"]
+
+    not_modified = client.get(f"/items/{item_id}", headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+    updated = client.put(f"/items/{item_id}", json={"name": "changed"}, headers=headers)
+    assert updated.headers["ETag"] != etag
+    refetched = client.get(f"/items/{item_id}", headers={**headers, "If-None-Match": etag})
+    assert refetched.status_code == 200
+    assert refetched.json()["name"] == "changed"
+
+
+def test_list_etag_tracks_owner_writes_only(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "etag-list@example.com")
+    other = _create_user(db_session, "etag-other@example.com")
+    headers = _auth_headers(owner)
+    _seed_items(db_session, owner, 3)
+
+    first = client.get("/items/", params={"limit": 2}, headers=headers)
+    etag = first.headers["ETag"]
+    assert client.get("/items/", params={"limit": 2}, headers={**headers, "If-None-Match": etag}).status_code == 304
+    # A different page of the same collection has its own validator
+    assert client.get("/items/", params={"limit": 3}, headers=headers).headers["ETag"] != etag
+
+    _seed_items(db_session, other, 1)
+    assert client.get("/items/", params={"limit": 2}, headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    client.request("DELETE", "/items/bulk", json=[first.json()["items"][0]["id"]], headers=headers)
+    changed = client.get("/items/", params={"limit": 2}, headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_if_match_guards_update_and_delete(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "etag-match@example.com")
+    headers = _auth_headers(owner)
+    created = client.post("/items/", json={"name": "v1"}, headers=headers)
+    item_id = created.json()["id"]
+    v1 = created.headers["ETag"]
+
+    v2 = client.put(f"/items/{item_id}", json={"name": "v2"}, headers={**headers, "If-Match": v1}).headers["ETag"]
+    stale = client.put(f"/items/{item_id}", json={"name": "lost"}, headers={**headers, "If-Match": v1})
+    assert stale.status_code == 412
+    assert client.delete(f"/items/{item_id}", headers={**headers, "If-Match": v1}).status_code == 412
+    assert client.get(f"/items/{item_id}", headers=headers).json()["name"] == "v2"
+
+    assert client.put("/items/999999", json={"name": "x"}, headers={**headers, "If-Match": v2}).status_code == 404
+    assert client.delete(f"/items/{item_id}", headers={**headers, "If-Match": v2}).status_code == 204
+    assert client.get(f"/items/{item_id}", headers=headers).status_code == 404
+
+
+def test_search_ranks_name_matches_first(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "search@example.com")
+    other = _create_user(db_session, "search-other@example.com")
+    db_session.add_all([
+        Item(name="Garden hose", description="Green and twenty metres of running water", owner_id=owner.id),
+        Item(name="Running shoes", description="Light trail runners", owner_id=owner.id),
+        Item(name="Desk lamp", description=None, owner_id=owner.id),
+        Item(name="Running shorts", description=None, owner_id=other.id),
+    ])
+    db_session.commit()
+
+    res = client.get("/items/search", params={"q": "run"}, headers=_auth_headers(owner))
+    assert res.status_code == 200
+    # Stemmed: "run" matches "running" and "runners"; the name match ranks first
+    assert [item["name"] for item in res.json()["items"]] == ["Running shoes", "Garden hose"]
+
+    res = client.get("/items/search", params={"q": "running -shoes"}, headers=_auth_headers(owner))
+    assert [item["name"] for item in res.json()["items"]] == ["Garden hose"]
+
+
+def test_search_keyset_pagination(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "search-pages@example.com")
+    db_session.add_all(
+        [Item(name=f"widget {i}", description="widget " * (i % 3), owner_id=owner.id) for i in range(7)]
+    )
+    db_session.commit()
+    headers = _auth_headers(owner)
+
+    full = client.get("/items/search", params={"q": "widget", "limit": 100}, headers=headers).json()["items"]
+    seen, cursor = [], None
+    while True:
+        params = {"q": "widget", "limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/items/search", params=params, headers=headers).json()
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert [item["id"] for item in seen] == [item["id"] for item in full]
+    assert len(seen) == 7
+
+    first = client.get("/items/search", params={"q": "widget", "limit": 3}, headers=headers).json()
+    reused = client.get(
+        "/items/search", params={"q": "gadget", "cursor": first["next_cursor"]}, headers=headers
+    )
+    assert reused.status_code == 400
+
+
+def test_autocomplete_matches_name_prefix(client: TestClient, db_session: Session):
+    owner = _create_user(db_session, "autocomplete@example.com")
+    db_session.add_all([
+        Item(name=name, owner_id=owner.id)
+        for name in ["Keyboard", "keycap set", "Monkey", "50% off coupon", "50 cents"]
+    ])
+    db_session.commit()
+    headers = _auth_headers(owner)
+
+    res = client.get("/items/autocomplete", params={"prefix": "KEY"}, headers=headers)
+    assert res.status_code == 200
+    assert [s["name"] for s in res.json()] == ["Keyboard", "keycap set"]
+    # LIKE wildcards in the prefix are literal characters
+    res = client.get("/items/autocomplete", params={"prefix": "50%"}, headers=headers)
+    assert [s["name"] for s in res.json()] == ["50% off coupon"]
@@ -0,0 +1,30 @@
+from benchmarks.compare import compare
+
+
+def _run(**workloads):
+    return {"meta": {}, "workloads": workloads}
+
+
+def _result(rps: float, p50: float, p95: float, p99: float, errors=None):
+    return {"throughput_rps": rps, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "errors": errors or {}}
+
+
+def test_compare_flags_only_changes_beyond_threshold():
+    baseline = _run(read=_result(400, 10, 20, 30), list=_result(200, 30, 60, 90))
+    current = _run(read=_result(380, 10.5, 25, 30), list=_result(260, 20, 40, 60))
+
+    regressed = {(f.workload, f.metric) for f in compare(baseline, current, threshold=0.10) if f.regressed}
+
+    # read: -5% throughput and +5% p50 are tolerated, +25% p95 is not;
+    # list got faster everywhere
+    assert regressed == {("read", "p95_ms")}
+
+
+def test_compare_flags_new_errors_and_skips_missing_workloads():
+    baseline = _run(create=_result(300, 20, 30, 40), delete=_result(300, 20, 30, 40))
+    current = _run(create=_result(300, 20, 30, 40, errors={"500": 3}))
+
+    findings = compare(baseline, current, threshold=0.10)
+
+    assert [(f.workload, f.metric) for f in findings if f.regressed] == [("create", "errors")]
+    assert all(f.workload == "create" for f in findings)
@@ -0,0 +1,133 @@
+import gzip
+import json
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.security import create_access_token
+from app.main import static_assets
+from app.middleware.compression import CompressionMiddleware, uncoded_tags
+from app.models.item import Item
+from app.models.user import User
+
+BIG = {"items": [{"id": n, "name": f"item-{n}"} for n in range(200)]}
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def _client() -> TestClient:
+    inner = FastAPI()
+
+    @inner.api_route("/big", methods=["GET", "HEAD"])
+    def big():
+        return BIG
+
+    @inner.api_route("/{name}.json", methods=["GET", "HEAD"])
+    def document(name: str, request: Request) -> Response:
+        body = (json.dumps(BIG) if name == "big" else json.dumps({"ok": True})).encode()
+        headers = {"ETag": f'"{name}-1"'}
+        if request.method == "HEAD":
+            # Headers only, with the length the GET would have
+            return Response(headers={**headers, "Content-Length": str(len(body))}, media_type="application/json")
+        return Response(body, headers=headers, media_type="application/json")
+
+    @inner.get("/small")
+    def small():
+        return {"ok": True}
+
+    @inner.get("/binary")
+    def binary():
+        return Response(b"\x89PNG" + bytes(4000), media_type="image/png")
+
+    @inner.get("/stream")
+    def stream():
+        lines = (json.dumps(item) + "\n" for item in BIG["items"])
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    return TestClient(
+        CompressionMiddleware(inner, minimum_size=1024, content_types=["application/json", "application/x-ndjson"])
+    )
+
+
+def test_large_json_is_gzipped():
+    res = _client().get("/big", headers=GZIP)
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["vary"] == "Accept-Encoding"
+    assert int(res.headers["content-length"]) < len(json.dumps(BIG))
+    assert res.json() == BIG
+
+
+def test_skipped_responses_are_untouched():
+    client = _client()
+    assert "content-encoding" not in client.get("/small", headers=GZIP).headers
+    assert "content-encoding" not in client.get("/binary", headers=GZIP).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "gzip;q=0"}).headers
+
+
+def test_streamed_responses_are_compressed_per_chunk():
+    with _client().stream("GET", "/stream", headers=GZIP) as res:
+        assert res.headers["content-encoding"] == "gzip"
+        assert "content-length" not in res.headers
+        raw = b"".join(res.iter_raw())
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert [json.loads(line) for line in lines] == BIG["items"]
+
+
+def test_head_gets_the_same_headers_as_get() -> None:
+    client = _client()
+    # The body comes along (and is dropped by the server): identical headers
+    assert client.head("/big", headers=GZIP).headers == client.get("/big", headers=GZIP).headers
+
+    # No body: same decision, without a Content-Length for the compressed size
+    get, head = client.get("/big.json", headers=GZIP).headers, client.head("/big.json", headers=GZIP).headers
+    assert head["content-encoding"] == get["content-encoding"] == "gzip"
+    assert head["vary"] == get["vary"] == "Accept-Encoding"
+    assert head["etag"] == get["etag"] == '"big-1-gzip"'
+    assert "content-length" not in head
+
+    get, head = client.get("/small.json", headers=GZIP).headers, client.head("/small.json", headers=GZIP).headers
+    assert "content-encoding" not in head and "content-encoding" not in get
+    assert head == get
+
+
+def test_uncoded_tags():
+    assert uncoded_tags('"7-3-gzip", W/"items-1-br", "plain"') == {
+        '"7-3"': '"7-3-gzip"',
+        'W/"items-1"': 'W/"items-1-br"',
+    }
+
+
+def test_item_validators_survive_compression(client: TestClient, db_session: Session):
+    user = User(email="gzip@example.com", hashed_password="unused")
+    db_session.add(user)
+    db_session.commit()
+    item = Item(name="long", description="x" * 4000, owner_id=user.id)
+    db_session.add(item)
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(subject=str(user.id))}", **GZIP}
+
+    first = client.get(f"/items/{item.id}", headers=headers)
+    assert first.headers["content-encoding"] == "gzip"
+    etag = first.headers["etag"]
+    assert etag == f'"{item.id}-1-gzip"'
+    assert set(first.headers["vary"].split(", ")) == {"Authorization", "Accept-Encoding"}
+
+    again = client.get(f"/items/{item.id}", headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+
+    updated = client.put(f"/items/{item.id}", json={"name": "renamed"}, headers={**headers, "If-Match": etag})
+    assert updated.status_code == 200
+    stale = client.put(f"/items/{item.id}", json={"name": "again"}, headers={**headers, "If-Match": etag})
+    assert stale.status_code == 412
+
+
+def test_precompressed_static_assets_pass_through(client: TestClient):
+    asset = next(asset for asset in static_assets.assets.values() if "gzip" in asset.bodies)
+    res = client.get(f"/static/{asset.name}", headers=GZIP)
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["etag"] == asset.etags["gzip"]
+    # Encoded once, by the asset store
+    assert res.content == asset.bodies["identity"]
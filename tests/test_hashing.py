@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core import hashing
+from app.core.hashing import BoundedExecutor, HashingBusy
+from app.core.security import hash_password
+from app.models.user import User
+
+
+def test_bounded_executor_fails_fast_when_saturated():
+    executor = BoundedExecutor(workers=1, max_pending=1)
+    release = threading.Event()
+    try:
+        running = executor.submit(release.wait)
+        queued = executor.submit(release.wait)
+        assert executor.in_flight == 2
+        with pytest.raises(HashingBusy):
+            executor.submit(release.wait)
+    finally:
+        release.set()
+    running.result(timeout=5)
+    queued.result(timeout=5)
+    # Slots are returned once jobs finish
+    assert executor.submit(lambda: 42).result(timeout=5) == 42
+    executor.shutdown()
+
+
+def test_login_returns_503_when_hashing_is_saturated(
+    client: TestClient, db_session: Session, monkeypatch: pytest.MonkeyPatch
+):
+    db_session.add(User(email="busy@example.com", hashed_password=hash_password("a_very_long_password_123")))
+    db_session.commit()
+
+    saturated = BoundedExecutor(workers=1, max_pending=0)
+    release = threading.Event()
+    monkeypatch.setattr(hashing, "_executor", saturated)
+    blocker = saturated.submit(release.wait)
+    try:
+        res = client.post(
+            "/auth/login",
+            data={"username": "busy@example.com", "password": "a_very_long_password_123"},
+        )
+        assert res.status_code == 503
+        assert res.headers["retry-after"] == "1"
+    finally:
+        release.set()
+        blocker.result(timeout=5)
+
+    res = client.post(
+        "/auth/login",
+        data={"username": "busy@example.com", "password": "a_very_long_password_123"},
+    )
+    assert res.status_code == 200
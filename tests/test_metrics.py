@@ -0,0 +1,121 @@
+import os
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy.orm import Session
+
+from app.core.metrics import install_query_metrics
+from app.core.security import create_access_token, hash_password
+from app.models.item import Item
+from app.models.user import User
+
+
+@pytest.fixture
+def metrics_client(client: TestClient, db_session: Session) -> TestClient:
+    # Requests run on the test's connection rather than the app engine, so
+    # time that connection's statements the way session.py does for engine
+    install_query_metrics(db_session.connection())
+    return client
+
+
+def _sample(client: TestClient, name: str, **labels: str) -> float:
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    for family in text_string_to_metric_families(res.text):
+        for sample in family.samples:
+            if sample.name == name and all(sample.labels.get(k) == v for k, v in labels.items()):
+                return sample.value
+    return 0.0
+
+
+def _samples(client: TestClient, names: Dict[str, Dict[str, str]]) -> Dict[str, float]:
+    return {key: _sample(client, name, **labels) for key, (name, labels) in names.items()}
+
+
+def test_route_latency_and_sql_per_request(metrics_client: TestClient, db_session: Session):
+    user = User(email="metrics@example.com", hashed_password="unused")
+    db_session.add(user)
+    db_session.flush()
+    item = Item(name="measured", owner_id=user.id)
+    db_session.add(item)
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(subject=str(user.id))}"}
+    route = {"method": "GET", "route": "/items/{item_id}"}
+    watched = {
+        "requests": ("http_requests_total", {**route, "status": "200"}),
+        "latency": ("http_request_duration_seconds_count", route),
+        "queries": ("http_request_db_queries_sum", route),
+        "db_time": ("http_request_db_seconds_sum", route),
+    }
+    before = _samples(metrics_client, watched)
+
+    for _ in range(3):
+        assert metrics_client.get(f"/items/{item.id}", headers=headers).status_code == 200
+
+    after = _samples(metrics_client, watched)
+    assert after["requests"] - before["requests"] == 3
+    assert after["latency"] - before["latency"] == 3
+    # One item SELECT per request plus the first request's auth-state lookup
+    assert after["queries"] - before["queries"] == 4
+    assert after["db_time"] > before["db_time"]
+
+
+def test_argon2_and_hashing_time_are_recorded(metrics_client: TestClient, db_session: Session):
+    password = "a_very_long_password_123"
+    db_session.add(User(email="metrics-login@example.com", hashed_password=hash_password(password)))
+    db_session.commit()
+    watched = {
+        "verify": ("argon2_duration_seconds_count", {"operation": "verify"}),
+        "login_hashing": ("http_request_hashing_seconds_count", {"route": "/auth/login"}),
+    }
+    before = _samples(metrics_client, watched)
+
+    res = metrics_client.post("/auth/login", data={"username": "metrics-login@example.com", "password": password})
+    assert res.status_code == 200
+
+    after = _samples(metrics_client, watched)
+    assert after["verify"] - before["verify"] == 1
+    assert after["login_hashing"] - before["login_hashing"] == 1
+
+
+def test_unmatched_paths_share_one_label(metrics_client: TestClient):
+    before = _sample(metrics_client, "http_requests_total", route="unmatched", status="404")
+    metrics_client.get("/no/such/path/1")
+    metrics_client.get("/no/such/path/2")
+    assert _sample(metrics_client, "http_requests_total", route="unmatched", status="404") - before == 2
+
+
+_WORKER = """
+from app.core.metrics import REQUESTS
+REQUESTS.labels("GET", "/items/", "200").inc({n})
+"""
+
+_SCRAPE = """
+from app.core.metrics import render_metrics
+print(render_metrics()[0].decode())
+"""
+
+
+def test_metrics_aggregate_across_worker_processes(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+
+    def run(code: str) -> str:
+        return subprocess.run(
+            [sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True
+        ).stdout
+
+    run(_WORKER.format(n=2))
+    run(_WORKER.format(n=3))
+    scraped = run(_SCRAPE)
+
+    totals = [
+        sample.value
+        for family in text_string_to_metric_families(scraped)
+        for sample in family.samples
+        if sample.name == "http_requests_total" and sample.labels.get("route") == "/items/"
+    ]
+    assert totals == [5.0]
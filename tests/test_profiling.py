@@ -0,0 +1,105 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.profiling import install_sql_capture
+from app.core.security import create_access_token
+from app.main import app
+from app.middleware.profiling import ProfiledRoute, ProfilingMiddleware
+from app.models.item import Item
+from app.models.user import User
+
+TOKEN = "profile-me-please-0123456789"
+
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path: Path) -> Path:
+    monkeypatch.setattr(settings, "profiling_token", TOKEN)
+    monkeypatch.setattr(settings, "profiling_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "profiling_interval_ms", 1.0)
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def profiled_client(client: TestClient, db_session: Session, profiling: Path) -> TestClient:
+    # The middleware is only added to app when profiling is configured at
+    # import time, so wrap the app here; statements run on the test's connection
+    install_sql_capture(db_session.connection())
+    return TestClient(ProfilingMiddleware(app))
+
+
+def _busy_handler():
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    return {"done": True}
+
+
+def test_token_gated_profile_with_sql(profiled_client: TestClient, db_session: Session, profiling: Path):
+    user = User(email="profiled@example.com", hashed_password="unused")
+    db_session.add(user)
+    db_session.flush()
+    item = Item(name="profiled", owner_id=user.id)
+    db_session.add(item)
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(subject=str(user.id))}"}
+
+    res = profiled_client.get(f"/items/{item.id}", headers={**headers, "X-Profile": TOKEN})
+    assert res.status_code == 200
+    profile_id = res.headers["x-profile-id"]
+
+    files = sorted(p.name for p in profiling.iterdir())
+    assert len(files) == 3
+    assert all(name.startswith(f"{profile_id}-GET-items_item_id") for name in files)
+
+    report = json.loads(next(profiling.glob("*-items_item_id.json")).read_text())
+    assert report["route"] == "/items/{item_id}"
+    assert report["status"] == 200
+    assert any("FROM items" in statement["sql"] for statement in report["sql"])
+    # Statements are recorded without their parameters
+    assert all("profiled" not in statement["sql"] for statement in report["sql"])
+
+
+@pytest.mark.parametrize("header", [None, "wrong-token-0123456789"])
+def test_requests_without_the_token_are_not_profiled(profiled_client: TestClient, profiling: Path, header):
+    headers = {"X-Profile": header} if header else {}
+    res = profiled_client.get("/health", headers=headers)
+    assert res.status_code == 200
+    assert "x-profile-id" not in res.headers
+    assert list(profiling.iterdir()) == []
+
+
+def test_sample_rate_profiles_without_a_header(monkeypatch, profiling: Path):
+    monkeypatch.setattr(settings, "profiling_sample_rate", 1.0)
+    with TestClient(ProfilingMiddleware(app)) as client:
+        res = client.get("/health")
+    assert "x-profile-id" in res.headers
+    assert len(list(profiling.glob("*-GET-health.collapsed"))) == 1
+
+
+def test_sync_endpoint_thread_is_sampled(profiling: Path):
+    router = APIRouter(route_class=ProfiledRoute)
+    router.add_api_route("/busy", _busy_handler, methods=["GET"])
+    busy_app = FastAPI()
+    busy_app.include_router(router)
+
+    res = TestClient(ProfilingMiddleware(busy_app)).get("/busy", headers={"X-Profile": TOKEN})
+    assert res.json() == {"done": True}
+
+    collapsed = next(profiling.glob("*.collapsed")).read_text().splitlines()
+    busy = [line for line in collapsed if line.startswith("threadpool;") and "_busy_handler" in line]
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in busy) >= 3
+
+    speedscope = json.loads(next(profiling.glob("*.speedscope.json")).read_text())
+    profile = speedscope["profiles"][0]
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"])
+    names = {frame["name"] for frame in speedscope["shared"]["frames"]}
+    assert {"threadpool", "_busy_handler"} <= names
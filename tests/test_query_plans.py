@@ -0,0 +1,169 @@
+import re
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.core.security import create_access_token
+from app.models.item import Item
+from app.models.user import User
+
+# Query-plan regression harness for the items router.
+# The table is seeded with enough rows that an owner's items are a small
+# fraction of it, every statement the router issues is captured, and each one
+# is re-run under EXPLAIN. A sequential scan on items, or a range scan that
+# only applies owner_id as a post-filter, means an index regressed.
+
+SEED_OWNERS = 50
+ITEMS_PER_OWNER = 200
+
+
+@contextmanager
+def capture_statements(db_session: Session, executemany: bool = False) -> Iterator[List[Tuple[str, Any]]]:
+    # executemany batches are skipped by default since EXPLAIN takes one parameter set
+    captured: List[Tuple[str, Any]] = []
+    connection = db_session.connection()
+
+    def _record(conn, cursor, statement, parameters, context, is_executemany):
+        if executemany or not is_executemany:
+            captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", _record)
+    try:
+        yield captured
+    finally:
+        event.remove(connection, "before_cursor_execute", _record)
+
+
+@pytest.fixture
+def seeded_owner(db_session: Session) -> User:
+    db_session.execute(
+        insert(User),
+        [
+            {"email": f"seed-{n}@example.com", "hashed_password": "unused", "is_active": True}
+            for n in range(SEED_OWNERS)
+        ],
+    )
+    owner_ids = db_session.scalars(select(User.id).order_by(User.id)).all()
+    db_session.execute(
+        insert(Item),
+        [
+            {"name": f"item-{n}", "description": "seeded", "owner_id": owner_id}
+            for owner_id in owner_ids
+            for n in range(ITEMS_PER_OWNER)
+        ],
+    )
+    # Refresh planner statistics so EXPLAIN reflects the seeded distribution
+    db_session.execute(text("ANALYZE users"))
+    db_session.execute(text("ANALYZE items"))
+    return db_session.get(User, owner_ids[0])
+
+
+def _plan_problems(node: Dict[str, Any]) -> List[str]:
+    problems: List[str] = []
+    if node.get("Relation Name") == "items":
+        scan = node["Node Type"]
+        index_cond = node.get("Index Cond", "")
+        if scan == "Seq Scan":
+            problems.append("sequential scan on items")
+        elif "owner_id" in node.get("Filter", "") and not re.search(r"\(id = ", index_cond):
+            problems.append(f"{scan} on items filters owner_id after reading rows")
+    for child in node.get("Plans", []):
+        problems.extend(_plan_problems(child))
+    return problems
+
+
+def _exercise_items_router(client: TestClient, owner: User, item_id: int) -> None:
+    headers = {"Authorization": f"Bearer {create_access_token(subject=str(owner.id))}"}
+    page = client.get("/items/", params={"limit": 10}, headers=headers)
+    assert page.status_code == 200
+    client.get("/items/", params={"limit": 10, "cursor": page.json()["next_cursor"]}, headers=headers)
+    client.get("/items/", params={"stream": "true"}, headers=headers)
+    client.get(f"/items/{item_id}", headers=headers)
+    client.put(f"/items/{item_id}", json={"name": "renamed"}, headers=headers)
+    client.patch("/items/bulk", json=[{"id": item_id + 1, "name": "bulk"}, {"id": item_id + 2}], headers=headers)
+    client.request("DELETE", "/items/bulk", json=[item_id + 1, item_id + 2], headers=headers)
+    client.delete(f"/items/{item_id}", headers=headers)
+
+
+def test_items_router_queries_avoid_seq_scans(
+    client: TestClient, db_session: Session, seeded_owner: User
+):
+    item_id = db_session.scalar(
+        select(Item.id).where(Item.owner_id == seeded_owner.id).order_by(Item.id).limit(1)
+    )
+
+    with capture_statements(db_session) as statements:
+        _exercise_items_router(client, seeded_owner, item_id)
+
+    items_statements = [(sql, params) for sql, params in statements if "items" in sql]
+    assert items_statements, "the items router issued no queries against items"
+
+    connection = db_session.connection()
+    for sql, params in items_statements:
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).scalar()
+        problems = _plan_problems(plan[0]["Plan"])
+        assert not problems, f"{problems} for:\n{sql}\n{plan}"
+
+
+# Statement budgets: how many SQL statements each endpoint may issue once the
+# user cache is warm. Writes are a single INSERT/UPDATE/DELETE ... RETURNING
+# with no refresh SELECT afterwards; register also looks up the email first so
+# duplicates are rejected before paying for an Argon2 hash.
+@pytest.mark.parametrize(
+    "method, path, body, expected_status, budget",
+    [
+        ("POST", "/items/", {"name": "new"}, 201, 1),
+        ("GET", "/items/{item_id}", None, 200, 1),
+        ("PUT", "/items/{item_id}", {"name": "renamed"}, 200, 1),
+        ("PUT", "/items/{item_id}", {}, 200, 1),
+        ("PUT", "/items/{other_item_id}", {"name": "hijacked"}, 404, 1),
+        ("DELETE", "/items/{item_id}", None, 204, 1),
+        ("POST", "/items/bulk", [{"name": "a"}, {"name": "b"}], 201, 1),
+        ("PATCH", "/items/bulk", [{"id": "{item_id}", "name": "bulk"}], 200, 1),
+        ("DELETE", "/items/bulk", ["{item_id}"], 200, 1),
+    ],
+)
+def test_items_statement_budget(
+    client: TestClient, db_session: Session, method, path, body, expected_status, budget
+):
+    owner = User(email="budget@example.com", hashed_password="x")
+    other = User(email="budget-other@example.com", hashed_password="x")
+    db_session.add_all([owner, other])
+    db_session.flush()
+    item = Item(name="budgeted", owner_id=owner.id)
+    other_item = Item(name="not yours", owner_id=other.id)
+    db_session.add_all([item, other_item])
+    db_session.commit()
+
+    ids = {"item_id": item.id, "other_item_id": other_item.id}
+    headers = {"Authorization": f"Bearer {create_access_token(subject=str(owner.id))}"}
+    if isinstance(body, list):
+        body = [
+            {k: int(v.format(**ids)) if k == "id" else v for k, v in entry.items()}
+            if isinstance(entry, dict)
+            else int(entry.format(**ids))
+            for entry in body
+        ]
+    # Warm the user cache so only the endpoint's own statements are counted
+    client.get("/items/", headers=headers)
+
+    with capture_statements(db_session, executemany=True) as statements:
+        res = client.request(method, path.format(**ids), json=body, headers=headers)
+
+    assert res.status_code == expected_status
+    assert len(statements) == budget, [sql for sql, _ in statements]
+
+
+def test_register_statement_budget(client: TestClient, db_session: Session):
+    with capture_statements(db_session) as statements:
+        res = client.post(
+            "/auth/register", json={"email": "budget-new@example.com", "password": "a_very_long_password_123"}
+        )
+
+    assert res.status_code == 201
+    assert res.json()["email"] == "budget-new@example.com"
+    assert len(statements) == 2, [sql for sql, _ in statements]
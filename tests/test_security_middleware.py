@@ -0,0 +1,110 @@
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.middleware.security import SecurityMiddleware
+
+ORIGIN = "http://localhost"
+
+
+def _client(**options) -> TestClient:
+    inner = FastAPI()
+
+    @inner.get("/ping")
+    def ping(response: Response):
+        response.headers["Vary"] = "Authorization"
+        return {"ok": True}
+
+    defaults = dict(
+        allowed_hosts=["testserver", "*.example.com", "www.example.org"],
+        allow_origins=[ORIGIN],
+        allow_credentials=True,
+        allow_methods=["GET", "POST"],
+        allow_headers=["*"],
+    )
+    return TestClient(SecurityMiddleware(inner, **{**defaults, **options}))
+
+
+@pytest.mark.parametrize(
+    "host, status",
+    [("testserver", 200), ("api.example.com", 200), ("API.Example.com:8443", 200), ("evil.com", 400), ("example.com", 400)],
+)
+def test_host_validation(host: str, status: int):
+    assert _client().get("/ping", headers={"Host": host}).status_code == status
+
+
+def test_bare_domain_redirects_to_allowed_www_host():
+    res = _client().get("/ping?x=1", headers={"Host": "example.org"}, follow_redirects=False)
+    assert res.status_code == 307
+    assert res.headers["location"] == "http://www.example.org/ping?x=1"
+
+
+def test_simple_cors_response_headers():
+    client = _client()
+    res = client.get("/ping", headers={"Origin": ORIGIN})
+    assert res.headers["access-control-allow-origin"] == ORIGIN
+    assert res.headers["access-control-allow-credentials"] == "true"
+    # Merged with the Vary the endpoint set
+    assert res.headers["vary"] == "Authorization, Origin"
+
+    res = client.get("/ping", headers={"Origin": "http://evil.com"})
+    assert "access-control-allow-origin" not in res.headers
+    assert res.headers["vary"] == "Authorization"
+
+
+def test_preflight_responses_are_cached():
+    client = _client()
+    preflight = {"Origin": ORIGIN, "Access-Control-Request-Method": "POST", "Access-Control-Request-Headers": "authorization"}
+    first = client.options("/ping", headers=preflight)
+    second = client.options("/ping", headers=preflight)
+    assert first.status_code == second.status_code == 200
+    assert first.headers["access-control-allow-origin"] == ORIGIN
+    assert first.headers["access-control-allow-headers"] == "authorization"
+    assert first.headers["access-control-allow-methods"] == "GET, POST"
+    assert first.headers == second.headers
+    assert len(client.app._preflights) == 1
+
+
+@pytest.mark.parametrize(
+    "origin, method, failure",
+    [("http://evil.com", "GET", "origin"), (ORIGIN, "DELETE", "method")],
+)
+def test_rejected_preflight(origin: str, method: str, failure: str):
+    res = _client().options("/ping", headers={"Origin": origin, "Access-Control-Request-Method": method})
+    assert res.status_code == 400
+    assert res.text == f"Disallowed CORS {failure}"
+
+
+def test_explicit_header_allow_list():
+    client = _client(allow_headers=["X-Custom"])
+    preflight = {"Origin": ORIGIN, "Access-Control-Request-Method": "GET"}
+    assert client.options("/ping", headers={**preflight, "Access-Control-Request-Headers": "x-custom, content-type"}).status_code == 200
+    assert client.options("/ping", headers={**preflight, "Access-Control-Request-Headers": "authorization"}).status_code == 400
+
+
+def test_proxy_headers_then_https_redirect():
+    client = _client(proxy_trusted_hosts=["*"], https_redirect=True)
+    # Plain HTTP from the proxy's client is redirected...
+    res = client.get("/ping", headers={"X-Forwarded-Proto": "http"}, follow_redirects=False)
+    assert res.status_code == 307
+    assert res.headers["location"] == "https://testserver/ping"
+    # ...TLS terminated at the proxy is not
+    res = client.get("/ping", headers={"X-Forwarded-Proto": "https"}, follow_redirects=False)
+    assert res.status_code == 200
+
+
+def test_forwarded_for_skips_trusted_proxies():
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["client"] = scope["client"]
+        await Response(status_code=204)(scope, receive, send)
+
+    middleware = SecurityMiddleware(app, proxy_trusted_hosts=["testclient", "10.0.0.2"])
+    TestClient(middleware).get("/whoami", headers={"X-Forwarded-For": "203.0.113.9, 10.0.0.2"})
+    assert seen["client"] == ("203.0.113.9", 0)
+
+
+def test_invalid_wildcard_pattern():
+    with pytest.raises(ValueError):
+        SecurityMiddleware(FastAPI(), allowed_hosts=["api.*.com"])
@@ -0,0 +1,59 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# Generous for a shared CI runner; a local import takes about a second
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET_SECONDS", "2.5"))
+# Only needed on the auth path or once a database connection is made
+DEFERRED = ["passlib.context", "argon2", "jose", "cryptography", "psycopg"]
+
+PROBE = f"""
+import json, sys
+import app.main
+from app.db import session
+print(json.dumps({{
+    "loaded": [name for name in {DEFERRED!r} if name in sys.modules],
+    "engines": [session._engine is not None, session._async_engine is not None, session._replica_router is not None],
+}}))
+"""
+
+
+def _import_app(rate_limit_backend: str = "memory", replica_urls: str = "[]") -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=ROOT,
+        env=dict(os.environ, DATABASE_REPLICA_URLS=replica_urls, LOGIN_RATE_LIMIT_BACKEND=rate_limit_backend),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _import_seconds(stderr: str) -> float:
+    # -X importtime lines: "import time: self [us] | cumulative | module"
+    match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| app\.main$", stderr, re.MULTILINE)
+    assert match, stderr[-2000:]
+    return int(match.group(1)) / 1e6
+
+
+@pytest.mark.parametrize(
+    "rate_limit_backend, replica_urls",
+    [("memory", "[]"), ("postgres", "[]"), ("memory", '["postgresql+psycopg://u:p@replica:5432/db"]')],
+)
+def test_import_defers_auth_and_database_setup(rate_limit_backend: str, replica_urls: str):
+    probe = json.loads(_import_app(rate_limit_backend, replica_urls).stdout)
+    assert probe["loaded"] == []
+    assert probe["engines"] == [False, False, False]
+
+
+@pytest.mark.skipif(IMPORT_TIME_BUDGET <= 0, reason="IMPORT_TIME_BUDGET_SECONDS=0 disables the budget")
+def test_import_time_within_budget():
+    # Best of three, to ride out a cold disk cache or a busy runner
+    seconds = min(_import_seconds(_import_app().stderr) for _ in range(3))
+    assert seconds < IMPORT_TIME_BUDGET, f"importing app.main took {seconds:.2f}s (budget {IMPORT_TIME_BUDGET}s)"
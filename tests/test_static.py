@@ -0,0 +1,117 @@
+import gzip
+import os
+import re
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core import static
+from app.core.static import AssetStore, StaticAssets
+
+CSS = "body { color: #222; }\n" * 40
+PAGE = '<html><head><link href="/static/site.css" rel="stylesheet"></head><body>' + "hello " * 100 + "</body></html>"
+
+
+@pytest.fixture
+def web_dir(tmp_path: Path) -> Path:
+    (tmp_path / "site.css").write_text(CSS)
+    (tmp_path / "index.html").write_text(PAGE)
+    (tmp_path / "tiny.txt").write_text("hi")
+    return tmp_path
+
+
+def _client(store: AssetStore) -> TestClient:
+    app = FastAPI()
+    app.mount("/static", StaticAssets(store))
+    return TestClient(app)
+
+
+def test_pages_link_versioned_assets(web_dir: Path):
+    client = _client(AssetStore(str(web_dir)))
+    page = client.get("/static/index.html")
+    assert page.headers["cache-control"] == "no-cache"
+    url = re.search(r'href="(/static/site\.css\?v=\w+)"', page.text).group(1)
+
+    versioned = client.get(url)
+    assert versioned.text == CSS
+    assert versioned.headers["cache-control"] == "public, max-age=31536000, immutable"
+    # Without the version (or with a stale one) the asset must be revalidated
+    assert client.get("/static/site.css").headers["cache-control"] == "no-cache"
+    assert client.get("/static/site.css?v=stale").headers["cache-control"] == "no-cache"
+
+
+def test_accept_encoding_negotiation(web_dir: Path):
+    client = _client(AssetStore(str(web_dir)))
+
+    res = client.get("/static/site.css", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["vary"] == "Accept-Encoding"
+    assert int(res.headers["content-length"]) < len(CSS)
+    assert res.text == CSS  # httpx decoded it
+
+    identity = client.get("/static/site.css", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] != res.headers["etag"]
+
+    # Too small to be worth compressing
+    tiny = client.get("/static/tiny.txt", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in tiny.headers
+    assert "vary" not in tiny.headers
+
+
+def test_etag_revalidation(web_dir: Path):
+    client = _client(AssetStore(str(web_dir)))
+    first = client.get("/static/site.css", headers={"Accept-Encoding": "gzip"})
+    again = client.get("/static/site.css", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_unknown_asset_and_method(web_dir: Path):
+    client = _client(AssetStore(str(web_dir)))
+    assert client.get("/static/missing.js").status_code == 404
+    assert client.get("/static/../conftest.py").status_code == 404
+    assert client.post("/static/site.css").status_code == 405
+
+
+def test_websocket_is_refused(web_dir: Path):
+    client = _client(AssetStore(str(web_dir)))
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect("/static/site.css"):
+            pass
+    assert exc_info.value.code == 1000
+
+
+def test_prebuilt_encodings_are_used(web_dir: Path, monkeypatch):
+    monkeypatch.setattr(static, "brotli", None)
+    # Any smaller payload stands in for a brotli file produced at build time
+    (web_dir / "site.css.br").write_bytes(gzip.compress(CSS.encode()))
+    client = _client(AssetStore(str(web_dir)))
+    res = client.get("/static/site.css", headers={"Accept-Encoding": "gzip, br"})
+    assert res.headers["content-encoding"] == "br"
+    assert client.get("/static/site.css.br").status_code == 404
+
+
+def test_reload_picks_up_changes(web_dir: Path, monkeypatch):
+    monkeypatch.setattr(static, "RELOAD_CHECK_INTERVAL", 0)
+    store = AssetStore(str(web_dir), reload=True)
+    client = _client(store)
+    before = client.get("/static/index.html").text
+
+    css = web_dir / "site.css"
+    css.write_text(CSS + "a { color: red; }\n")
+    os.utime(css, (css.stat().st_atime, css.stat().st_mtime + 5))
+
+    assert client.get("/static/site.css").text.endswith("red; }\n")
+    # The page links the new version of the stylesheet
+    assert client.get("/static/index.html").text != before
+
+
+def test_app_serves_index_from_memory(client: TestClient):
+    res = client.get("/")
+    assert res.status_code == 200
+    assert res.headers["cache-control"] == "no-cache"
+    assert re.search(r'/static/app\.js\?v=\w+', res.text)
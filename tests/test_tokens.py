@@ -0,0 +1,79 @@
+import base64
+import json
+import time
+
+import pytest
+
+from app.core import security
+from app.core.security import HMACBackend, InvalidToken, JoseBackend
+
+KEY = "unit-test-secret"
+
+
+def _claims(exp_offset: int = 60) -> dict:
+    return {"sub": "42", "exp": int(time.time()) + exp_offset, "ver": 3}
+
+
+@pytest.mark.parametrize("signer", [JoseBackend(), HMACBackend()], ids=["jose", "hmac"])
+@pytest.mark.parametrize("verifier", [JoseBackend(), HMACBackend()], ids=["jose", "hmac"])
+def test_backends_are_interchangeable(signer, verifier):
+    token = signer.encode(_claims(), KEY, "HS256")
+    assert verifier.decode(token, KEY, "HS256")["sub"] == "42"
+
+
+@pytest.mark.parametrize("backend", [JoseBackend(), HMACBackend()], ids=["jose", "hmac"])
+def test_backends_reject_bad_tokens(backend):
+    token = backend.encode(_claims(), KEY, "HS256")
+    with pytest.raises(InvalidToken):
+        backend.decode(token, "wrong-key", "HS256")
+    with pytest.raises(InvalidToken):
+        backend.decode(token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1], KEY, "HS256")
+    with pytest.raises(InvalidToken):
+        backend.decode(backend.encode(_claims(exp_offset=-10), KEY, "HS256"), KEY, "HS256")
+    with pytest.raises(InvalidToken):
+        backend.decode("not.a.token", KEY, "HS256")
+
+
+def test_hmac_backend_rejects_unsigned_tokens():
+    header = base64.urlsafe_b64encode(json.dumps({"alg": "none"}).encode()).rstrip(b"=")
+    payload = base64.urlsafe_b64encode(json.dumps(_claims()).encode()).rstrip(b"=")
+    with pytest.raises(InvalidToken):
+        HMACBackend().decode(f"{header.decode()}.{payload.decode()}.", KEY, "HS256")
+
+
+@pytest.mark.parametrize("claim, value", [("exp", "abc"), ("exp", None), ("nbf", [1]), ("ver", "abc")])
+def test_malformed_claims_are_rejected(claim: str, value: object, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(security, "token_backend", HMACBackend())
+    security.token_cache.clear()
+    token = security.token_backend.encode({**_claims(), claim: value}, KEY, "HS256")
+    if claim != "ver":
+        with pytest.raises(InvalidToken):
+            security.token_backend.decode(token, KEY, "HS256")
+    monkeypatch.setattr(security.settings, "jwt_secret_key", KEY)
+    monkeypatch.setattr(security.settings, "jwt_algorithm", "HS256")
+    assert security.decode_access_token(token) is None
+
+
+def test_decode_cache_skips_reverification(monkeypatch: pytest.MonkeyPatch):
+    security.token_cache.clear()
+    token = security.create_access_token(subject="7", version=2)
+
+    calls = []
+    original_decode = security.token_backend.decode
+
+    def counting_decode(*args):
+        calls.append(args)
+        return original_decode(*args)
+
+    monkeypatch.setattr(security.token_backend, "decode", counting_decode)
+
+    first = security.decode_access_token(token)
+    second = security.decode_access_token(token)
+    assert first == second
+    assert first is not None and (first.subject, first.version) == ("7", 2)
+    assert len(calls) == 1
+
+    # Invalid tokens are never cached
+    assert security.decode_access_token(token + "x") is None
+    assert security.decode_access_token(token + "x") is None
+    assert len(calls) == 3
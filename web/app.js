@@ -237,7 +237,15 @@ document.addEventListener("DOMContentLoaded", () => {
      */
     const fetchItems = async () => {
         try {
-            const items = await apiFetch("/items/");
+            // The list endpoint is cursor-paginated: follow next_cursor until the last page
+            const items = [];
+            let cursor = null;
+            do {
+                const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+                const page = await apiFetch(`/items/${query}`);
+                items.push(...page.items);
+                cursor = page.next_cursor;
+            } while (cursor);
             renderItems(items); // Call the secure render function
         } catch (err) {
             console.error("Failed to fetch items:", err);